@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Compares keeping a deepcopy of every found curve with keeping its CurveRecord, per curve in memory and time.
+
+Usage: python3 benchmarks/bench_records.py [-n 1000] [--seed 0x00F5...] [--prime 0xDB7C...]
+"""
+
+import argparse
+import copy
+import time
+import tracemalloc
+
+from sage.all import ZZ
+
+from dissectgen.standards.x962_gen import X962
+
+
+def measure(keep, curve, n: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = [keep(curve) for _ in range(n)]
+    wall = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert all(k.json_export() == curve.json_export() for k in kept[:10])
+    return {"us_per_curve": 1e6 * wall / n, "bytes_per_curve": memory / n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the storage of the found curves")
+    parser.add_argument("-n", type=int, default=1000, help="Number of copies of the curve.")
+    parser.add_argument("--seed", default="0X00F50B028E4D696E676875615175290472783FB1", help="Seed of the curve.")
+    parser.add_argument("--prime", default="0XDB7C2ABF62E35E668076BEAD208B", help="Prime of the curve.")
+    args = parser.parse_args()
+    curve = X962(args.seed, ZZ(args.prime))
+    curve.find_curve()
+    for name, keep in (("deepcopy", copy.deepcopy), ("CurveRecord", lambda c: c.record())):
+        result = measure(keep, curve, args.n)
+        print(f"{name:>12}: {result['us_per_curve']:9.1f} us/curve, {result['bytes_per_curve']:9.0f} bytes/curve")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Compares the polling ParallelRunner with the event-driven SelectorRunner on many trivial tasks.
+
+Usage: python3 benchmarks/bench_runner.py [-n 1000] [--tasks 8] [--command "true"]
+"""
+
+import argparse
+import resource
+import time
+
+from dissectgen.job_manager.manager import ParallelRunner, Task
+from dissectgen.job_manager.selector import SelectorRunner
+
+
+def run(runner_cls, n: int, tasks: int, command: str) -> dict:
+    finished = []
+    pr = runner_cls()
+    pr.parallel_tasks = tasks
+    pr.job_feeder = lambda: (Task(command, "") for _ in range(n))
+    pr.cb_job_finished = lambda r: finished.append(r.ret_code)
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    pr.work()
+    wall = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    assert len(finished) == n and not any(finished), "some tasks failed"
+    return {"wall": wall, "manager_cpu": cpu, "per_task_ms": 1000 * wall / n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the task runners")
+    parser.add_argument("-n", type=int, default=1000, help="Number of tasks.")
+    parser.add_argument("--tasks", type=int, default=8, help="Number of tasks to run in parallel.")
+    parser.add_argument("--command", default="true", help="Trivial command executed by every task.")
+    args = parser.parse_args()
+    for runner_cls in (ParallelRunner, SelectorRunner):
+        result = run(runner_cls, args.n, args.tasks, args.command)
+        print(f"{runner_cls.__name__:>16}: wall {result['wall']:8.2f} s, manager CPU {result['manager_cpu']:7.2f} s, "
+              f"{result['per_task_ms']:7.2f} ms/task")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Compares the per-attempt seed increment on hex strings (as the standards did) with Seed.
+
+Usage: python3 benchmarks/bench_seeds.py [-n 100000] [--digits 40]
+"""
+
+import argparse
+import time
+
+from sage.all import ZZ, Integers
+
+from dissectgen.standards.utils import Seed
+
+
+def hex_increment(seed: str, i=1) -> str:
+    """The former increment_seed: parses into ZZ, reduces in Integers(2^g) and formats back"""
+    g = len(seed) * 4 - 8
+    g = g % 8 + g
+    f = "0" + str(len(seed) - 2) + "x"
+    return '0x' + format(ZZ(Integers(2 ** g)(ZZ(seed) + i)), f)
+
+
+def run(increment, seed, n: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(n):
+        seed = increment(seed)
+    return time.perf_counter() - start, seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the seed increments")
+    parser.add_argument("-n", type=int, default=100000, help="Number of increments.")
+    parser.add_argument("--digits", type=int, default=40, help="Hex digits of the seed.")
+    args = parser.parse_args()
+    initial_seed = "0x" + "f" * (args.digits - 4) + "0000"
+    hex_wall, hex_seed = run(hex_increment, initial_seed, args.n)
+    seed_wall, seed = run(lambda s: s + 1, Seed.from_hex(initial_seed), args.n)
+    assert str(seed) == hex_seed
+    for name, wall in (("hex string", hex_wall), ("Seed", seed_wall)):
+        print(f"{name:>10}: {wall:8.3f} s, {1e9 * wall / args.n:9.1f} ns/attempt")
+    print(f"eliminated {1e9 * (hex_wall - seed_wall) / args.n:.1f} ns/attempt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+"""
+Compact binary format of the generated curves of one standard and bit-size, for the analysis of many curves.
+The integers of a curve are stored as little-endian 64-bit limbs of a fixed width in columns, i.e. all values
+of p, then all values of a, etc., so that a memory map of the file gives a NumPy view of every column.
+The file starts with the magic, the version and the length of a JSON header with the metadata of the results
+and the layout of the columns, padded to ALIGNMENT bytes.
+
+Columns (signed ones in two's complement): p, a, b, gx, gy (zeros without a generator, see the flag HAS_GENERATOR),
+order, cofactor, trace (signed), embedding_degree, cm_discriminant (signed, zero if deferred with the flag CM_MISSING,
+see properties.py, partial ones have the flag CM_PARTIAL), j_invariant, seed (signed) and the single-limb columns
+seed_digits (the number of hex digits of the seed) and flags.
+"""
+
+import argparse
+import json
+import os
+import struct
+from math import ceil
+
+import numpy
+
+from dissectgen import jsonl
+from dissectgen.merge import iter_results
+
+MAGIC = b"DSCG"
+VERSION = 1
+ALIGNMENT = 64
+SUFFIX = ".curves"
+HAS_GENERATOR = 1
+CM_MISSING = 2
+CM_PARTIAL = 4
+PARTIAL = "cm_discriminant_partial"  # as properties.PARTIAL
+FIELD_COLUMNS = ["p", "a", "b", "gx", "gy", "order", "cofactor", "trace", "embedding_degree", "cm_discriminant",
+                 "j_invariant"]
+SIGNED_COLUMNS = {"trace", "cm_discriminant", "seed"}
+PREFIX = struct.Struct("<4sII")
+
+
+def limbs_for(bits: int) -> int:
+    """Limbs of a value up to 16p in absolute value (e.g. the CM discriminant) with a sign"""
+    return ceil((bits + 5) / 64)
+
+
+def hex_digits(seed: str) -> int:
+    return len(seed.lstrip("-")) - 2
+
+
+def padded_hex(x: int) -> str:
+    """Inverse of int_to_hex_string of the standards"""
+    return "0x" + format(x, "0%dx" % (ceil(x.bit_length() / 8) * 2))
+
+
+def seed_hex(seed: int, digits: int) -> str:
+    return ("-" if seed < 0 else "") + "0x" + format(abs(seed), "0%dx" % digits)
+
+
+def to_limbs(x: int, limbs: int, signed=False) -> bytes:
+    return x.to_bytes(limbs * 8, "little", signed=signed)
+
+
+def from_limbs(row, signed=False) -> int:
+    return int.from_bytes(row.tobytes(), "little", signed=signed)
+
+
+def curve_values(curve: dict) -> dict:
+    """The integers of an exported curve by column"""
+    generator = curve["generator"]
+    has_generator = generator["x"]["raw"] != ""
+    properties = curve["properties"]
+    cm = properties["cm_discriminant"]
+    flags = (HAS_GENERATOR if has_generator else 0) | (CM_MISSING if cm is None else 0) | \
+        (CM_PARTIAL if properties.get(PARTIAL, False) else 0)
+    return {"p": int(curve["field"]["p"], 16), "a": int(curve["params"]["a"]["raw"], 16),
+            "b": int(curve["params"]["b"]["raw"], 16),
+            "gx": int(generator["x"]["raw"], 16) if has_generator else 0,
+            "gy": int(generator["y"]["raw"], 16) if has_generator else 0,
+            "order": int(curve["order"]), "cofactor": int(curve["cofactor"]), "trace": int(properties["trace"], 16),
+            "embedding_degree": int(properties["embedding_degree"], 16),
+            "cm_discriminant": 0 if cm is None else int(cm, 16),
+            "j_invariant": int(properties["j_invariant"], 16), "seed": int(curve["seed"], 16),
+            "seed_digits": hex_digits(curve["seed"]), "flags": flags}
+
+
+class CurveWriter:
+    """
+    Writes curves into the binary format. The rows are collected in a temporary file and transposed into
+    the columns by close, which needs the number of curves.
+    """
+
+    def __init__(self, file_name: str, metadata: dict, bits: int, seed_limbs: int):
+        self.file_name = file_name
+        self.metadata = dict(metadata, bits=bits)
+        limbs = limbs_for(bits)
+        self.columns = [[c, limbs] for c in FIELD_COLUMNS] + [["seed", seed_limbs], ["seed_digits", 1],
+                                                             ["flags", 1]]
+        self.row_limbs = sum(l for _, l in self.columns)
+        self.rows_name = f"{file_name}.rows"
+        self.rows = open(self.rows_name, "wb")
+        self.count = 0
+
+    def write_curve(self, curve: dict):
+        name = f"{self.metadata['standard']}_sim_{self.metadata['bits']}_{curve['seed']}"
+        if curve["name"] != name or curve["category"] != self.metadata["category"] or curve["desc"] != "":
+            raise ValueError(f"Curve {curve['name']} cannot be stored in the binary format")
+        values = curve_values(curve)
+        self.rows.write(b"".join(to_limbs(values[c], l, c in SIGNED_COLUMNS) for c, l in self.columns))
+        self.count += 1
+
+    def close(self, block=1 << 16):
+        self.rows.close()
+        header = json.dumps(dict(self.metadata, count=self.count, columns=self.columns)).encode()
+        prefix = PREFIX.pack(MAGIC, VERSION, len(header)) + header
+        tmp_name = f"{self.file_name}.tmp"
+        with open(tmp_name, "wb") as f:
+            f.write(prefix + b"\0" * (-len(prefix) % ALIGNMENT))
+            if self.count > 0:
+                rows = numpy.memmap(self.rows_name, dtype="<u8", mode="r", shape=(self.count, self.row_limbs))
+                start = 0
+                for _, limbs in self.columns:
+                    for i in range(0, self.count, block):
+                        f.write(numpy.ascontiguousarray(rows[i:i + block, start:start + limbs]).tobytes())
+                    start += limbs
+                del rows
+        os.remove(self.rows_name)
+        os.replace(tmp_name, self.file_name)
+
+
+class CurveTable:
+    """Memory-mapped curves in the binary format, column(name) is a NumPy view of shape (count, limbs)"""
+
+    def __init__(self, file_name: str):
+        with open(file_name, "rb") as f:
+            magic, version, header_length = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{file_name} is not a file of curves of version {VERSION}")
+            self.metadata = json.loads(f.read(header_length))
+        offset = PREFIX.size + header_length
+        offset += -offset % ALIGNMENT
+        self.count = self.metadata["count"]
+        self.columns = {}
+        data = numpy.memmap(file_name, dtype="<u8", mode="r", offset=offset) if self.count else None
+        start = 0
+        for name, limbs in self.metadata["columns"]:
+            size = self.count * limbs
+            self.columns[name] = data[start:start + size].reshape(self.count, limbs) if self.count else \
+                numpy.zeros((0, limbs), dtype="<u8")
+            start += size
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name: str):
+        return self.columns[name]
+
+    def fits(self, name: str):
+        """Mask of the rows whose value of the column fits into the lowest limb, e.g. small embedding degrees"""
+        column = self.columns[name]
+        return (column[:, 1:] == 0).all(axis=1)
+
+    def low(self, name: str):
+        """The lowest limb of the column, equal to the value where fits(name)"""
+        return self.columns[name][:, 0]
+
+    def value(self, name: str, i: int) -> int:
+        return from_limbs(self.columns[name][i], name in SIGNED_COLUMNS)
+
+    def curve(self, i: int) -> dict:
+        """The curve in the format of VerifiableCurve.json_export"""
+        v = {name: self.value(name, i) for name in self.columns}
+        seed = seed_hex(v["seed"], v["seed_digits"])
+        has_generator = v["flags"] & HAS_GENERATOR
+        metadata = self.metadata
+        properties = {"cm_discriminant": None if v["flags"] & CM_MISSING else hex(v["cm_discriminant"]),
+                      "embedding_degree": hex(v["embedding_degree"]), "trace": hex(v["trace"]),
+                      "j_invariant": hex(v["j_invariant"])}
+        if v["flags"] & CM_PARTIAL:
+            properties[PARTIAL] = True
+        return {"name": f"{metadata['standard']}_sim_{metadata['bits']}_{seed}", "category": metadata["category"],
+                "desc": "", "field": {"type": "Prime", "p": padded_hex(v["p"]), "bits": metadata["bits"]},
+                "form": "Weierstrass", "params": {"a": {"raw": padded_hex(v["a"])}, "b": {"raw": padded_hex(v["b"])}},
+                "generator": {"x": {"raw": padded_hex(v["gx"]) if has_generator else ""},
+                              "y": {"raw": padded_hex(v["gy"]) if has_generator else ""}},
+                "order": v["order"], "cofactor": v["cofactor"], "properties": properties, "seed": seed}
+
+    def curves(self, rows=None):
+        """Yields the curves of the rows (e.g. a mask or indices of a filter), all by default"""
+        indices = range(self.count) if rows is None else numpy.arange(self.count)[rows]
+        for i in indices:
+            yield self.curve(int(i))
+
+
+def json_to_binary(file_name: str, binary_name: str):
+    """Converts the results (JSON or JSON Lines) of a standard and bit-size into the binary format"""
+    header, footer, seed_bits, bits, category = None, None, 1, None, None
+    for kind, record in iter_results(file_name):
+        if kind == jsonl.HEADER:
+            header = record
+        elif kind == "curve":
+            seed_bits = max(seed_bits, abs(int(record["seed"], 16)).bit_length() + 1)
+            bits, category = record["field"]["bits"], record["category"]
+        else:
+            footer = record
+    if header is None or footer is None:
+        raise ValueError(f"{file_name} is not a finished results file, its {'header' if header is None else 'footer'} "
+                         f"is missing")
+    if bits is None:
+        bits = int(os.path.basename(file_name).split("_")[1])
+    standard = footer["name"].rsplit("_sim_", 1)[0]
+    metadata = {"standard": standard, "category": category or f"{standard}_sim", "name": footer.get("name"),
+                "desc": footer.get("desc"), "initial_seed": header["initial_seed"],
+                "seeds_tried": footer["seeds_tried"]}
+    writer = CurveWriter(binary_name, metadata, bits, ceil(seed_bits / 64))
+    for kind, record in iter_results(file_name):
+        if kind == "curve":
+            writer.write_curve(record)
+    writer.close()
+
+
+def binary_to_json(binary_name: str, file_name: str):
+    """Converts the binary format into the results of SimulatedCurves in JSON (or JSON Lines)"""
+    table = CurveTable(binary_name)
+    metadata = table.metadata
+    summary = {"name": metadata["name"], "desc": metadata["desc"], "initial_seed": metadata["initial_seed"],
+               "seeds_tried": metadata["seeds_tried"], "seeds_successful": len(table)}
+    if file_name.endswith(jsonl.SUFFIX):
+        stream = jsonl.CurveStream(file_name, metadata["initial_seed"])
+        for curve in table.curves():
+            stream.write_curve(curve)
+        stream.close(summary)
+        return
+    with open(file_name, "w") as f:
+        json.dump(dict(summary, curves=list(table.curves())), f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converts the results between JSON and the binary format")
+    parser.add_argument("input", help=f"Results in JSON or JSON Lines, or curves in the binary format ({SUFFIX})")
+    parser.add_argument("output", help="Output file, the binary format unless the input is binary")
+    args = parser.parse_args()
+    if args.input.endswith(SUFFIX):
+        binary_to_json(args.input, args.output)
+    else:
+        json_to_binary(args.input, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Binary channel for the results of a generation task to its manager.
+Every frame is the length of the payload (4 bytes, big-endian), the kind of the frame (1 byte) and the payload.
+A CURVE frame carries the number of attempts made (8 bytes) and the exported curve as compact JSON,
+the DONE frame the counts of seeds tried and successful (8 bytes each). A task starts with the RESUMED frame,
+the number of curves it sent before it was resumed from its checkpoint (8 bytes), the manager keeps only these.
+A task started by a subprocess runner writes the frames into an inherited file descriptor, a task run by a worker
+of the pool hands them to the sink installed by the worker (the channel 'parent').
+"""
+
+import json
+import os
+import struct
+
+CURVE = 1
+DONE = 2
+RESUMED = 3
+PARENT = "parent"
+
+FRAME_HEADER = struct.Struct(">IB")
+ATTEMPT = struct.Struct(">Q")
+COUNTS = struct.Struct(">QQ")
+FOUND = struct.Struct(">Q")
+
+_parent_sink = None
+
+
+def set_parent_sink(sink):
+    """Installs the function receiving the frames sent to the channel 'parent'"""
+    global _parent_sink
+    _parent_sink = sink
+
+
+def encode_frame(kind: int, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload), kind) + payload
+
+
+def encode_curve(attempt: int, exported: dict, encoder=None) -> bytes:
+    return ATTEMPT.pack(attempt) + json.dumps(exported, cls=encoder, separators=(",", ":")).encode()
+
+
+def decode_curve(payload: bytes):
+    """Returns (attempt, exported curve)"""
+    return ATTEMPT.unpack_from(payload)[0], json.loads(payload[ATTEMPT.size:])
+
+
+def encode_done(seeds_tried: int, seeds_successful: int) -> bytes:
+    return COUNTS.pack(seeds_tried, seeds_successful)
+
+
+def decode_done(payload: bytes):
+    """Returns (seeds tried, seeds successful)"""
+    return COUNTS.unpack(payload)
+
+
+def encode_resumed(found: int) -> bytes:
+    return FOUND.pack(found)
+
+
+def decode_resumed(payload: bytes) -> int:
+    """Returns the number of curves sent before the task was resumed"""
+    return FOUND.unpack(payload)[0]
+
+
+class FrameDecoder:
+    """Splits the bytes received from a channel into frames"""
+
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, data: bytes) -> list:
+        """Adds the data, returns the completed frames as (kind, payload)"""
+        self.buffer += data
+        frames, start = [], 0
+        while len(self.buffer) - start >= FRAME_HEADER.size:
+            length, kind = FRAME_HEADER.unpack_from(self.buffer, start)
+            end = start + FRAME_HEADER.size + length
+            if end > len(self.buffer):
+                break
+            frames.append((kind, self.buffer[start + FRAME_HEADER.size:end]))
+            start = end
+        self.buffer = self.buffer[start:]
+        return frames
+
+    def pending(self) -> bool:
+        return len(self.buffer) > 0
+
+
+class ResultChannel:
+    """Task side of the channel given by the command line: a file descriptor or 'parent'"""
+
+    def __init__(self, spec: str, encoder=None):
+        self._encoder = encoder
+        self._file = None
+        if spec == PARENT:
+            if _parent_sink is None:
+                raise ValueError("The channel 'parent' is available only in a worker of the pool")
+            self._send = _parent_sink
+        else:
+            self._file = os.fdopen(int(spec), "wb")
+            self._send = self._write
+
+    def _write(self, frame: bytes):
+        self._file.write(frame)
+        self._file.flush()
+
+    def send_curve(self, attempt: int, exported: dict):
+        self._send(encode_frame(CURVE, encode_curve(attempt, exported, self._encoder)))
+
+    def send_resumed(self, found: int):
+        self._send(encode_frame(RESUMED, encode_resumed(found)))
+
+    def send_done(self, seeds_tried: int, seeds_successful: int):
+        self._send(encode_frame(DONE, encode_done(seeds_tried, seeds_successful)))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,88 @@
+"""Splitting of the attempts of a campaign into seed ranges (chunks) processed by individual tasks"""
+
+from math import ceil
+
+
+def equal_chunks(attempts: int, tasks: int):
+    """Splits attempts into (at most) #tasks chunks of equal size"""
+    attempts_task = attempts // tasks + 1 * (attempts % tasks != 0)
+    while attempts > 0:
+        a = min(attempts, attempts_task)
+        yield a
+        attempts -= a
+
+
+class ChunkScheduler:
+    """
+    Guided self-scheduling of chunks with sizes derived from the measured cost of seeds.
+
+    Before any chunk finishes, chunks of initial_chunk seeds are handed out. Afterwards every chunk gets
+    the factoring share remaining/(2*tasks) of the remaining seeds, so the chunks shrink towards the end
+    of the campaign and the tasks finish together. Using the measured seconds per seed, a chunk is kept
+    at least min_time (to amortize the start of a task) and at most max_time seconds long.
+    If attempts is None, the chunks are generated indefinitely.
+    """
+
+    def __init__(self, attempts, tasks: int, initial_chunk=None, min_time=10.0, max_time=3600.0):
+        self.remaining = attempts
+        self.tasks = tasks
+        if initial_chunk is None:
+            initial_chunk = 1 if attempts is None else max(1, attempts // (32 * tasks))
+        self.initial_chunk = initial_chunk
+        self.min_time = min_time
+        self.max_time = max_time
+        self.seeds_measured = 0
+        self.time_measured = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        if self.remaining is not None and self.remaining <= 0:
+            raise StopIteration
+        size = self.next_size()
+        if self.remaining is not None:
+            self.remaining -= size
+        return size
+
+    def seconds_per_seed(self):
+        """Average wall-clock time per seed of the finished chunks (None if there are none yet)"""
+        if self.seeds_measured == 0:
+            return None
+        return self.time_measured / self.seeds_measured
+
+    def record(self, attempts: int, elapsed: float):
+        """Records the size and the duration of a finished chunk"""
+        if attempts > 0 and elapsed is not None:
+            self.seeds_measured += attempts
+            self.time_measured += elapsed
+
+    def next_size(self) -> int:
+        spp = self.seconds_per_seed()
+        if spp is None:
+            size = self.initial_chunk
+        else:
+            size = ceil(self.max_time / spp) if self.remaining is None else ceil(self.remaining / (2 * self.tasks))
+            if spp > 0:
+                size = min(max(size, ceil(self.min_time / spp)), ceil(self.max_time / spp))
+        size = max(1, size)
+        return size if self.remaining is None else min(size, self.remaining)
+
+
+def split_gaps(gaps: list, chunks):
+    """Splits the seed ranges gaps [(offset, attempts)] into (offset, attempts) pieces with sizes given by chunks,
+    a chunk crossing the end of a range continues at the start of the next one"""
+    gaps = [(offset, attempts) for offset, attempts in gaps if attempts > 0]
+    if not gaps:
+        return
+    i, (offset, left) = 0, gaps[0]
+    for size in chunks:
+        while size > 0:
+            a = min(size, left)
+            yield offset, a
+            offset, left, size = offset + a, left - a, size - a
+            if left == 0:
+                i += 1
+                if i == len(gaps):
+                    return
+                offset, left = gaps[i]
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+
+"""
+Generation on several machines: a coordinator owns the seed space of a campaign (standard, bits) and leases
+seed ranges to workers connecting over TCP. A worker runs the wrapper script of the standard for its range,
+renews the lease by heartbeats while it runs and sends the results back. The coordinator stores them in the
+results directory under the same names as dissectgen.py does, so merge.py works as usual.
+Leases that are not renewed in time are reissued, the first result of a range wins.
+
+Every message is a JSON object on a single line, every request of a worker is answered by one response.
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import shlex
+import socket
+import socketserver
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from dissectgen.chunking import ChunkScheduler
+from dissectgen.dissectgen import load_parameters, check_config_file
+from dissectgen.standards.utils import IntegerEncoder
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_PATH = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+DEFAULT_PORT = 5555
+LEASE_TTL = 120
+HEARTBEAT = 30
+
+
+class Lease:
+    def __init__(self, task: dict, worker: str, ttl: float):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.worker = worker
+        self.ttl = ttl
+        self.expiry = None
+        self.renew()
+
+    def renew(self):
+        self.expiry = time.time() + self.ttl
+
+    def expired(self, now: float) -> bool:
+        return now > self.expiry
+
+
+class LeaseManager:
+    """Hands out the tasks (seed ranges) as leases, reissues the expired ones and stores the results"""
+
+    def __init__(self, tasks, ttl=LEASE_TTL, scheduler=None):
+        self.tasks = iter(tasks)
+        self.ttl = ttl
+        self.scheduler = scheduler
+        self.leases = {}  # active leases by id
+        self.expired = {}  # tasks of expired leases by id until the task is completed, late results are accepted
+        self.reissue = collections.deque()
+        self.completed = set()  # outfiles of the completed tasks
+        self.exhausted = False
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+
+    def expire(self, now: float):
+        for lease_id, lease in list(self.leases.items()):
+            if not lease.expired(now):
+                continue
+            logger.warning("Lease %s of %s expired, reissuing %s" % (lease_id, lease.worker, lease.task["seed"]))
+            del self.leases[lease_id]
+            self.expired[lease_id] = lease.task
+            if lease.task["outfile"] not in self.completed:
+                self.reissue.append(lease.task)
+
+    def check_finished(self):
+        if self.exhausted and not self.leases and not self.reissue:
+            self.finished.set()
+
+    def acquire(self, worker: str):
+        """Returns a new lease for the worker or None if there is no task to be leased now"""
+        with self.lock:
+            self.expire(time.time())
+            task = None
+            while self.reissue and task is None:
+                task = self.reissue.popleft()
+                if task["outfile"] in self.completed:
+                    task = None
+            if task is None and not self.exhausted:
+                task = next(self.tasks, None)
+                self.exhausted = task is None
+            if task is None:
+                self.check_finished()
+                return None
+            lease = Lease(task, worker, self.ttl)
+            self.leases[lease.id] = lease
+            logger.info("Leased %s attempts from seed %s to %s" % (task["attempts"], task["seed"], worker))
+            return lease
+
+    def heartbeat(self, lease_id: str) -> bool:
+        """Renews the lease, returns False if the worker should give it up"""
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            if lease is None:
+                return False
+            if lease.task["outfile"] in self.completed:
+                del self.leases[lease_id]
+                self.check_finished()
+                return False
+            lease.renew()
+            return True
+
+    def release(self, lease_id: str):
+        """The worker failed to process the lease, the task is reissued"""
+        with self.lock:
+            lease = self.leases.pop(lease_id, None)
+            if lease is not None and lease.task["outfile"] not in self.completed:
+                self.reissue.append(lease.task)
+
+    def complete(self, lease_id: str, results: dict, elapsed=None) -> bool:
+        """Stores the results of the lease, returns False if they were not needed.
+        Raises ValueError if the results do not belong to the leased seed range, the task is then reissued."""
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            task = lease.task if lease is not None else self.expired.get(lease_id)
+            if task is None or task["outfile"] in self.completed:
+                self.leases.pop(lease_id, None)
+                self.expired.pop(lease_id, None)
+                self.check_finished()
+                return False
+            if not isinstance(results, dict) or results.get("initial_seed") != task["seed"]:
+                if self.leases.pop(lease_id, None) is not None:
+                    self.reissue.append(task)  # an expired task is in reissue already
+                self.expired.pop(lease_id, None)
+                raise ValueError(f"The results do not belong to the seed range from {task['seed']}")
+            self.leases.pop(lease_id, None)
+            save_results(task["outfile"], results)
+            self.completed.add(task["outfile"])
+            self.expired = {i: t for i, t in self.expired.items() if t["outfile"] != task["outfile"]}
+            if self.scheduler is not None:
+                self.scheduler.record(task["attempts"], elapsed)
+            self.check_finished()
+            return True
+
+
+def save_results(file_name: str, results: dict):
+    """Save the results into a temp file, then rename it"""
+    file_name_tmp = f"{file_name}.tmp"
+    with open(file_name_tmp, "w") as f:
+        json.dump(results, f, indent=2, cls=IntegerEncoder)
+    os.replace(file_name_tmp, file_name)
+
+
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            response = self.server.respond(json.loads(line))
+            self.wfile.write((json.dumps(response, cls=IntegerEncoder) + "\n").encode())
+            self.wfile.flush()
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, standard: str, leases: LeaseManager):
+        super().__init__(address, CoordinatorHandler)
+        self.standard = standard
+        self.leases = leases
+
+    def respond(self, request: dict) -> dict:
+        kind = request.get("type")
+        if kind == "lease":
+            lease = self.leases.acquire(request.get("worker", "?"))
+            if lease is not None:
+                return {"type": "lease", "lease": lease.id, "standard": self.standard, "task": lease.task,
+                        "heartbeat": max(1, lease.ttl // 4)}
+            if self.leases.finished.is_set():
+                return {"type": "done"}
+            return {"type": "wait", "retry": min(5, self.leases.ttl)}
+        if kind == "heartbeat":
+            return {"type": "ok" if self.leases.heartbeat(request["lease"]) else "expired"}
+        if kind == "release":
+            self.leases.release(request["lease"])
+            return {"type": "ok"}
+        if kind == "result":
+            try:
+                accepted = self.leases.complete(request["lease"], request.get("results"), request.get("elapsed"))
+            except ValueError as e:
+                logger.warning("Rejected the results of lease %s: %s" % (request["lease"], e))
+                return {"type": "error", "message": str(e)}
+            return {"type": "ok" if accepted else "ignored"}
+        return {"type": "error", "message": f"Unknown request {kind}"}
+
+    def serve_until_finished(self, linger=5):
+        """Serves the workers until all tasks are completed, then answers 'done' for linger seconds"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        with self.leases.lock:
+            self.leases.check_finished()
+        self.leases.finished.wait()
+        logger.info("All seed ranges completed")
+        time.sleep(linger)
+        self.shutdown()
+        self.server_close()
+
+
+class Worker:
+    """Processes leases of a coordinator until it reports that the campaign is done (or disappears)"""
+
+    def __init__(self, host: str, port: int, interpreter="python3", name=None):
+        self.host = host
+        self.port = port
+        self.interpreter = interpreter
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stream = None
+
+    def request(self, message: dict) -> dict:
+        self.stream.write((json.dumps(message, cls=IntegerEncoder) + "\n").encode())
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("The coordinator closed the connection")
+        return json.loads(line)
+
+    def run(self):
+        with socket.create_connection((self.host, self.port)) as sock:
+            self.stream = sock.makefile("rwb")
+            try:
+                while True:
+                    response = self.request({"type": "lease", "worker": self.name})
+                    if response["type"] == "done":
+                        break
+                    if response["type"] == "wait":
+                        time.sleep(response["retry"])
+                        continue
+                    self.process(response)
+            except ConnectionError as e:
+                logger.warning("Lost the coordinator: %s" % (e,))
+        logger.info("Worker %s finished" % (self.name,))
+
+    def process(self, lease: dict):
+        wrapper_path = os.path.join(PACKAGE_PATH, "standards", f"{lease['standard']}_gen.py")
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = dict(lease["task"], outfile=os.path.join(directory, "results.json"),
+                             checkpoint=os.path.join(directory, "checkpoint.json"))
+            cli = shlex.split(self.interpreter) + [wrapper_path] + ["--%s=%s" % (k, a) for k, a in arguments.items()]
+            start = time.time()
+            proc = subprocess.Popen(cli)
+            while True:
+                try:
+                    proc.wait(timeout=lease["heartbeat"])
+                    break
+                except subprocess.TimeoutExpired:
+                    if self.request({"type": "heartbeat", "lease": lease["lease"]})["type"] != "ok":
+                        logger.info("Giving up lease %s" % (lease["lease"],))
+                        proc.terminate()
+                        proc.wait()
+                        return
+            if proc.returncode != 0:
+                logger.warning("Task failed with code %s, releasing the lease" % (proc.returncode,))
+                self.request({"type": "release", "lease": lease["lease"]})
+                return
+            with open(arguments["outfile"], "r") as f:
+                results = json.load(f)
+        self.request({"type": "result", "lease": lease["lease"], "results": results, "elapsed": time.time() - start})
+
+
+def coordinator_main(args):
+    config_path = args.config_path
+    if config_path is None:
+        config_path = os.path.join(PACKAGE_PATH, 'standards', 'parameters', f"parameters_{args.standard}.json")
+    if not check_config_file(config_path, args.bits):
+        return
+    result_dir = os.path.join(args.results, args.standard, str(args.bits))
+    os.makedirs(result_dir, exist_ok=True)
+
+    scheduler = None
+    if args.adaptive:
+        scheduler = ChunkScheduler(args.attempts, args.tasks, initial_chunk=args.initial_chunk,
+                                   max_time=args.chunk_time)
+
+    def tasks():
+        for p in load_parameters(args.standard, config_path, args.bits, args.attempts, args.tasks, args.offset,
+                                 result_dir, scheduler):
+            if args.cofactor_bound is not None:
+                p['cofactor_bound'] = args.cofactor_bound
+            p['cofactor_div'] = args.cofactor_div
+            yield p
+
+    leases = LeaseManager(tasks(), ttl=args.lease_ttl, scheduler=scheduler)
+    coordinator = Coordinator((args.host, args.port), args.standard, leases)
+    logger.info("Coordinator of %s %s listening on %s:%s" % (args.standard, args.bits, args.host, args.port))
+    coordinator.serve_until_finished()
+
+
+def worker_main(args):
+    Worker(args.host, args.port, args.interpreter, args.name).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generation of curves by workers on several machines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    coordinator = subparsers.add_parser("coordinator", help="Lease the seed ranges of a campaign to workers.")
+    coordinator.add_argument('standard', help='Choose a standard.')
+    coordinator.add_argument("bits", type=int, help="Bit-size of the curve.")
+    coordinator.add_argument("-a", "--attempts", type=int, default=1, help="Number of attempts to generate curves.")
+    coordinator.add_argument("--tasks", type=int, default=1,
+                             help="Number of seed ranges (expected number of workers with --adaptive).")
+    coordinator.add_argument("--adaptive", action="store_true",
+                             help="Size the seed ranges by the measured time per seed.")
+    coordinator.add_argument("--initial_chunk", type=int, default=None,
+                             help="Size of the seed ranges before the first one finishes (with --adaptive).")
+    coordinator.add_argument("--chunk_time", type=float, default=3600.0,
+                             help="Upper bound on the duration of a seed range in seconds (with --adaptive).")
+    coordinator.add_argument('--cofactor_bound', type=int, default=None, help="Upper bound on the cofactor.")
+    coordinator.add_argument("--cofactor_div", type=int, default=0,
+                             help="Every prime divisor of the cofactor must divide this parameter.")
+    coordinator.add_argument("-o", "--offset", type=int, default=0, help="")
+    coordinator.add_argument("-p", "--config_path", default=None, help="")
+    coordinator.add_argument("-r", "--results", default='results', help="Where to store experiment results")
+    coordinator.add_argument("--host", default="0.0.0.0", help="Address to listen on.")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    coordinator.add_argument("--lease_ttl", type=float, default=LEASE_TTL,
+                             help="Seconds after which a lease without heartbeat is reissued.")
+
+    worker = subparsers.add_parser("worker", help="Process seed ranges leased by a coordinator.")
+    worker.add_argument("--host", default="localhost", help="Address of the coordinator.")
+    worker.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port of the coordinator.")
+    worker.add_argument("--interpreter", default="python3", help="Sage or python?")
+    worker.add_argument("--name", default=None, help="Name of the worker in the logs of the coordinator.")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "coordinator":
+        coordinator_main(args)
+    else:
+        worker_main(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+"""
+Index of the seed ranges already evaluated in a campaign (standard, bits and the prime of the config file).
+A seed range is given by its offset from the initial seed of the config file (as --offset of dissectgen.py)
+and the number of attempts. The ranges are read from the names of the finished result files and from the
+manifest of the incrementally merged results, so the index reports the holes left by missing or failed
+tasks and the ranges evaluated more than once.
+"""
+
+import argparse
+import json
+import os
+
+from dissectgen import jsonl
+from dissectgen.merge import MANIFEST_FILE, MERGED_DIR, RESULTS_DIR
+from dissectgen.standards.utils import load_config, seed_offset
+
+
+class SeedCoverage:
+    """Seed ranges [start, end) with their sources"""
+
+    def __init__(self):
+        self.ranges = []  # (start, end, source)
+
+    def add(self, start: int, attempts: int, source: str):
+        if attempts > 0:
+            self.ranges.append((start, start + attempts, source))
+
+    def covered(self) -> list:
+        """The union of the ranges as sorted disjoint [start, end)"""
+        union = []
+        for start, end, _ in sorted(self.ranges):
+            if union and start <= union[-1][1]:
+                union[-1][1] = max(union[-1][1], end)
+            else:
+                union.append([start, end])
+        return [(start, end) for start, end in union]
+
+    def holes(self, start=0, end=None) -> list:
+        """The uncovered [start, end) ranges within [start, end), end defaults to the end of the covered seeds"""
+        covered = self.covered()
+        if end is None:
+            end = covered[-1][1] if covered else start
+        holes, position = [], start
+        for s, e in covered:
+            if e <= position:
+                continue
+            if s >= end:
+                break
+            if s > position:
+                holes.append((position, s))
+            position = e
+        if position < end:
+            holes.append((position, end))
+        return holes
+
+    def overlaps(self) -> list:
+        """Pairs of sources of ranges sharing seeds, with the shared [start, end)"""
+        overlaps, active = [], []
+        for start, end, source in sorted(self.ranges):
+            active = [r for r in active if r[1] > start]
+            for other_start, other_end, other_source in active:
+                overlaps.append((start, min(end, other_end), other_source, source))
+            active.append((start, end, source))
+        return overlaps
+
+
+def scan_coverage(std: str, bits: int, initial_seed: str, path_to_results: str) -> SeedCoverage:
+    """Collects the seed ranges of the finished results of the campaign in path_to_results (e.g. results).
+    The number of attempts is taken from the file names, JSON Lines files without the footer are skipped."""
+    coverage = SeedCoverage()
+    results_path = os.path.join(path_to_results, std, str(bits))
+    if os.path.isdir(results_path):
+        for file in os.listdir(results_path):
+            name, extension = os.path.splitext(file)
+            if extension not in (".json", jsonl.SUFFIX):
+                continue
+            file_name = os.path.join(results_path, file)
+            if extension == jsonl.SUFFIX and not jsonl.is_complete(file_name):
+                continue
+            attempts, _, seed = name.split("_", 2)
+            coverage.add(seed_offset(std, initial_seed, seed), int(attempts), file_name)
+    manifest_name = os.path.join(path_to_results, MERGED_DIR, std, str(bits), MANIFEST_FILE)
+    if os.path.isfile(manifest_name):
+        with open(manifest_name, "r") as f:
+            manifest = json.load(f)
+        coverage.add(seed_offset(std, initial_seed, manifest["initial_seed"]), manifest["seeds_tried"],
+                     manifest_name)
+    return coverage
+
+
+def find_gaps(coverage: SeedCoverage, offset: int, attempts: int) -> list:
+    """The uncovered seed ranges of [offset, offset + attempts) as (offset, attempts)"""
+    return [(start, end - start) for start, end in coverage.holes(offset, offset + attempts)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the seed ranges of a campaign that are missing or "
+                                                 "were evaluated more than once")
+    parser.add_argument('standard', help='Standard of the campaign.')
+    parser.add_argument("bits", type=int, help="Bit-size of the campaign.")
+    parser.add_argument("-p", "--config_path", default=None, help="Config file of the standard.")
+    parser.add_argument("-r", "--results", default=RESULTS_DIR, help="Directory with the results")
+    parser.add_argument("--until", type=int, default=None,
+                        help="Report the holes up to this offset (default: the end of the covered seeds).")
+    args = parser.parse_args()
+    config_path = args.config_path
+    if config_path is None:
+        config_path = os.path.join('standards', 'parameters', f"parameters_{args.standard}.json")
+    prime, initial_seed = load_config(config_path, args.bits)
+
+    coverage = scan_coverage(args.standard, args.bits, initial_seed, args.results)
+    print(f"Campaign {args.standard} {args.bits}, prime {prime}, initial seed {initial_seed}")
+    for start, end in coverage.covered():
+        print(f"covered  offset {start} - {end} ({end - start} seeds)")
+    for start, end in coverage.holes(0, args.until):
+        print(f"hole     offset {start} - {end} ({end - start} seeds), run with -o {start} -a {end - start}")
+    for start, end, first, second in coverage.overlaps():
+        print(f"overlap  offset {start} - {end} ({end - start} seeds) in {first} and {second}")
+
+
+if __name__ == "__main__":
+    main()
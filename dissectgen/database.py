@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+"""
+SQLite database of generated curves for the analysis, e.g. all x962 256-bit curves with cofactor 1 and |D| < 2^120.
+Every curve is stored as its JSON export together with the indexed columns standard, bits, seed, cofactor,
+embedding degree and the bit-length of the CM discriminant (cm_bits). SQLite integers have 64 bits, so cofactors
+and embedding degrees are stored as zero-padded hex strings of INTEGER_DIGITS digits, which compare as the integers.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from dissectgen import jsonl
+from dissectgen.merge import iter_results
+from dissectgen.standards.utils import IntegerEncoder
+
+BATCH = 10000
+INTEGER_DIGITS = 256  # hex digits of the cofactor and embedding degree columns, i.e. integers below 2^1024
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS curves (
+    standard TEXT NOT NULL,
+    bits INTEGER NOT NULL,
+    seed TEXT NOT NULL,
+    cofactor TEXT,
+    embedding_degree TEXT,
+    cm_bits INTEGER,
+    curve TEXT NOT NULL,
+    PRIMARY KEY (standard, bits, seed)
+);
+CREATE INDEX IF NOT EXISTS curves_cofactor ON curves (standard, bits, cofactor);
+CREATE INDEX IF NOT EXISTS curves_embedding_degree ON curves (standard, bits, embedding_degree);
+CREATE INDEX IF NOT EXISTS curves_cm_bits ON curves (standard, bits, cm_bits);
+"""
+
+
+def sql_integer(x: int) -> str:
+    """x as a zero-padded hex string of INTEGER_DIGITS digits, ordered as integers by SQLite"""
+    if not 0 <= x < 1 << 4 * INTEGER_DIGITS:
+        raise ValueError("%d does not fit into %d hex digits" % (x, INTEGER_DIGITS))
+    return "%0*x" % (INTEGER_DIGITS, x)
+
+
+def curve_row(std: str, bits: int, curve: dict) -> tuple:
+    properties = curve["properties"]
+    cm = properties["cm_discriminant"]  # None if deferred, see properties.py
+    cm_bits = None if cm is None else abs(int(cm, 16)).bit_length()
+    return (std, bits, curve["seed"], sql_integer(int(curve["cofactor"])),
+            sql_integer(int(properties["embedding_degree"], 16)), cm_bits, json.dumps(curve, cls=IntegerEncoder))
+
+
+class CurveDatabase:
+    """Curves of all standards and bit-sizes in an SQLite file, inserted in transactions of BATCH curves"""
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.connection = sqlite3.connect(file_name)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def insert(self, std: str, bits: int, curves):
+        """Inserts the curves (an iterable), replacing the curves with the same seed, returns their number"""
+        inserted, batch = 0, []
+        for curve in curves:
+            batch.append(curve_row(std, bits, curve))
+            if len(batch) == BATCH:
+                inserted += self.insert_rows(batch)
+                batch = []
+        return inserted + self.insert_rows(batch)
+
+    def insert_rows(self, rows: list) -> int:
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO curves VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def import_results(self, std: str, bits: int, file_name: str) -> int:
+        """Inserts the curves of results (JSON or JSON Lines) of the standard and bit-size"""
+        return self.insert(std, bits, (record for kind, record in iter_results(file_name) if kind == "curve"))
+
+    def query(self, std=None, bits=None, limit=None, **conditions):
+        """Yields the curves matching all conditions (see where) in the order of seeds"""
+        sql, values = where(std, bits, **conditions)
+        sql = "SELECT curve FROM curves" + sql + " ORDER BY standard, bits, length(seed), seed"
+        if limit is not None:
+            sql += " LIMIT %d" % limit
+        for row in self.connection.execute(sql, values):
+            yield json.loads(row[0])
+
+    def count(self, std=None, bits=None, **conditions) -> int:
+        sql, values = where(std, bits, **conditions)
+        return self.connection.execute("SELECT count(*) FROM curves" + sql, values).fetchone()[0]
+
+
+def where(std=None, bits=None, cofactor=None, max_cofactor=None, min_embedding_degree=None,
+          max_embedding_degree=None, max_cm_bits=None, seed=None) -> tuple:
+    """The WHERE clause of the given conditions and its values, e.g. max_cm_bits=120 for |D| < 2^120"""
+    clauses, values = [], []
+    for column, operator, value in (("standard", "=", std), ("bits", "=", bits), ("cofactor", "=", cofactor),
+                                    ("cofactor", "<=", max_cofactor),
+                                    ("embedding_degree", ">=", min_embedding_degree),
+                                    ("embedding_degree", "<=", max_embedding_degree),
+                                    ("cm_bits", "<=", max_cm_bits), ("seed", "=", seed)):
+        if value is not None:
+            clauses.append(f"{column} {operator} ?")
+            values.append(sql_integer(value) if column in ("cofactor", "embedding_degree") else value)
+    if not clauses:
+        return "", values
+    return " WHERE " + " AND ".join(clauses), values
+
+
+def import_paths(database: CurveDatabase, paths: list, verbose=False) -> int:
+    """Imports the results of every (standard, path to the results of a bit-size)"""
+    imported = 0
+    for std, results_path in paths:
+        bits = int(os.path.basename(os.path.normpath(results_path)))
+        for file in sorted(os.listdir(results_path)):
+            if os.path.splitext(file)[1] not in (".json", jsonl.SUFFIX):
+                continue
+            if verbose:
+                print("Importing ", os.path.join(results_path, file), "...")
+            imported += database.import_results(std, bits, os.path.join(results_path, file))
+    return imported
+
+
+def add_query_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("-s", "--standard", default=None)
+    parser.add_argument("-b", "--bits", type=int, default=None)
+    parser.add_argument("--cofactor", type=int, default=None)
+    parser.add_argument("--max_cofactor", type=int, default=None)
+    parser.add_argument("--min_embedding_degree", type=int, default=None)
+    parser.add_argument("--max_embedding_degree", type=int, default=None)
+    parser.add_argument("--max_cm_bits", type=int, default=None,
+                        help="Maximal bit-length of |D|, e.g. 120 for |D| < 2^120")
+    parser.add_argument("--seed", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--count", action="store_true", help="Print only the number of matching curves")
+
+
+def print_query(database: CurveDatabase, args):
+    """Prints the curves matching the query arguments as JSON Lines, or only their number"""
+    conditions = {key: getattr(args, key) for key in ("cofactor", "max_cofactor", "min_embedding_degree",
+                                                       "max_embedding_degree", "max_cm_bits", "seed")}
+    if args.count:
+        print(database.count(args.standard, args.bits, **conditions))
+        return
+    for curve in database.query(args.standard, args.bits, args.limit, **conditions):
+        sys.stdout.write(json.dumps(curve) + "\n")
+
+
+def query_main(argv=None):
+    """dissectgen query DATABASE [conditions]"""
+    parser = argparse.ArgumentParser(prog="dissectgen query", description="Prints the matching curves as JSON Lines")
+    parser.add_argument("database", help="SQLite file")
+    add_query_arguments(parser)
+    args = parser.parse_args(argv)
+    database = CurveDatabase(args.database)
+    try:
+        print_query(database, args)
+    finally:
+        database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Imports the results into an SQLite database and queries it")
+    parser.add_argument("database", help="SQLite file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Import results (JSON or JSON Lines)")
+    import_parser.add_argument("standard", help="Standard of the results")
+    import_parser.add_argument("bits", type=int, help="Bit-size of the results")
+    import_parser.add_argument("files", nargs="+", help="Files with results")
+    add_query_arguments(commands.add_parser("query", help="Print the matching curves as JSON Lines"))
+    args = parser.parse_args()
+
+    database = CurveDatabase(args.database)
+    try:
+        if args.command == "import":
+            for file_name in args.files:
+                database.import_results(args.standard, args.bits, file_name)
+            return
+        print_query(database, args)
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
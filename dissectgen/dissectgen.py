@@ -3,38 +3,63 @@
 import argparse
 import json
 import logging
+import math
 import os
-from dissectgen.job_manager.manager import ParallelRunner, Task, TaskResult
-from dissectgen.standards.utils import seed_update
+import signal
+import sys
+import time
+from dissectgen import channel, database, jsonl
+from dissectgen.chunking import ChunkScheduler, equal_chunks, split_gaps
+from dissectgen.coverage import find_gaps, scan_coverage
+from dissectgen.job_manager.manager import Task, TaskResult, is_task_done
+from dissectgen.job_manager.pool import WorkerPool
+from dissectgen.job_manager.selector import SelectorRunner
+from dissectgen.placement import LoadScaler, Placement
+from dissectgen.quota import CurveQuota
+from dissectgen.store import CampaignStore
+from dissectgen.stragglers import StragglerPolicy
+from dissectgen.standards.utils import load_config, remove_checkpoint, seed_update, seed_order
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_DIR = ".checkpoints"
+COPY_DIR = ".copies"  # results of the speculative copies of tasks
+PROGRESS_FILE = "progress.json"
+STORE_FILE = "campaign.jsonl"
+SECONDS_PER_SEED_256 = 1.0  # rough time per seed at 256 bits, only compares campaigns before any task finishes
+CAMPAIGN_KEYS = {"standard", "bits", "attempts", "count", "cofactor_bound", "cofactor_div", "offset", "config_path",
+                 "adaptive", "initial_chunk", "chunk_time", "resume", "speculate", "budget_factor", "min_budget",
+                 "jsonl", "checkpoint_interval", "interpreter", "fill_gaps", "adaptive_checks",
+                 "defer_properties"}
 
-def get_file_name(params: list, result_dir=None) -> str:
+
+def get_file_name(params: list, result_dir=None, suffix=".json") -> str:
     """Determines the file name of the results"""
-    file_name = "%s.json" % ("_".join(map(str, params)),)
+    file_name = "%s%s" % ("_".join(map(str, params)), suffix)
     return file_name if result_dir is None else os.path.join(result_dir, file_name)
 
 
 def load_parameters(std: str, config_path: str, num_bits: int, attempts: int, tasks: int,
-                    offset: int, result_dir=None) -> dict:
-    """Loads the parameters from the config file (prime,seed)"""
-    attempts_task = attempts // tasks + 1 * (attempts % tasks != 0)
-    with open(config_path, "r") as f:
-        params = json.load(f)
-        try:
-            p, initial_seed = params["%s" % num_bits]
-        except ValueError:
-            initial_seed = params["%s" % num_bits]
-            p = 0
+                    offset: int, result_dir=None, chunks=None, suffix=".json", gaps=None) -> dict:
+    """Loads the parameters from the config file (prime,seed) and splits the attempts into consecutive seed ranges,
+    either into #tasks equal ones or with sizes given by the iterable chunks (e.g. ChunkScheduler).
+    If gaps [(offset, attempts)] are given, only these seed ranges are split (attempts and offset are ignored)."""
+    p, initial_seed = load_config(config_path, num_bits)
+    if gaps is not None:
+        if chunks is None:
+            chunks = equal_chunks(sum(a for _, a in gaps), tasks)
+        for o, a in split_gaps(gaps, chunks):
+            curve_seed = seed_update(std, initial_seed, o)
+            f = get_file_name([a, num_bits, curve_seed], result_dir, suffix)
+            yield {"attempts": a, "prime": p, "seed": curve_seed, "outfile": f}
+        return
+    if chunks is None:
+        chunks = equal_chunks(attempts, tasks)
     curve_seed = seed_update(std, initial_seed, offset)
-    while attempts > 0:
-        a = attempts if attempts < attempts_task else attempts_task
-        f = get_file_name([a, num_bits, curve_seed], result_dir)
+    for a in chunks:
+        f = get_file_name([a, num_bits, curve_seed], result_dir, suffix)
         yield {"attempts": a, "prime": p, "seed": curve_seed, "outfile": f}
-        attempts -= attempts_task
-
-        curve_seed = seed_update(std, curve_seed, attempts)
+        curve_seed = seed_update(std, curve_seed, a)
 
 
 def check_config_file(config_file, bits):
@@ -49,71 +74,502 @@ def check_config_file(config_file, bits):
     return True
 
 
+def get_config_path(args) -> str:
+    if args.config_path is not None:
+        return args.config_path
+    return os.path.join('standards', 'parameters', f"parameters_{args.standard}.json")
+
+
+def save_json(file_name, content):
+    """Writes the content into a temp file, then renames it"""
+    file_name_tmp = f"{file_name}.tmp"
+    with open(file_name_tmp, "w") as f:
+        json.dump(content, f)
+    os.replace(file_name_tmp, file_name)
+
+
+def get_checkpoint_name(task_params: dict, checkpoint_dir: str) -> str:
+    return os.path.join(checkpoint_dir, os.path.basename(task_params["outfile"]))
+
+
+def create_checkpoint(task_params: dict, checkpoint_dir: str) -> str:
+    """Creates the initial checkpoint of a task (unless it exists), returns its file name"""
+    file_name = get_checkpoint_name(task_params, checkpoint_dir)
+    if not os.path.isfile(file_name):
+        save_json(file_name, {"task": task_params, "seed": task_params["seed"], "attempts": 0, "found": 0, "journal": 0})
+    return file_name
+
+
+def load_checkpoints(std: str, checkpoint_dir: str) -> list:
+    """Loads the parameters of the unfinished tasks from their checkpoints, ordered by seeds"""
+    files = [f for f in os.listdir(checkpoint_dir) if f.endswith(".json") and f != PROGRESS_FILE]
+    unfinished = []
+    for file in seed_order(files, std):
+        file_name = os.path.join(checkpoint_dir, file)
+        with open(file_name, "r") as f:
+            task_params = json.load(f)["task"]
+        if is_task_done(task_params["outfile"]):
+            remove_checkpoint(file_name)
+            continue
+        unfinished.append(task_params)
+    return unfinished
+
+
+class Campaign:
+    """
+    Generation of curves of one standard and bit-size on a shared runner: hands out the tasks of the campaign
+    and processes their output and results. The options of the campaign are those of the command line.
+    """
+
+    def __init__(self, args, runner):
+        self.args = args
+        self.pr = runner
+        self.standard = args.standard
+        self.config_path = get_config_path(args)
+        self.result_dir = os.path.join(args.results, self.standard, str(args.bits))
+        os.makedirs(self.result_dir, exist_ok=True)
+        script_path = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+        self.wrapper_path = os.path.join(script_path, 'standards', f'{self.standard}_gen.py')
+
+        self.checkpoint_dir = os.path.join(args.results, CHECKPOINT_DIR, self.standard, str(args.bits))
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.progress_file = os.path.join(self.checkpoint_dir, PROGRESS_FILE)
+        self.offset, self.attempts, self.resumed = args.offset, args.attempts, []
+        if args.resume:
+            self.resumed = load_checkpoints(self.standard, self.checkpoint_dir)
+            if os.path.isfile(self.progress_file):
+                with open(self.progress_file, "r") as f:
+                    progress = json.load(f)
+                self.offset, self.attempts = progress["offset"], progress["attempts"]
+            logger.info("Resuming %s tasks, %s attempts left" % (len(self.resumed), self.attempts))
+        self.gaps = None
+        if args.fill_gaps:
+            _, initial_seed = load_config(self.config_path, args.bits)
+            coverage = scan_coverage(self.standard, args.bits, initial_seed, args.results)
+            self.gaps = find_gaps(coverage, self.offset, self.attempts)
+            self.attempts = sum(a for _, a in self.gaps)
+            logger.info("%s: %s attempts left in %s gaps" % (self, self.attempts, len(self.gaps)))
+        self.pending = self.attempts + sum(p["attempts"] for p in self.resumed)  # attempts not handed out
+
+        self.scheduler, self.quota, self.store = None, None, None
+        if args.adaptive or args.count is not None:
+            self.scheduler = ChunkScheduler(None if args.count is not None else self.attempts, args.tasks,
+                                            initial_chunk=args.initial_chunk, max_time=args.chunk_time)
+        if args.count is not None:
+            self.quota = CurveQuota(self.standard, args.bits, args.count)
+        if args.store:
+            self.store = CampaignStore(self.standard, args.bits, os.path.join(self.checkpoint_dir, STORE_FILE))
+        self.policy = StragglerPolicy(args.budget_factor, args.min_budget)
+        self.copy_dir = os.path.join(args.results, COPY_DIR, self.standard, str(args.bits))
+        self.running = {}  # started jobs by idx: (job, start time)
+        self.racing = {}  # outfile of a task with a speculative copy: the running jobs of the task
+        self.won = set()  # outfiles of tasks finished by one of their jobs while the other was running
+
+    def __str__(self):
+        return "%s/%s" % (self.standard, self.args.bits)
+
+    def get_task(self, p: dict) -> Task:
+        args = self.args
+        arguments = dict(p)
+        arguments.pop("chunk", None)
+        if self.quota is not None or self.store is not None:
+            del arguments["outfile"]
+        if args.cofactor_bound is not None:
+            arguments['cofactor_bound'] = args.cofactor_bound
+        arguments['cofactor_div'] = args.cofactor_div
+        if "copy_of" in arguments:
+            del arguments["copy_of"]  # the copy starts from scratch without a checkpoint
+        else:
+            arguments['checkpoint'] = get_checkpoint_name(p, self.checkpoint_dir)
+            arguments['checkpoint_interval'] = args.checkpoint_interval
+        cli = " ".join(["--%s=%s" % (k, a) for k, a in arguments.items()])
+        if self.quota is not None:
+            cli += " --report"
+        if args.adaptive_checks:
+            cli += " --adaptive_checks"
+        if args.defer_properties:
+            cli += " --defer_properties"
+        task = Task(args.interpreter, "%s %s" % (self.wrapper_path, cli), meta=p)
+        task.owner = self
+        return task
+
+    def feeder(self):
+        """Generates computing jobs"""
+        args, quota, store = self.args, self.quota, self.store
+        for p in self.resumed:
+            self.pending -= p["attempts"]
+            yield self.get_task(p)
+        resumed_files = set(p["outfile"] for p in self.resumed)
+        handed_out = 0
+        for p in load_parameters(self.standard, self.config_path, args.bits, self.attempts, args.tasks, self.offset,
+                                 self.result_dir, self.scheduler, jsonl.SUFFIX if args.jsonl else ".json",
+                                 self.gaps):
+            handed_out += p["attempts"]
+            self.pending -= p["attempts"]
+            if quota is not None:
+                if quota.complete or quota.failed:
+                    return
+                p["chunk"] = quota.add_chunk(p["seed"], p["attempts"])
+            elif store is not None:
+                p["chunk"] = store.add_chunk(p["seed"], p["attempts"])
+            elif p["outfile"] in resumed_files:
+                continue
+            create_checkpoint(p, self.checkpoint_dir)
+            if quota is None and store is None and self.gaps is None:
+                save_json(self.progress_file, {"offset": self.offset + handed_out,
+                                               "attempts": self.attempts - handed_out})
+            yield self.get_task(p)
+
+    def remaining_work(self) -> float:
+        """Expected seconds of the attempts not handed out yet, with --count of finding the missing curves"""
+        if self.quota is not None:
+            if self.quota.complete or self.quota.failed:
+                return 0.0
+            return self.quota.missing() * self.seeds_per_curve() * self.seconds_per_seed()
+        return max(self.pending, 0) * self.seconds_per_seed()
+
+    def seeds_per_curve(self) -> float:
+        """Measured seeds per found curve of the finished chunks, at least the estimate until a curve is found"""
+        attempts, curves = self.quota.finished_rate()
+        if curves:
+            return attempts / curves
+        return max(attempts, estimate_seeds_per_curve(self.args.bits))
+
+    def seconds_per_seed(self) -> float:
+        """Measured time per seed or its estimate from the bit-size before any task finishes"""
+        spp = self.policy.seconds_per_seed()
+        return spp if spp is not None else estimate_seconds_per_seed(self.args.bits)
+
+    def prerun(self, j: Task):
+        """Function executed just after the Task is taken out from the queue and before executing by a worker."""
+        logger.info("Going to start task %s of %s" % (j.idx, self))
+        if not j.skip:
+            self.running[j.idx] = j, time.time()
+
+    def budget(self, j: Task):
+        """Wall-clock budget of a running task, doubled every time the task was terminated over its budget
+        (the time per seed has a heavy tail, a slow range is resumed from its checkpoint and not dropped)"""
+        budget = self.policy.budget(j.meta["attempts"])
+        return None if budget is None else budget * 2 ** j.budget_kills
+
+    def speculate(self, free_slots: int):
+        """Called when a slot is idle as there are no more tasks, starts copies of the slowest running tasks"""
+        if not self.args.speculate:
+            return
+        candidates = [(j.meta["attempts"], started, j) for j, started in self.running.values()
+                      if "copy_of" not in j.meta and j.meta["outfile"] not in self.racing]
+        for j in self.policy.stragglers(candidates, free_slots):
+            os.makedirs(self.copy_dir, exist_ok=True)
+            outfile = j.meta["outfile"]
+            p = dict(j.meta, outfile=os.path.join(self.copy_dir, os.path.basename(outfile)), copy_of=outfile)
+            copy = self.get_task(p)
+            logger.info("Task %s is slow, starting its copy %s" % (j.idx, copy.idx))
+            self.racing[outfile] = [j, copy]
+            self.pr.enqueue(copy)
+
+    def finish_race(self, r: TaskResult) -> bool:
+        """Resolves the race of a task with its speculative copy, returns False if the result is to be ignored"""
+        meta = r.job.meta
+        outfile = meta.get("copy_of", meta["outfile"])
+        jobs = self.racing.pop(outfile, [])
+        others = [j for j in jobs if j is not r.job]
+        if outfile in self.won:
+            logger.info("Task %s lost the race for %s" % (r.job.idx, outfile))
+            if "copy_of" in meta:
+                if os.path.isfile(meta["outfile"]):
+                    os.remove(meta["outfile"])
+            else:
+                remove_checkpoint(get_checkpoint_name(meta, self.checkpoint_dir))
+            return False
+        if "copy_of" in meta and r.ret_code == 0:
+            os.replace(meta["outfile"], outfile)
+            remove_checkpoint(get_checkpoint_name(dict(meta, outfile=outfile), self.checkpoint_dir))
+        if not others:
+            return True
+        if r.ret_code == 0:
+            self.won.add(outfile)
+            for j in others:
+                j.skip = True  # if requeued
+                self.pr.terminate(j)
+            return True
+        self.racing[outfile] = others  # the other job continues, no retry
+        logger.info("Task %s failed, %s continues for %s" % (r.job.idx, others[0].idx, outfile))
+        return False
+
+    def cancel(self):
+        """Skips the queued jobs of the campaign and terminates its running ones"""
+        for job in list(self.pr.job_queue.queue):
+            if job.owner is self:
+                job.skip = True
+        for job, _ in list(self.running.values()):
+            self.pr.terminate(job)
+
+    def on_output(self, j: Task, line: str, is_err: bool):
+        """Called for every line of output of a running task"""
+        quota = self.quota
+        if quota is None or is_err or quota.complete:
+            return
+        quota.on_output(j.meta["chunk"], line)
+        if quota.complete:
+            self.cancel()
+
+    def on_frame(self, j: Task, kind: int, payload: bytes):
+        """Called for every frame of the results channel of a running task"""
+        if kind == channel.CURVE:
+            self.store.add_curve(j.meta["chunk"], channel.decode_curve(payload)[1])
+        elif kind == channel.DONE:
+            j.meta["counts"] = channel.decode_done(payload)
+        elif kind == channel.RESUMED:
+            self.store.reset(j.meta["chunk"], channel.decode_resumed(payload))
+
+    def on_finished(self, r: TaskResult):
+        """Called when task completes with log info"""
+        logger.info("Task %s of %s finished, code: %s, fails: %s" % (r.job.idx, self, r.ret_code,
+                                                                     r.job.failed_attempts))
+        pr, quota, store = self.pr, self.quota, self.store
+        self.running.pop(r.job.idx, None)
+        if not self.finish_race(r):
+            return
+        if r.ret_code == 0:
+            self.policy.record(r.job.meta["attempts"], r.elapsed)
+        if store is not None:
+            counts = r.job.meta.pop("counts", None)
+            if r.ret_code == 0 and counts == (r.job.meta["attempts"], store.received(r.job.meta["chunk"])):
+                store.finish(r.job.meta["chunk"])
+            elif r.ret_code == 0:  # the curves of a failed run are cut back to its checkpoint once it is resumed
+                store.reset(r.job.meta["chunk"])
+                logger.error("Task %s sent incomplete results, counts: %s" % (r.job.idx, counts))
+                r.job.failed_attempts += 1
+                if r.job.failed_attempts < 3:
+                    pr.enqueue(r.job)
+        if self.scheduler is not None and r.ret_code == 0:
+            self.scheduler.record(r.job.meta["attempts"], r.elapsed)
+        if quota is not None:
+            if quota.complete or quota.failed:
+                return
+            if r.ret_code == 0:
+                quota.finish(r.job.meta["chunk"])
+            else:
+                quota.reset(r.job.meta["chunk"])
+                if r.job.failed_attempts >= 3:
+                    logger.error("Task %s failed repeatedly, the quota cannot be met" % (r.job.idx,))
+                    quota.abort()
+            if quota.complete or quota.failed:
+                self.cancel()
+        if r.ret_code != 0 and r.job.failed_attempts < 3:
+            pr.enqueue(r.job)
+        if r.stderr != "":
+            with open("error.txt", 'w') as f:
+                f.write(r.stderr)
+
+    def finish(self):
+        """Writes the results collected by the manager and removes the checkpoints of a completed campaign"""
+        args, quota, store = self.args, self.quota, self.store
+        if store is not None:
+            store.close()
+            if store.complete() and store.initial_seed is not None:
+                os.replace(store.filename, get_file_name([store.seeds_tried, args.bits, store.initial_seed],
+                                                         self.result_dir, jsonl.SUFFIX))
+
+        unfinished = [f for f in os.listdir(self.checkpoint_dir) if f.endswith(".json") and f != PROGRESS_FILE]
+        if quota is not None or store is not None or not unfinished:
+            for file in os.listdir(self.checkpoint_dir):
+                if file != STORE_FILE:  # unless moved, the store is incomplete
+                    os.remove(os.path.join(self.checkpoint_dir, file))
+        else:
+            logger.warning("%s tasks of %s are unfinished, continue with --resume" % (len(unfinished), self))
+
+        if quota is not None and quota.complete:
+            quota.to_json_file(get_file_name([quota.seeds_tried, args.bits, quota.json_export()["initial_seed"]],
+                                             self.result_dir))
+
+
+def estimate_seconds_per_seed(bits: int) -> float:
+    """Rough time per seed before it is measured, point counting by SEA grows with the fourth power of bits"""
+    return SECONDS_PER_SEED_256 * (bits / 256) ** 4
+
+
+def estimate_seeds_per_curve(bits: int) -> float:
+    """Rough seeds per found curve before it is measured, a random order of bits bits is prime w.p. 1/ln(2^bits)"""
+    return bits * math.log(2)
+
+
+class Sweep:
+    """
+    Several campaigns sharing one runner. The next task is taken from the campaign with the most expected work
+    left (attempts not handed out times the seconds per seed, measured or estimated from the bit-size), so the
+    expensive campaigns start first and the cheap ones fill the slots at the end of the sweep. The work of
+    campaigns with --count is the number of missing curves times the seeds per curve times the seconds per seed.
+    """
+
+    def __init__(self, runner, campaigns: list):
+        self.pr = runner
+        self.campaigns = campaigns
+        runner.job_feeder = self.feeder
+        runner.cb_job_prerun = lambda j: j.owner.prerun(j)
+        runner.cb_job_finished = lambda r: r.job.owner.on_finished(r)
+        runner.cb_job_output = lambda j, line, is_err: j.owner.on_output(j, line, is_err)
+        runner.cb_job_frame = lambda j, kind, payload: j.owner.on_frame(j, kind, payload)
+        runner.cb_job_budget = lambda j: j.owner.budget(j)
+        runner.cb_idle = self.idle
+        if len(campaigns) > 1 or any(c.scheduler is not None for c in campaigns):
+            runner.queue_factor = 0  # choose the task (and size the chunks) only when a task slot is free
+
+    def priority(self, campaign: Campaign):
+        return campaign.remaining_work(), campaign.seconds_per_seed()
+
+    def feeder(self):
+        feeders = {c: c.feeder() for c in self.campaigns}
+        while feeders:
+            campaign = max(feeders, key=self.priority)
+            task = next(feeders[campaign], None)
+            if task is None:
+                del feeders[campaign]
+                continue
+            yield task
+
+    def idle(self, free_slots: int):
+        for campaign in self.campaigns:
+            free = free_slots - self.pr.job_queue.qsize()
+            if free <= 0:
+                return
+            campaign.speculate(free)
+
+    def work(self):
+        self.pr.work()
+        for campaign in self.campaigns:
+            campaign.finish()
+
+
+def load_campaign_file(file_name: str, args) -> list:
+    """Loads the list of campaigns, each entry overrides the options of the command line"""
+    with open(file_name, "r") as f:
+        entries = json.load(f)
+    campaigns = []
+    for entry in entries:
+        unknown = set(entry) - CAMPAIGN_KEYS
+        if unknown or "standard" not in entry or "bits" not in entry:
+            raise ValueError("Invalid campaign %s, keys: %s" % (entry, sorted(CAMPAIGN_KEYS)))
+        campaigns.append(argparse.Namespace(**dict(vars(args), **entry)))
+    return campaigns
+
+
 def main():
+    if sys.argv[1:2] == ["query"]:
+        return database.query_main(sys.argv[2:])
     parser = argparse.ArgumentParser(description="DiSSECT-gen is a tool for generating elliptic curves according to "
                                                  "popular standards or recommendations")
-    parser.add_argument('standard', help='Choose a standard.')
-    parser.add_argument("bits", type=int, help="Bit-size of the curve.")
+    parser.add_argument('standard', nargs="?", help='Choose a standard.')
+    parser.add_argument("bits", type=int, nargs="?", help="Bit-size of the curve.")
+    parser.add_argument("--campaign", default=None,
+                        help="JSON file with a list of campaigns (standard, bits and their options) run together.")
     parser.add_argument("-a", "--attempts", type=int, default=1, help="Number of attempts to generate curves.")
     parser.add_argument("--tasks", type=int, default=1, help="Number of tasks to run in parallel.")
-    parser.add_argument("--count", type=int, default=None, help="Number of curves to generate.")
+    parser.add_argument("--count", type=int, default=None,
+                        help="Number of curves to generate (in total, attempts are ignored).")
 
     parser.add_argument('--cofactor_bound', type=int, default=None, help="Upper bound on the cofactor.")
     parser.add_argument("--cofactor_div", type=int, default=0,
                         help="Every prime divisor of the cofactor must divide this parameter.")
 
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Split the attempts into many seed ranges sized by the measured time per seed.")
+    parser.add_argument("--initial_chunk", type=int, default=None,
+                        help="Size of the seed ranges before the first one finishes (with --adaptive).")
+    parser.add_argument("--chunk_time", type=float, default=3600.0,
+                        help="Upper bound on the duration of a seed range in seconds (with --adaptive).")
+
+    parser.add_argument("--budget_factor", type=float, default=0.0,
+                        help="Terminate and resume a task running this many times longer than expected, with a "
+                             "doubled budget (default 0 disables).")
+    parser.add_argument("--min_budget", type=float, default=60.0,
+                        help="Lower bound on the wall-clock budget of a task in seconds.")
+    parser.add_argument("--speculate", action="store_true",
+                        help="Run copies of the slowest tasks on the idle slots at the end, the first to finish wins.")
+
+    parser.add_argument("--fill_gaps", action="store_true",
+                        help="Run only the seeds of the attempts (from the offset) without finished results.")
+
+    parser.add_argument("--adaptive_checks", action="store_true",
+                        help="The tasks reorder the security checks by their measured time per rejected curve.")
+
+    parser.add_argument("--defer_properties", action="store_true",
+                        help="Export the curves without the CM discriminant, computed later by properties.py.")
+
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Write the results as JSON Lines, every curve as soon as it is found.")
+    parser.add_argument("--store", action="store_true",
+                        help="Collect the curves of all tasks over a binary channel into a single (merged) file.")
+    parser.add_argument("--checkpoint_interval", type=float, default=300,
+                        help="Seconds between the saves of the progress of a task.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the unfinished tasks of an interrupted run from their checkpoints.")
+
     parser.add_argument("--interpreter", default="python3", help="Sage or python?")
+    parser.add_argument("--pool", action="store_true",
+                        help="Run the tasks in long-lived workers importing Sage only once (ignores --interpreter).")
+    parser.add_argument("--max_jobs_per_worker", type=int, default=None,
+                        help="Restart a pool worker after this number of tasks.")
+    parser.add_argument("--start_method", choices=["fork", "forkserver", "spawn"], default=None,
+                        help="How the pool workers are started (default: fork).")
+
+    parser.add_argument("--pin", choices=["core", "numa"], default=None,
+                        help="Pin the tasks to single cores or to the cores of NUMA nodes (round-robin).")
+    parser.add_argument("--memory_limit", type=int, default=None,
+                        help="Address-space limit of a task in MB (including the PARI stack).")
+    parser.add_argument("--nice", type=int, default=0, help="Increment of the niceness of the tasks.")
+    parser.add_argument("--ionice", action="store_true", help="Run the tasks in the idle I/O scheduling class.")
+    parser.add_argument("--autoscale", action="store_true",
+                        help="Use at most --tasks slots, fewer if the cores are loaded or the memory is short.")
 
     parser.add_argument("-o", "--offset", type=int, default=0, help="")
     parser.add_argument("-p", "--config_path", default=None, help="")
     parser.add_argument("-r", "--results", default='results', help="Where to store experiment results")
     args = parser.parse_args()
+    if args.campaign is not None:
+        if args.standard is not None:
+            parser.error("STD and BITS cannot be combined with --campaign")
+        try:
+            campaign_args = load_campaign_file(args.campaign, args)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.bits is None:
+        parser.error("STD and BITS (or --campaign) are required")
+    else:
+        campaign_args = [args]
+    for a in campaign_args:
+        if a.resume and a.count is not None:
+            parser.error("--resume cannot be combined with --count")
+        if a.store and (a.resume or a.count is not None):
+            parser.error("--store cannot be combined with --resume or --count")
+        if a.speculate and (a.store or a.count is not None):
+            parser.error("--speculate cannot be combined with --store or --count")
+        if a.fill_gaps and (a.store or a.resume or a.count is not None):
+            parser.error("--fill_gaps cannot be combined with --store, --resume or --count")
 
-    standard = args.standard
-    config_path = args.config_path
-    if config_path is None:
-        config_path = os.path.join('standards', 'parameters', f"parameters_{standard}.json")
-    if not check_config_file(config_path, args.bits):
-        return
-    result_dir = os.path.join(args.results, standard, str(args.bits))
-    os.makedirs(result_dir, exist_ok=True)
-    script_path = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
-
-    wrapper_name = f'{standard}_gen.py'
-    wrapper_path = os.path.join(script_path, 'standards', wrapper_name)
-
-    pr = ParallelRunner()
+    channel_arg = "--channel" if args.store else None
+    if args.pool:
+        pr = WorkerPool(start_method=args.start_method, max_jobs_per_worker=args.max_jobs_per_worker,
+                        channel_arg=channel_arg)
+    else:
+        pr = SelectorRunner(channel_arg=channel_arg)
     pr.parallel_tasks = args.tasks
+    memory_limit = args.memory_limit * 2 ** 20 if args.memory_limit else None
+    if args.pin or memory_limit or args.nice or args.ionice:
+        pr.placement = Placement(args.pin, memory_limit, args.nice, args.ionice)
+    if args.autoscale:
+        pr.scaler = LoadScaler(args.tasks, memory_limit)
 
-    def feeder():
-        """Generates computing jobs"""
-        for p in load_parameters(standard, config_path, args.bits, args.attempts, args.tasks, args.offset, result_dir):
-            arguments = p
-            if args.count is not None:
-                arguments['count'] = args.count
-            if args.cofactor_bound is not None:
-                arguments['cofactor_bound'] = args.cofactor_bound
-            arguments['cofactor_div'] = args.cofactor_div
-            cli = " ".join(["--%s=%s" % (k, a) for k, a in arguments.items()])
-            yield Task(args.interpreter, "%s %s" % (wrapper_path, cli))
-
-    def prerun(j: Task):
-        """Function executed just after the Task is taken out from the queue and before executing by a worker."""
-        logger.info("Going to start task %s" % (j.idx,))
-
-    def on_finished(r: TaskResult):
-        """Called when task completes with log info"""
-        logger.info("Task %s finished, code: %s, fails: %s" % (r.job.idx, r.ret_code, r.job.failed_attempts))
-        if r.ret_code != 0 and r.job.failed_attempts < 3:
-            pr.enqueue(r.job)
-        if r.stderr != "":
-            with open("error.txt", 'w') as f:
-                f.write(r.stderr)
+    campaigns = []
+    for a in campaign_args:
+        if check_config_file(get_config_path(a), a.bits):
+            campaigns.append(Campaign(a, pr))
+    if not campaigns:
+        return
 
-    pr.job_feeder = feeder
-    pr.cb_job_prerun = prerun
-    pr.cb_job_finished = on_finished
-    pr.work()
+    sweep = Sweep(pr, campaigns)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))  # children save their checkpoints
+    sweep.work()
 
 
 if __name__ == "__main__":
@@ -19,6 +19,7 @@ import time
 import uuid
 from typing import List, Optional
 
+from dissectgen import jsonl
 from dissectgen.job_manager.runner import AsyncRunner
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,8 @@ def get_runner(cli, cwd=None, env=None):
 def is_task_done(file_path):
     if not os.path.isfile(file_path):
         return False
+    if file_path.endswith(jsonl.SUFFIX):
+        return jsonl.is_complete(file_path)
     with open(file_path, "r") as f:
         content = json.load(f)
         if not isinstance(content, dict):
@@ -49,21 +52,26 @@ def is_task_done(file_path):
 
 
 class Task:
-    def __init__(self, wrapper, params, tid=None):
+    def __init__(self, wrapper, params, tid=None, meta=None):
         self.wrapper = wrapper
         self.params = params
         self.idx = tid if tid else str(uuid.uuid4())
+        self.meta = meta  # data of the job feeder, not used by the runner
+        self.owner = None  # object of the job feeder handling the job, not used by the runner
 
         self.failed_attempts = 0  # number of attempts failed
+        self.budget_kills = 0  # number of attempts terminated for running over the budget, not failures
+        self.over_budget = False  # the running attempt was terminated for running over the budget
         self.skip = False  # should skip if found in the queue?
         self.skipped = False  # skipped
 
 
 class TaskResult:
-    def __init__(self, job, ret_code, stderr=None):
+    def __init__(self, job, ret_code, stderr=None, elapsed=None):
         self.job = job  # type: Task
         self.ret_code = ret_code
         self.stderr = stderr
+        self.elapsed = elapsed  # wall-clock time of the task in seconds
 
 
 class ParallelRunner:
@@ -73,10 +81,12 @@ class ParallelRunner:
         self.job_feeder = None  # function, returning task
         self.cb_job_finished = None
         self.cb_job_prerun = None
+        self.cb_job_budget = None  # function(job) returning the wall-clock budget of the job in seconds (or None)
         self.last_job_id = 0
 
         self.bool_wrapper = None
         self.tick_time = 0.15
+        self.queue_factor = 100  # jobs pulled from the feeder in advance per parallel task
         self.job_iterator = None
         self.job_queue = queue.Queue(maxsize=0)
         self.runners = []  # type: List[Optional[AsyncRunner]]
@@ -95,20 +105,24 @@ class ParallelRunner:
 
     def on_finished(self, job: Task, runner: AsyncRunner, idx: int):
         stderr = ("\n".join(runner.err_acc)).strip()
-        br = TaskResult(job, runner.ret_code, stderr)  # results
+        br = TaskResult(job, runner.ret_code, stderr, runner.time_elapsed)  # results
 
-        if runner.ret_code != 0:
+        if runner.ret_code != 0 and job.over_budget:
+            logger.warning("Job %s was terminated over its budget, return code %s" % (idx, runner.ret_code))
+            job.budget_kills += 1
+        elif runner.ret_code != 0:
             logger.warning("Return code of job %s is %s" % (idx, runner.ret_code))
             job.failed_attempts += 1
 
         if self.cb_job_finished:
             self.cb_job_finished(br)
+        job.over_budget = False
 
     def get_num_running(self):
         return sum([1 for x in self.runners if x])
 
     def queue_threshold(self):
-        return self.parallel_tasks * 100
+        return max(1, int(self.parallel_tasks * self.queue_factor))
 
     def pull_jobs(self):
         cur_jobs = [
@@ -126,6 +140,26 @@ class ParallelRunner:
     def enqueue(self, j: Task):
         self.job_queue.put_nowait(j)
 
+    def check_budget(self, i: int):
+        """Asks the runner of slot i to terminate its job if it runs over its budget"""
+        runner = self.runners[i]
+        if not self.cb_job_budget or runner.terminating or runner.time_start is None:
+            return
+        budget = self.cb_job_budget(self.comp_jobs[i])
+        if budget is not None and time.time() - runner.time_start > budget:
+            logger.warning("Task %s exceeded its budget of %.0f s, terminating" % (self.comp_jobs[i].idx, budget))
+            self.comp_jobs[i].over_budget = True
+            runner.terminating = True
+
+    def shutdown(self):
+        """Terminates the running jobs and waits for them to exit"""
+        for runner in self.runners:
+            if runner is not None:
+                runner.terminating = True
+        for runner in self.runners:
+            if runner is not None:
+                runner.shutdown()
+
     def work(self):
         self.job_iterator = self.job_feeder()
         self.runners = [None] * self.parallel_tasks  # type: List[Optional[AsyncRunner]]
@@ -137,6 +171,13 @@ class ParallelRunner:
             % (self.parallel_tasks, self.job_queue.qsize())
         )
 
+        try:
+            self.run_jobs()
+        except BaseException:
+            self.shutdown()
+            raise
+
+    def run_jobs(self):
         while (
                 not self.job_queue.empty()
                 or sum([1 for x in self.runners if x is not None]) > 0
@@ -146,6 +187,7 @@ class ParallelRunner:
             # Realloc work
             for i in range(len(self.runners)):
                 if self.runners[i] is not None and self.runners[i].is_running:
+                    self.check_budget(i)
                     continue
 
                 was_empty = self.runners[i] is None
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pool of long-lived worker processes.
+Every worker imports the heavy dependencies (SageMath) once and then executes the wrapper scripts
+of the tasks it receives over a pipe, as if they were launched by the interpreter. The start-up cost
+is thus paid per worker instead of per task. Workers are recycled after a configurable number of tasks.
+"""
+
+import contextlib
+import importlib
+import io
+import logging
+import multiprocessing
+import queue
+import runpy
+import shlex
+import signal
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+from typing import List, Optional
+
+from dissectgen import channel
+from dissectgen.channel import FrameDecoder
+from dissectgen.job_manager.manager import ParallelRunner, Task
+from dissectgen.job_manager.selector import BUDGET_CHECK_INTERVAL, KILL_GRACE
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES = ["sage.all"]
+
+
+def preload(modules):
+    """Imports the modules so that the forked workers inherit them"""
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning("Could not preload %s: %s" % (module, e))
+
+
+class PipeWriter(io.TextIOBase):
+    """Text stream sending complete lines over the connection tagged with the name of the stream"""
+
+    def __init__(self, conn, name):
+        super().__init__()
+        self.conn = conn
+        self.name = name
+        self.buffer = ""
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        self.buffer += s
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            self.conn.send((self.name, line.strip("\r")))
+        return len(s)
+
+    def flush(self):
+        if self.buffer:
+            self.conn.send((self.name, self.buffer))
+            self.buffer = ""
+
+
+def run_script(params):
+    """Runs the wrapper script with its command line (script path first) and returns the exit code"""
+    argv = shlex.split(params) if isinstance(params, str) else list(params)
+    old_argv = sys.argv
+    sys.argv = argv
+    try:
+        runpy.run_path(argv[0], run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        sys.argv = old_argv
+
+
+def worker_loop(conn, modules, placement=None, slot=0):
+    """Main function of a worker process: runs tasks until None is received or the pipe is closed"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if placement is not None:
+        placement.apply(slot)
+    preload(modules)
+    channel.set_parent_sink(lambda frame: conn.send(("res", frame)))
+    while True:
+        try:
+            params = conn.recv()
+        except EOFError:
+            break
+        if params is None:
+            break
+        out, err = PipeWriter(conn, "out"), PipeWriter(conn, "err")
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                ret_code = run_script(params)
+            except Exception:
+                traceback.print_exc()
+                ret_code = 1
+            out.flush()
+            err.flush()
+        conn.send(("done", ret_code))
+    conn.close()
+
+
+class Worker:
+    """Manager-side handle of a worker process"""
+
+    def __init__(self, ctx, modules, placement=None, slot=0):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=worker_loop, args=(child_conn, modules, placement, slot), daemon=True)
+        self.process.start()
+        child_conn.close()
+        if placement is not None:
+            placement.started(self.process.pid)
+        self.jobs_done = 0
+        self.job = None  # type: Optional[Task]
+        self.ret_code = None
+        self.out_acc = []
+        self.err_acc = []
+        self.time_start = None
+        self.time_elapsed = None
+        self.time_terminated = None
+
+    @property
+    def is_running(self):
+        return self.job is not None
+
+    def submit(self, job: Task, channel_arg=None):
+        self.job = job
+        self.ret_code = None
+        self.out_acc, self.err_acc = [], []
+        self.time_start = time.time()
+        self.time_terminated = None
+        params = job.params
+        if channel_arg is not None:
+            params = shlex.split(params) if isinstance(params, str) else list(params)
+            params.append("%s=%s" % (channel_arg, channel.PARENT))
+        self.conn.send(params)
+
+    def finish(self, ret_code):
+        self.ret_code = ret_code
+        self.time_elapsed = time.time() - self.time_start
+        self.jobs_done += 1
+        job, self.job = self.job, None
+        return job
+
+    def stop(self, timeout=5):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class WorkerPool(ParallelRunner):
+    """
+    Drop-in replacement of ParallelRunner executing tasks in warm worker processes.
+    The interpreter of the task (Task.wrapper) is ignored, the workers run in the interpreter of the manager.
+    """
+
+    def __init__(self, modules=None, start_method=None, max_jobs_per_worker=None, channel_arg=None):
+        super().__init__()
+        self.channel_arg = channel_arg  # option of the tasks receiving the results channel
+        self.cb_job_frame = None  # function(job, kind, payload) for the frames of the results channel
+        self.modules = PRELOAD_MODULES if modules is None else modules
+        self.start_method = start_method or (
+            "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.cb_job_output = None  # function(job, line, is_err)
+        self.cb_idle = None  # function(free_slots) called when there is no job for a free worker, may enqueue jobs
+        self.placement = None  # Placement of the worker processes
+        self.scaler = None  # LoadScaler limiting the number of busy workers
+        self.workers = []  # type: List[Optional[Worker]]
+
+    def get_context(self):
+        ctx = multiprocessing.get_context(self.start_method)
+        if self.start_method == "fork":
+            preload(self.modules)  # fork after import
+        elif self.start_method == "forkserver":
+            ctx.set_forkserver_preload(self.modules)
+        return ctx
+
+    def get_num_running(self):
+        return sum([1 for x in self.workers if x and x.is_running])
+
+    def recycle(self, i: int):
+        worker = self.workers[i]
+        if self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+            logger.info("Recycling worker %s after %s jobs" % (i, worker.jobs_done))
+            worker.stop()
+            self.workers[i] = None
+
+    def assign_jobs(self, ctx):
+        for i in range(len(self.workers)):
+            if self.workers[i] is not None and self.workers[i].is_running:
+                continue
+            running = self.get_num_running()
+            if running and self.scaler and running >= self.scaler.active_slots(running):
+                return
+            try:
+                job = self.job_queue.get_nowait()  # type: Task
+            except queue.Empty:
+                self.pull_jobs()
+                if self.job_queue.empty() and self.cb_idle:
+                    self.cb_idle(self.parallel_tasks - self.get_num_running())
+                if self.job_queue.empty():
+                    return
+                job = self.job_queue.get_nowait()
+
+            if self.cb_job_prerun:
+                self.cb_job_prerun(job)
+
+            if job.skip:
+                job.skipped = True
+                self.job_queue.task_done()
+                continue
+
+            job.skipped = False
+            if self.workers[i] is None:
+                self.workers[i] = Worker(ctx, self.modules, self.placement, i)
+            self.comp_jobs[i] = job
+            logger.info("Submitting job %s to worker %s, %s" % (job.idx, i, job.params))
+            self.workers[i].submit(job, self.channel_arg)
+
+            if self.job_queue.qsize() < self.queue_threshold() / 2:
+                self.pull_jobs()
+
+    def process_message(self, i: int):
+        worker = self.workers[i]
+        kind, value = None, None
+        try:
+            if worker.conn.poll():
+                kind, value = worker.conn.recv()
+        except (EOFError, OSError):
+            pass
+        if kind is None:
+            # woken up by the sentinel of the process (or a broken pipe), the worker is dead
+            worker.process.join()
+            logger.warning("Worker %s died with exit code %s" % (i, worker.process.exitcode))
+            kind, value = "done", worker.process.exitcode or -1
+            worker.conn.close()
+            self.workers[i] = None
+        if kind == "res":
+            if self.cb_job_frame:
+                for frame_kind, payload in FrameDecoder().feed(value):
+                    self.cb_job_frame(worker.job, frame_kind, payload)
+        elif kind in ("out", "err"):
+            (worker.out_acc if kind == "out" else worker.err_acc).append(value)
+            if self.cb_job_output:
+                self.cb_job_output(worker.job, value, kind == "err")
+        elif kind == "done":
+            job = worker.finish(value)
+            self.job_queue.task_done()
+            logger.info(
+                "Task %d done, job queue size: %d, running: %s"
+                % (i, self.job_queue.qsize(), self.get_num_running())
+            )
+            self.on_finished(job, worker, i)
+            if self.workers[i] is not None:
+                self.recycle(i)
+
+    def terminate(self, job: Task) -> bool:
+        """Terminates the worker running the job, returns False if the job is not running.
+        A worker that does not exit within KILL_GRACE seconds is killed."""
+        for worker in self.workers:
+            if worker is not None and worker.job is job:
+                worker.process.terminate()
+                if worker.time_terminated is None:
+                    worker.time_terminated = time.time()
+                return True
+        return False
+
+    def check_workers(self) -> Optional[float]:
+        """Terminates the workers running a job over its budget and kills the terminated workers that did not exit,
+        returns the number of seconds until the next check is needed (None if never)"""
+        now, timeout = time.time(), None
+        for worker in self.workers:
+            if worker is None or not worker.is_running:
+                continue
+            if worker.time_terminated is not None:
+                left = worker.time_terminated + KILL_GRACE - now
+                if left <= 0:
+                    if worker.process.is_alive():
+                        logger.warning("Killing the worker of task %s, it did not exit" % (worker.job.idx,))
+                        worker.process.kill()
+                else:
+                    timeout = left if timeout is None else min(timeout, left)
+                continue
+            budget = self.cb_job_budget(worker.job) if self.cb_job_budget else None
+            if budget is None:
+                continue
+            left = worker.time_start + budget - now
+            if left <= 0:
+                logger.warning("Task %s exceeded its budget of %.0f s, terminating" % (worker.job.idx, budget))
+                worker.job.over_budget = True
+                self.terminate(worker.job)
+                left = KILL_GRACE
+            timeout = min(left, BUDGET_CHECK_INTERVAL) if timeout is None else min(timeout, left)
+        return timeout
+
+    def wait_timeout(self) -> Optional[float]:
+        timeout = self.check_workers()
+        if self.scaler and self.scaler.current < self.parallel_tasks:
+            timeout = self.scaler.interval if timeout is None else min(timeout, self.scaler.interval)
+        return timeout
+
+    def cancel_all(self):
+        """Skips all queued jobs and terminates the workers running a job"""
+        for job in list(self.job_queue.queue):
+            job.skip = True
+        for worker in self.workers:
+            if worker is not None and worker.is_running:
+                worker.process.terminate()
+
+    def shutdown(self):
+        """Terminates the busy workers, so that their tasks save the checkpoints, and stops all workers.
+        The workers still alive KILL_GRACE seconds after the termination are killed."""
+        workers = [w for w in self.workers if w is not None]
+        for worker in workers:
+            if worker.is_running:
+                worker.process.terminate()
+        deadline = time.time() + KILL_GRACE
+        for worker in workers:
+            # a busy worker whose task exited on SIGTERM reads None after it, idle ones exit at once
+            worker.stop(max(deadline - time.time(), 0))
+
+    def work(self):
+        self.job_iterator = self.job_feeder()
+        self.workers = [None] * self.parallel_tasks  # type: List[Optional[Worker]]
+        self.comp_jobs = [None] * self.parallel_tasks  # type: List[Optional[Task]]
+        self.pull_jobs()
+        ctx = self.get_context()
+
+        logger.info(
+            "Starting worker pool, workers: %s, jobs: %s, start method: %s"
+            % (self.parallel_tasks, self.job_queue.qsize(), self.start_method)
+        )
+
+        try:
+            while True:
+                self.assign_jobs(ctx)
+                busy = {w.conn: i for i, w in enumerate(self.workers) if w and w.is_running}
+                if not busy:
+                    if self.job_queue.empty():
+                        break
+                    continue
+                # forked workers inherit the pipes of their siblings, the death of a worker is detected by its sentinel
+                busy.update({self.workers[i].process.sentinel: i for i in busy.values()})
+                ready = set(busy[x] for x in wait(list(busy.keys()), self.wait_timeout()))
+                for i in ready:
+                    self.process_message(i)
+        finally:
+            self.shutdown()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Event-driven variant of the ParallelRunner.
+All children are served by a single selector loop in the manager thread: the loop blocks until
+some output pipe is readable (or closed on exit of the child), so there is no polling and no
+helper thread per task.
+"""
+
+import logging
+import os
+import queue
+import selectors
+import shlex
+import signal
+import subprocess
+import time
+from typing import Dict, Optional
+
+from dissectgen.channel import FrameDecoder
+from dissectgen.job_manager.manager import ParallelRunner, Task
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 65536
+BUDGET_CHECK_INTERVAL = 10.0  # seconds between the checks of the budgets of the running tasks
+KILL_GRACE = 30.0  # seconds between SIGTERM and SIGKILL of a terminated task
+
+
+class Child:
+    """A running task: the process, its captured output and timing"""
+
+    def __init__(self, job: Task, cli: str, cwd=None, env=None, preexec_setgrp=True, channel_arg=None, preexec=None):
+        self.job = job
+        self.channel = None
+        self.decoder = None
+        pass_fds = ()
+        if channel_arg is not None:
+            read_fd, write_fd = os.pipe()
+            cli = "%s %s=%d" % (cli, channel_arg, write_fd)
+            pass_fds = (write_fd,)
+        try:
+            self.proc = subprocess.Popen(
+                shlex.split(cli),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                env=env,
+                pass_fds=pass_fds,
+                preexec_fn=preexec or (os.setpgrp if preexec_setgrp else None),
+            )
+        except OSError:
+            if channel_arg is not None:
+                os.close(read_fd)
+            raise
+        finally:
+            for fd in pass_fds:
+                os.close(fd)
+        if channel_arg is not None:
+            self.channel = os.fdopen(read_fd, "rb", buffering=0)
+            self.decoder = FrameDecoder()
+        self.preexec_setgrp = preexec_setgrp
+        self.time_start = time.time()
+        self.time_elapsed = None
+        self.time_terminated = None
+        self.killed = False
+        self.ret_code = None
+        self.out_acc = []
+        self.err_acc = []
+        self.partial = {"out": b"", "err": b""}
+        self.open_streams = 2 if self.channel is None else 3
+
+    def feed(self, name: str, data: bytes) -> list:
+        """Adds data read from stream name, returns the completed lines"""
+        *lines, self.partial[name] = (self.partial[name] + data).split(b"\n")
+        lines = [x.decode("utf8", "replace").strip("\r") for x in lines]
+        (self.out_acc if name == "out" else self.err_acc).extend(lines)
+        return lines
+
+    def close_stream(self, name: str) -> list:
+        """Marks the stream as closed, returns the unterminated last line if any"""
+        self.open_streams -= 1
+        rest, self.partial[name] = self.partial[name], b""
+        if not rest:
+            return []
+        return self.feed(name, rest + b"\n")
+
+    def finish(self):
+        self.ret_code = self.proc.wait()
+        self.time_elapsed = time.time() - self.time_start
+
+    def signal(self, sig=signal.SIGTERM):
+        if self.proc.poll() is not None:
+            return
+        try:
+            if self.preexec_setgrp:
+                os.killpg(self.proc.pid, sig)
+            else:
+                self.proc.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+
+class FailedStart:
+    """Stands in for a Child whose process could not be started"""
+
+    def __init__(self, message: str, ret_code: Optional[int] = -1):
+        self.ret_code = ret_code
+        self.err_acc = [message]
+        self.out_acc = []
+        self.time_elapsed = 0
+
+
+class SelectorRunner(ParallelRunner):
+    """ParallelRunner serving all tasks from one selector loop"""
+
+    def __init__(self, channel_arg=None):
+        super().__init__()
+        self.channel_arg = channel_arg  # option of the tasks receiving the descriptor of the results channel
+        self.cb_job_output = None  # function(job, line, is_err)
+        self.cb_job_frame = None  # function(job, kind, payload) for the frames of the results channel
+        self.cb_idle = None  # function(free_slots) called when there is no job for a free slot, may enqueue jobs
+        self.placement = None  # Placement of the task processes
+        self.scaler = None  # LoadScaler limiting the number of used slots
+        self.selector = None
+        self.children = {}  # type: Dict[int, Child]
+
+    def get_num_running(self):
+        return len(self.children)
+
+    def start_job(self, i: int, job: Task):
+        params = job.params if isinstance(job.params, str) else " ".join(job.params)
+        cli = "%s %s" % (job.wrapper, params)
+        logger.info("Starting async command %s, %s" % (job.idx, cli))
+        try:
+            preexec = self.placement.preexec(i) if self.placement else None
+            child = Child(job, cli, channel_arg=self.channel_arg, preexec=preexec)
+        except OSError as e:
+            logger.error("Program could not be started: %s" % (e,))
+            self.comp_jobs[i] = job
+            self.job_queue.task_done()
+            self.on_finished(job, FailedStart(str(e)), i)
+            return
+        if self.placement:
+            self.placement.started(child.proc.pid)
+        self.comp_jobs[i] = job
+        self.children[i] = child
+        self.selector.register(child.proc.stdout, selectors.EVENT_READ, (i, "out"))
+        self.selector.register(child.proc.stderr, selectors.EVENT_READ, (i, "err"))
+        if child.channel is not None:
+            self.selector.register(child.channel, selectors.EVENT_READ, (i, "res"))
+
+    def fill_slots(self):
+        for i in range(self.parallel_tasks):
+            if i in self.children:
+                continue
+            if self.children and self.scaler and len(self.children) >= self.scaler.active_slots(len(self.children)):
+                return
+            while True:
+                try:
+                    job = self.job_queue.get_nowait()  # type: Task
+                except queue.Empty:
+                    self.pull_jobs()
+                    if self.job_queue.empty() and self.cb_idle:
+                        self.cb_idle(self.parallel_tasks - len(self.children))
+                    if self.job_queue.empty():
+                        return
+                    job = self.job_queue.get_nowait()
+                if self.cb_job_prerun:
+                    self.cb_job_prerun(job)
+                if job.skip:
+                    job.skipped = True
+                    self.job_queue.task_done()
+                    continue
+                job.skipped = False
+                self.start_job(i, job)
+                break
+
+            if self.job_queue.qsize() < self.queue_threshold() / 2:
+                self.pull_jobs()
+
+    def process_event(self, key: selectors.SelectorKey):
+        i, name = key.data
+        child = self.children[i]
+        data = os.read(key.fd, READ_SIZE)
+        if name == "res":
+            self.process_frames(child, data)
+            lines = []
+        elif data:
+            lines = child.feed(name, data)
+        else:
+            lines = child.close_stream(name)
+        if not data:
+            self.selector.unregister(key.fileobj)
+            key.fileobj.close()
+        if self.cb_job_output:
+            for line in lines:
+                self.cb_job_output(child.job, line, name == "err")
+        if child.open_streams > 0:
+            return
+
+        child.finish()
+        del self.children[i]
+        self.job_queue.task_done()
+        logger.info(
+            "Task %d done, job queue size: %d, running: %s"
+            % (i, self.job_queue.qsize(), self.get_num_running())
+        )
+        self.on_finished(child.job, child, i)
+
+    def process_frames(self, child: Child, data: bytes):
+        if not data:
+            child.open_streams -= 1
+            if child.decoder.pending():
+                logger.warning("Task %s left an incomplete frame in the results channel" % (child.job.idx,))
+            return
+        for kind, payload in child.decoder.feed(data):
+            if self.cb_job_frame:
+                self.cb_job_frame(child.job, kind, payload)
+
+    def terminate(self, job: Task, sig=signal.SIGTERM) -> bool:
+        """Sends a signal to the process group of a running job, returns False if the job is not running.
+        A job that does not exit within KILL_GRACE seconds after SIGTERM is killed."""
+        for child in self.children.values():
+            if child.job is job:
+                child.signal(sig)
+                if sig == signal.SIGTERM and child.time_terminated is None:
+                    child.time_terminated = time.time()
+                return True
+        return False
+
+    def check_children(self) -> Optional[float]:
+        """Terminates the jobs running over their budget and kills the terminated jobs that did not exit,
+        returns the number of seconds until the next check is needed (None if never)"""
+        now, timeout = time.time(), None
+        for child in list(self.children.values()):
+            if child.killed:
+                continue
+            if child.time_terminated is not None:
+                left = child.time_terminated + KILL_GRACE - now
+                if left <= 0:
+                    logger.warning("Killing task %s, it did not exit after SIGTERM" % (child.job.idx,))
+                    child.signal(signal.SIGKILL)
+                    child.killed = True
+                else:
+                    timeout = left if timeout is None else min(timeout, left)
+                continue
+            budget = self.cb_job_budget(child.job) if self.cb_job_budget else None
+            if budget is None:
+                continue
+            left = child.time_start + budget - now
+            if left <= 0:
+                logger.warning("Task %s exceeded its budget of %.0f s, terminating" % (child.job.idx, budget))
+                child.job.over_budget = True
+                self.terminate(child.job)
+                left = KILL_GRACE
+            timeout = min(left, BUDGET_CHECK_INTERVAL) if timeout is None else min(timeout, left)
+        return timeout
+
+    def select_timeout(self) -> Optional[float]:
+        timeout = self.check_children()
+        if self.scaler and self.scaler.current < self.parallel_tasks:
+            timeout = self.scaler.interval if timeout is None else min(timeout, self.scaler.interval)
+        return timeout
+
+    def cancel_all(self):
+        """Skips all queued jobs and terminates the running ones"""
+        for job in list(self.job_queue.queue):
+            job.skip = True
+        for child in self.children.values():
+            child.signal(signal.SIGTERM)
+
+    def shutdown(self):
+        for child in self.children.values():
+            child.signal(signal.SIGTERM)
+        for child in self.children.values():
+            child.finish()
+
+    def work(self):
+        self.job_iterator = self.job_feeder()
+        self.comp_jobs = [None] * self.parallel_tasks  # type: list
+        self.children = {}
+        self.selector = selectors.DefaultSelector()
+        self.pull_jobs()
+
+        logger.info(
+            "Starting Experiment runner, slots: %s, jobs: %s"
+            % (self.parallel_tasks, self.job_queue.qsize())
+        )
+
+        try:
+            while True:
+                self.fill_slots()
+                if not self.children:
+                    if self.job_queue.empty():
+                        break
+                    continue
+                for key, _ in self.selector.select(self.select_timeout()):
+                    self.process_event(key)
+        except BaseException:
+            self.shutdown()
+            raise
+        finally:
+            self.selector.close()
+
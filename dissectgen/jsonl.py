@@ -0,0 +1,112 @@
+"""
+Results in JSON Lines: a header record with the initial seed, one line per curve written as soon as the curve
+is found and a footer record with the name, description and the counts of seeds. A file without the footer
+belongs to a task that did not finish.
+"""
+
+import json
+
+SUFFIX = ".jsonl"
+HEADER = "header"
+FOOTER = "footer"
+
+
+class CurveStream:
+    def __init__(self, filename, initial_seed, encoder=None, resume=None):
+        """resume is (size, curves) of a stream written before, which is continued after cutting it to size"""
+        self._encoder = encoder
+        if resume is not None and resume[0] > 0:
+            self._file = open(filename, "r+")
+            self._file.seek(resume[0])
+            self._file.truncate()
+            self._written = resume[1]
+            return
+        self._file = open(filename, "w")
+        self._written = 0
+        self._write({HEADER: {"initial_seed": initial_seed}})
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, cls=self._encoder) + "\n")
+        self._file.flush()
+
+    def written(self):
+        return self._written
+
+    def position(self):
+        """The size of the stream written so far"""
+        return self._file.tell()
+
+    def write_curve(self, exported: dict):
+        self._write(exported)
+        self._written += 1
+
+    def close(self, summary=None):
+        """Writes the footer (unless summary is None, which leaves the file incomplete) and closes the file"""
+        if self._file.closed:
+            return
+        if summary is not None:
+            footer = {k: v for k, v in summary.items() if k not in ("initial_seed", "curves")}
+            footer["seeds_successful"] = self._written
+            self._write({FOOTER: footer})
+        self._file.close()
+
+
+def iter_records(filename):
+    """Yields (kind, record) for every line of the file, kind is one of 'header', 'curve', 'footer'"""
+    with open(filename, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if len(record) == 1 and HEADER in record:
+                yield HEADER, record[HEADER]
+            elif len(record) == 1 and FOOTER in record:
+                yield FOOTER, record[FOOTER]
+            else:
+                yield "curve", record
+
+
+def read_header(filename) -> dict:
+    with open(filename, "r") as f:
+        record = json.loads(f.readline())
+    if HEADER not in record:
+        raise ValueError(f"{filename} does not start with a header")
+    return record[HEADER]
+
+
+def is_complete(filename) -> bool:
+    """Checks whether the last line of the file is the footer"""
+    with open(filename, "rb") as f:
+        f.seek(0, 2)
+        position = f.tell()
+        tail = b""
+        while position > 0 and tail.count(b"\n") < 2:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+    lines = tail.strip().split(b"\n")
+    if not lines or not lines[-1]:
+        return False
+    try:
+        return FOOTER in json.loads(lines[-1])
+    except ValueError:
+        return False
+
+
+def load(filename) -> dict:
+    """Loads the file into the dictionary of the JSON format of SimulatedCurves"""
+    header, footer, curves = None, None, []
+    for kind, record in iter_records(filename):
+        if kind == HEADER:
+            header = record
+        elif kind == FOOTER:
+            footer = record
+        else:
+            curves.append(record)
+    if header is None or footer is None:
+        raise ValueError(f"{filename} is incomplete")
+    results = {"name": footer.get("name"), "desc": footer.get("desc"), "initial_seed": header["initial_seed"]}
+    results.update(footer)
+    results["curves"] = curves
+    return results
@@ -1,20 +1,25 @@
 #!/usr/bin/env python3
 
+import concurrent.futures
+import hashlib
 import json
 import argparse
 import os
+import re
+import time
 
+from dissectgen import jsonl
 from dissectgen.standards.utils import IntegerEncoder, seed_order, STANDARDS, seed_update
 
 RESULTS_DIR = 'results'
+MERGED_DIR = 'merged'  # incrementally merged results, by standard and bit-size
+MERGED_FILE = 'curves.jsonl'
+MANIFEST_FILE = 'manifest.json'
+INITIAL_SEED = re.compile(r'"initial_seed":\s*("[^"]*")')
 
 
-def save_into_file(merged_name: str, merged: dict, results_path: str):
-    """Save the merged results into a temp file, then delete all others, then rename it"""
-    merged_name_tmp = f'{merged_name}.tmp'
-    with open(merged_name_tmp, "w+") as fh:
-        json.dump(merged, fh, cls=IntegerEncoder)
-
+def save_into_file(merged_name: str, merged_name_tmp: str, results_path: str):
+    """Deletes all results except the merged ones in the temp file, then renames it"""
     for root, _, files in os.walk(results_path):
         for file in sorted(files, reverse=True):
             file_name = os.path.join(root, file)
@@ -23,47 +28,283 @@ def save_into_file(merged_name: str, merged: dict, results_path: str):
     os.rename(merged_name_tmp, merged_name)
 
 
-def merge_dictionaries(std, file_name: str, merged: dict, original_seed: str, verbose=False):
-    """Merges dictionary from a file (file_name) with the rest of results in dictionary (merged)"""
+def load_results(file_name: str) -> dict:
+    """Loads the results of a task, either JSON or JSON Lines"""
+    if file_name.endswith(jsonl.SUFFIX):
+        return jsonl.load(file_name)
     with open(file_name, "r") as f:
-        results = json.load(f)
+        return json.load(f)
+
+
+def iter_results(file_name: str):
+    """Yields the records of the results of a task like jsonl.iter_records: the header with the initial seed,
+    the curves and the footer with the rest of the results. JSON Lines are read line by line."""
+    if file_name.endswith(jsonl.SUFFIX):
+        footer = None
+        for kind, record in jsonl.iter_records(file_name):
+            if kind == jsonl.FOOTER:
+                footer = record
+            else:
+                yield kind, record
+        if footer is None:
+            raise ValueError(f"{file_name} is incomplete")
+        yield jsonl.FOOTER, footer
+        return
+    results = load_results(file_name)
+    if "initial_seed" not in results:
+        raise ValueError(f"{file_name} has no initial seed")
+    yield jsonl.HEADER, {"initial_seed": results["initial_seed"]}
+    for curve in results.pop("curves"):
+        yield "curve", curve
+    yield jsonl.FOOTER, results
+
+
+class MergedWriter:
+    """Writes the merged results in JSON Lines curve by curve, the counts into the footer, so that merging them
+    again (e.g. with the results of a continued campaign) reads them line by line as well"""
+
+    def __init__(self, file_name: str, initial_seed: str):
+        self.file = open(file_name, "w")
+        self.initial_seed = initial_seed
+        self.info = {}  # name, desc, ... of the first results
+        self.seeds_tried = 0
+        self.seeds_successful = 0
+        self.file.write(json.dumps({jsonl.HEADER: {"initial_seed": initial_seed}}) + "\n")
+
+    def write_curve(self, curve: dict):
+        self.file.write(json.dumps(curve, cls=IntegerEncoder) + "\n")
+        self.seeds_successful += 1
+
+    def close(self):
+        info = {k: v for k, v in self.info.items() if k not in ("initial_seed", "seeds_tried", "seeds_successful")}
+        info.update(seeds_tried=self.seeds_tried, seeds_successful=self.seeds_successful)
+        self.file.write(json.dumps({jsonl.FOOTER: info}, cls=IntegerEncoder) + "\n")
+        self.file.close()
+
+
+def merge_file(std, file_name: str, merged: MergedWriter, verbose=False):
+    """Appends the curves of the results in file_name to the merged results, checking that the seeds continue"""
     if verbose:
         print("Merging ", file_name, "...")
-    expected_initial_seed = seed_update(std, original_seed, merged["seeds_tried"])
-    if merged['seeds_tried'] == 0:
-        merged.update(results)
-    else:
-        merged["curves"] += results["curves"]
-        merged["seeds_tried"] += results["seeds_tried"]
-        merged["seeds_successful"] += results["seeds_successful"]
-    assert expected_initial_seed == results[
-        "initial_seed"], f"The expected seed is {expected_initial_seed}, the current one is {results['initial_seed']}"
+    for kind, record in iter_results(file_name):
+        if kind == jsonl.HEADER:
+            expected_initial_seed = seed_update(std, merged.initial_seed, merged.seeds_tried)
+            assert expected_initial_seed == record["initial_seed"], \
+                f"The expected seed is {expected_initial_seed}, the current one is {record['initial_seed']}"
+        elif kind == jsonl.FOOTER:
+            if not merged.info:
+                merged.info = record
+            merged.seeds_tried += record["seeds_tried"]
+        else:
+            merged.write_curve(record)
 
 
 def get_initial_seed(path, ordered_files):
-    """Get the initial seed from a list of files ordered by seeds"""
-    file_name = ordered_files[0]
-    with open(os.path.join(path,file_name), "r") as f:
-        results = json.load(f)
-    return results['initial_seed']
-
-
-def merge(std, path_to_results: str, verbose=False):
-    """Merges results of the standard (std)"""
-    bit_sizes = [f.name for f in os.scandir(path_to_results) if f.is_dir()]
-    for bit_size in bit_sizes:
-        results_path = os.path.join(path_to_results, bit_size)
-        if len(os.listdir(results_path)) == 0:
-            continue
-        merged = {"seeds_tried": 0}
-        root, _, files = list(os.walk(results_path))[0]
-        ordered_files = seed_order(files,std)
-        initial_seed = get_initial_seed(root, ordered_files)
+    """Get the initial seed from a list of files ordered by seeds, only the start of a JSON file is read
+    (SimulatedCurves writes the initial seed before the curves)"""
+    file_name = os.path.join(path, ordered_files[0])
+    if file_name.endswith(jsonl.SUFFIX):
+        return jsonl.read_header(file_name)['initial_seed']
+    with open(file_name, "r") as f:
+        tail = ""
+        for block in iter(lambda: f.read(1 << 16), ""):
+            match = INITIAL_SEED.search(tail + block)
+            if match is not None:
+                return json.loads(match.group(1))
+            tail = (tail + block)[-4096:]
+    raise ValueError(f"{file_name} has no initial seed")
+
+
+def merge_bit_size(std, results_path: str, verbose=False):
+    """Merges the results of the standard (std) in results_path with one bit-size, returns the merged file name"""
+    root, _, files = list(os.walk(results_path))[0]
+    files = [f for f in files if not f.endswith(".tmp")]
+    if not files:
+        return None
+    bit_size = os.path.basename(os.path.normpath(results_path))
+    ordered_files = seed_order(files, std)
+    initial_seed = get_initial_seed(root, ordered_files)
+    merged_name_tmp = os.path.join(results_path, f"merged_{bit_size}_{initial_seed}{jsonl.SUFFIX}.tmp")
+    merged = MergedWriter(merged_name_tmp, initial_seed)
+    try:
         for file in ordered_files:
-            merge_dictionaries(std, str(os.path.join(root, file)), merged, initial_seed, verbose)
+            merge_file(std, str(os.path.join(root, file)), merged, verbose)
+        merged.close()
+    except BaseException:
+        merged.file.close()
+        os.remove(merged_name_tmp)
+        raise
+
+    merged_name = os.path.join(results_path,
+                               f'{str(merged.seeds_tried)}_{str(bit_size)}_{initial_seed}{jsonl.SUFFIX}')
+    save_into_file(merged_name, merged_name_tmp, results_path)
+    return merged_name
+
+
+def merge(std, path_to_results: str, verbose=False, jobs=1):
+    """Merges results of the standard (std), the bit-sizes in up to jobs processes"""
+    merge_all([(std, os.path.join(path_to_results, f.name)) for f in os.scandir(path_to_results) if f.is_dir()],
+              verbose, jobs)
+
+
+def merge_all(paths: list, verbose=False, jobs=1):
+    """Merges the results of every (standard, path to the results of a bit-size), in up to jobs processes"""
+    if jobs <= 1 or len(paths) <= 1:
+        for std, results_path in paths:
+            merge_bit_size(std, results_path, verbose)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(merge_bit_size, std, results_path, verbose) for std, results_path in paths]
+        for future in futures:
+            future.result()
+
+
+class IncrementalMerge:
+    """
+    Append-only merged results of a standard and bit-size in JSON Lines with a manifest: the covered seed
+    interval (initial seed and seeds tried), the counts, the size of the file before its footer and the
+    checksums of the merged files. A result file is appended if it starts at the end of the covered interval,
+    only the new curves are read and written. Results merged before (by their checksum) are removed,
+    results overlapping the interval or following a gap are left in place, as are results with curves waiting
+    for their CM discriminant (--defer_properties) until properties.py has completed them.
+    """
+
+    def __init__(self, std, merged_path: str, initial_seed=None, database=None):
+        self.std = std
+        self.database = database  # CurveDatabase receiving the appended curves
+        self.file_name = os.path.join(merged_path, MERGED_FILE)
+        self.manifest_name = os.path.join(merged_path, MANIFEST_FILE)
+        self.manifest = None
+        os.makedirs(merged_path, exist_ok=True)
+        if os.path.isfile(self.manifest_name):
+            with open(self.manifest_name, "r") as f:
+                self.manifest = json.load(f)
+        elif initial_seed is not None:
+            self.create(initial_seed)
 
-        merged_name = os.path.join(results_path, f'{str(merged["seeds_tried"])}_{str(bit_size)}_{initial_seed}.json')
-        save_into_file(merged_name, merged, results_path)
+    def create(self, initial_seed: str):
+        with open(self.file_name, "w") as f:
+            f.write(json.dumps({jsonl.HEADER: {"initial_seed": initial_seed}}) + "\n")
+            size = f.tell()
+        self.manifest = {"initial_seed": initial_seed, "seeds_tried": 0, "seeds_successful": 0, "size": size,
+                         "files": {}}
+        self.save_manifest()
+
+    def save_manifest(self):
+        tmp_name = f"{self.manifest_name}.tmp"
+        with open(tmp_name, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_name, self.manifest_name)
+
+    def next_seed(self) -> str:
+        return seed_update(self.std, self.manifest["initial_seed"], self.manifest["seeds_tried"])
+
+    def append(self, file_name: str, checksum: str, verbose=False):
+        """Appends the results in file_name, which start at the next seed, and writes the footer"""
+        if verbose:
+            print("Appending ", file_name, "...")
+        manifest = self.manifest
+        with open(self.file_name, "r+") as f:
+            f.seek(manifest["size"])
+            f.truncate()  # the footer or an interrupted append
+            for kind, record in iter_results(file_name):
+                if kind == jsonl.HEADER:
+                    assert record["initial_seed"] == self.next_seed()
+                elif kind == jsonl.FOOTER:
+                    for key in ("name", "desc"):
+                        manifest.setdefault(key, record.get(key))
+                    manifest["seeds_tried"] += record["seeds_tried"]
+                else:
+                    f.write(json.dumps(record, cls=IntegerEncoder) + "\n")
+                    manifest["seeds_successful"] += 1
+            manifest["size"] = f.tell()
+            footer = {k: manifest[k] for k in ("name", "desc", "seeds_tried", "seeds_successful")}
+            f.write(json.dumps({jsonl.FOOTER: footer}) + "\n")
+        manifest["files"][os.path.basename(file_name)] = checksum
+        self.save_manifest()
+
+    def update(self, results_path: str, verbose=False) -> int:
+        """Folds the finished result files in results_path into the merged results, returns the number of files.
+        New merged results start at the lowest file present, so they are created only once that file is finished."""
+        files = seed_order([f for f in os.listdir(results_path) if not f.endswith(".tmp")
+                            and os.path.isfile(os.path.join(results_path, f))], self.std)
+        if self.manifest is None:
+            if not files or not is_finished(os.path.join(results_path, files[0])):
+                return 0
+            self.create(get_initial_seed(results_path, files))
+        merged = 0
+        for file in files:
+            file_name = os.path.join(results_path, file)
+            if not is_finished(file_name):
+                continue
+            checksum = file_checksum(file_name)
+            if self.manifest["files"].get(file) == checksum:
+                os.remove(file_name)  # merged before the removal was interrupted
+                continue
+            initial_seed = get_initial_seed(results_path, [file])
+            if initial_seed != self.next_seed():
+                if verbose:
+                    print("Skipping ", file_name, ", the next seed is ", self.next_seed())
+                continue
+            if has_deferred_properties(file_name):
+                if verbose:
+                    print("Skipping ", file_name, ", it waits for properties.py")
+                continue
+            if self.database is not None:
+                self.database.import_results(self.std, int(os.path.basename(os.path.normpath(results_path))),
+                                             file_name)
+            self.append(file_name, checksum, verbose)
+            os.remove(file_name)
+            merged += 1
+        return merged
+
+
+def file_checksum(file_name: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def has_deferred_properties(file_name: str) -> bool:
+    """Whether some curve of the results still has no CM discriminant (see properties.py)"""
+    return any(kind == "curve" and record.get("properties", {}).get("cm_discriminant", 0) is None
+               for kind, record in iter_results(file_name))
+
+
+def is_finished(file_name: str) -> bool:
+    """Checks whether the task writing the results has finished"""
+    if file_name.endswith(jsonl.SUFFIX):
+        return jsonl.is_complete(file_name)
+    try:
+        with open(file_name, "r") as f:
+            return isinstance(json.load(f), dict)
+    except ValueError:
+        return False
+
+
+def merge_incremental(paths: list, path_to_merged: str, verbose=False, initial_seed=None, database=None) -> int:
+    """Folds the new results of every (standard, path to the results of a bit-size) into the merged results"""
+    merged = 0
+    for std, results_path in paths:
+        bit_size = os.path.basename(os.path.normpath(results_path))
+        store = IncrementalMerge(std, os.path.join(path_to_merged, std, bit_size), initial_seed, database)
+        merged += store.update(results_path, verbose)
+    return merged
+
+
+def find_results(path_to_results: str, standard='all') -> list:
+    """Lists (standard, path to the results of a bit-size) of the standard or of all standards"""
+    if standard == 'all':
+        stds = [f.name for f in os.scandir(path_to_results) if f.is_dir() and f.name in STANDARDS]
+    else:
+        stds = [standard]
+    paths = []
+    for std in stds:
+        path_to_std = os.path.join(path_to_results, std)
+        paths.extend((std, os.path.join(path_to_std, f.name)) for f in os.scandir(path_to_std) if f.is_dir())
+    return paths
 
 
 def main():
@@ -73,16 +314,36 @@ def main():
     parser.add_argument('-v', "--verbose", action='store_false', help="Verbosity of output")
     parser.add_argument('-r', "--results", action='store_true', default='.',
                         help=f"Path to the directory {RESULTS_DIR} with files containing results")
+    parser.add_argument('-j', "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of standards and bit-sizes merged in parallel")
+    parser.add_argument('-i', "--incremental", action='store_true',
+                        help=f"Append the new results to {RESULTS_DIR}/{MERGED_DIR} instead of merging all of them")
+    parser.add_argument("--initial_seed", default=None,
+                        help="First seed of new incrementally merged results (default: the lowest present)")
+    parser.add_argument('-w', "--watch", type=float, default=None,
+                        help="Merge incrementally every WATCH seconds until interrupted")
+    parser.add_argument('-d', "--database", default=None,
+                        help="Also insert the merged curves into this SQLite file (see database.py)")
 
     args = parser.parse_args()
     path_to_results = os.path.join(args.results, RESULTS_DIR)
-    if args.standard == 'all':
-        stds = [f.name for f in os.scandir(path_to_results) if f.is_dir() and f.name in STANDARDS]
-    else:
-        stds = [args.standard]
-    for std in stds:
-        path_to_std = os.path.join(path_to_results, std)
-        merge(std, path_to_std, verbose=args.verbose)
+    database = None
+    if args.database is not None:
+        from dissectgen.database import CurveDatabase, import_paths  # database.py reads results by iter_results
+        database = CurveDatabase(args.database)
+    if not args.incremental and args.watch is None:
+        paths = find_results(path_to_results, args.standard)
+        merge_all(paths, verbose=args.verbose, jobs=args.jobs)
+        if database is not None:
+            import_paths(database, paths, args.verbose)
+        return
+    path_to_merged = os.path.join(path_to_results, MERGED_DIR)
+    while True:
+        merge_incremental(find_results(path_to_results, args.standard), path_to_merged, args.verbose,
+                          args.initial_seed, database)
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+"""Placement of the task processes on the machine: CPU affinity, resource limits, priority and autoscaling"""
+
+import glob
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import time
+
+logger = logging.getLogger(__name__)
+
+NODE_PATTERN = "/sys/devices/system/node/node[0-9]*/cpulist"
+MEMINFO = "/proc/meminfo"
+
+
+def parse_cpulist(text: str) -> list:
+    """Parses a cpulist of the sysfs, e.g. 0-3,8,10-11"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def available_cpus() -> list:
+    return sorted(os.sched_getaffinity(0))
+
+
+def numa_nodes() -> list:
+    """CPUs of the NUMA nodes usable by this process, a single node if the topology is not known"""
+    usable = set(available_cpus())
+    nodes = []
+    for file in sorted(glob.glob(NODE_PATTERN), key=lambda x: int(x.split("/")[-2][4:])):
+        with open(file, "r") as f:
+            cpus = [c for c in parse_cpulist(f.read()) if c in usable]
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [sorted(usable)]
+
+
+def available_memory():
+    """MemAvailable of /proc/meminfo in bytes, None if not known"""
+    try:
+        with open(MEMINFO, "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class Placement:
+    """
+    Settings applied to the process of every task slot: the affinity to a core (pin="core") or to the cores of
+    a NUMA node (pin="numa"), assigned round-robin by the slot, an address-space limit in bytes, the niceness
+    and the idle I/O class. The address space of a Sage process includes the virtual stack reserved by PARI
+    (parisizemax), so the limit has to leave room for it.
+    """
+
+    def __init__(self, pin=None, memory_limit=None, nice=0, ionice=False):
+        self.pin = pin
+        self.memory_limit = memory_limit
+        self.nice = nice
+        self.ionice = ionice and shutil.which("ionice") is not None
+        self.cpu_sets = None
+        if pin == "core":
+            self.cpu_sets = [[c] for c in available_cpus()]
+        elif pin == "numa":
+            self.cpu_sets = numa_nodes()
+
+    def cpus(self, slot: int):
+        if not self.cpu_sets:
+            return None
+        return self.cpu_sets[slot % len(self.cpu_sets)]
+
+    def apply(self, slot: int):
+        """Applies the settings of the slot to the current process"""
+        cpus = self.cpus(slot)
+        if cpus is not None:
+            os.sched_setaffinity(0, cpus)
+        if self.memory_limit:
+            resource.setrlimit(resource.RLIMIT_AS, (self.memory_limit, self.memory_limit))
+        if self.nice:
+            os.nice(self.nice)
+
+    def preexec(self, slot: int, setgrp=True):
+        """Function run in the child process before the command of the slot is executed"""
+
+        def preexec_function():
+            if setgrp:
+                os.setpgrp()
+            self.apply(slot)
+
+        return preexec_function
+
+    def started(self, pid: int):
+        """Applies the settings that are set from the outside to a started process"""
+        if self.ionice:
+            subprocess.run(["ionice", "-c", "3", "-p", str(pid)], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+
+
+class LoadScaler:
+    """
+    Number of task slots to use, between 1 and max_tasks: the cores not loaded by other processes (by the load
+    average minus the running tasks), but only as many tasks as fit into the available memory (task_memory
+    bytes each). Running tasks are never stopped, a lower number only defers the start of new ones.
+    The number is re-evaluated at most every interval seconds.
+    """
+
+    def __init__(self, max_tasks: int, task_memory=None, interval=10.0):
+        self.max_tasks = max_tasks
+        self.task_memory = task_memory
+        self.interval = interval
+        self.cpus = len(available_cpus())
+        self.last_check = None
+        self.current = max_tasks
+
+    def target(self, running: int, load: float, memory) -> int:
+        other_load = max(0.0, load - running)
+        tasks = int(self.cpus - other_load + 0.5)
+        if self.task_memory and memory is not None:
+            tasks = min(tasks, running + memory // self.task_memory)
+        return max(1, min(self.max_tasks, tasks))
+
+    def active_slots(self, running: int) -> int:
+        now = time.time()
+        if self.last_check is not None and now - self.last_check < self.interval:
+            return self.current
+        self.last_check = now
+        target = self.target(running, os.getloadavg()[0], available_memory())
+        if target != self.current:
+            logger.info("Scaling the number of tasks from %s to %s" % (self.current, target))
+        self.current = target
+        return target
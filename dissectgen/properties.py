@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+"""
+Post-processing of the curves generated with --defer_properties: the tasks export the curves without the CM
+discriminant, which needs the squarefree part of t^2 - 4p, i.e. a factorization of an integer of twice the bits.
+Here the discriminants are computed in a pool of processes, every curve within a time budget: small factors are
+split off by trial division, the rest by ECM until the budget runs out. An incomplete factorization is marked by
+"cm_discriminant_partial": its d is the squarefree part of the factored primes times each unfactored composite
+cofactor with an odd multiplicity (to the first power), i.e. it is exact up to squares dividing those cofactors.
+The results are kept in a cache keyed by (p, trace), so the same curve is never factored twice.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sqlite3
+import time
+from math import isqrt
+
+from sage.all import ZZ, ecm, is_pseudoprime
+
+from dissectgen import jsonl
+from dissectgen.merge import RESULTS_DIR, find_results, is_finished, iter_results
+from dissectgen.standards.smoothness import primes_below, smooth_part
+from dissectgen.standards.utils import IntegerEncoder
+
+BUDGET = 60.0
+TRIAL_BOUND = 1 << 16
+ECM_LEVELS = [(2000, 25), (11000, 90), (50000, 300), (250000, 700), (1000000, 1800), (3000000, 5100)]  # B1, curves
+CACHE_FILE = "properties.db"
+PARTIAL = "cm_discriminant_partial"
+
+
+def factor_with_budget(n: int, deadline: float) -> tuple:
+    """Factors n > 0 until the deadline, returns ({prime: exponent}, {unfactored composite: multiplicity}),
+    the latter is empty if the factorization is complete"""
+    factors, unfactored = {}, {}
+    smooth = smooth_part(n, TRIAL_BOUND)
+    stack = [(n // smooth, 1)]  # (composite or prime, multiplicity)
+    for prime in primes_below(TRIAL_BOUND):
+        if smooth == 1:
+            break
+        while smooth % prime == 0:
+            smooth //= prime
+            factors[prime] = factors.get(prime, 0) + 1
+    while stack:
+        m, multiplicity = stack.pop()
+        if m == 1:
+            continue
+        if is_pseudoprime(ZZ(m)):
+            factors[m] = factors.get(m, 0) + multiplicity
+            continue
+        root = isqrt(m)
+        if root * root == m:
+            stack.append((root, 2 * multiplicity))
+            continue
+        factor = find_factor(m, deadline)
+        if factor is None:
+            unfactored[m] = unfactored.get(m, 0) + multiplicity
+            continue
+        stack.extend([(factor, multiplicity), (m // factor, multiplicity)])
+    return factors, unfactored
+
+
+def find_factor(m: int, deadline: float):
+    """A nontrivial factor of the composite m by ECM with growing B1, None if none was found until the deadline"""
+    for b1, curves in ECM_LEVELS:
+        for _ in range(curves):
+            if time.time() >= deadline:
+                return None
+            factor = int(ecm.one_curve(ZZ(m), B1=b1)[0])
+            if 1 < factor < m:
+                return factor
+    return None
+
+
+def cm_discriminant(p: int, trace: int, budget=BUDGET) -> tuple:
+    """The CM discriminant of a curve with the trace over F_p (as compute_properties) and whether it is partial"""
+    factors, unfactored = factor_with_budget(4 * p - trace ** 2, time.time() + budget)
+    d = -1
+    for m, exponent in list(factors.items()) + list(unfactored.items()):
+        if exponent % 2:
+            d *= m
+    return (4 * d if d % 4 != 1 else d), bool(unfactored)
+
+
+def compute(key: tuple, budget: float) -> tuple:
+    """Runs in the pool: key is (p, trace) in hex, returns the key with the CM discriminant in hex and partial"""
+    cm, partial = cm_discriminant(int(key[0], 16), int(key[1], 16), budget)
+    return key, hex(cm), partial
+
+
+class PropertyCache:
+    """CM discriminants by (p, trace) in an SQLite file"""
+
+    def __init__(self, file_name: str):
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS properties (p TEXT NOT NULL, trace TEXT NOT NULL, "
+                                "cm_discriminant TEXT NOT NULL, partial INTEGER NOT NULL, PRIMARY KEY (p, trace))")
+
+    def get(self, key: tuple):
+        """(CM discriminant, partial) or None"""
+        row = self.connection.execute("SELECT cm_discriminant, partial FROM properties WHERE p = ? AND trace = ?",
+                                      key).fetchone()
+        return None if row is None else (row[0], bool(row[1]))
+
+    def put(self, key: tuple, cm: str, partial: bool):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?)",
+                                    (key[0], key[1], cm, int(partial)))
+
+    def close(self):
+        self.connection.close()
+
+
+def curve_key(curve: dict) -> tuple:
+    return curve["field"]["p"], curve["properties"]["trace"]
+
+
+def is_pending(curve: dict, retry_partial=False) -> bool:
+    properties = curve["properties"]
+    return properties["cm_discriminant"] is None or (retry_partial and properties.get(PARTIAL, False))
+
+
+def pending_keys(file_name: str, retry_partial=False) -> set:
+    return set(curve_key(record) for kind, record in iter_results(file_name)
+               if kind == "curve" and is_pending(record, retry_partial))
+
+
+def complete_file(file_name: str, cache: PropertyCache, retry_partial=False):
+    """Rewrites the results with the CM discriminants from the cache"""
+    tmp_name = f"{file_name}.tmp"
+    stream, results = None, None
+    for kind, record in iter_results(file_name):
+        if kind == jsonl.HEADER:
+            if file_name.endswith(jsonl.SUFFIX):
+                stream = jsonl.CurveStream(tmp_name, record["initial_seed"], IntegerEncoder)
+            else:
+                results = {"initial_seed": record["initial_seed"], "curves": []}
+        elif kind == jsonl.FOOTER:
+            if stream is not None:
+                stream.close(record)
+            else:
+                with open(tmp_name, "w") as f:
+                    json.dump(dict(record, **results), f, indent=2, cls=IntegerEncoder)
+        else:
+            if is_pending(record, retry_partial):
+                cm, partial = cache.get(curve_key(record))
+                record["properties"]["cm_discriminant"] = cm
+                record["properties"].pop(PARTIAL, None)
+                if partial:
+                    record["properties"][PARTIAL] = True
+            if stream is not None:
+                stream.write_curve(record)
+            else:
+                results["curves"].append(record)
+    os.replace(tmp_name, file_name)
+
+
+def file_stamp(file_name: str) -> tuple:
+    stat = os.stat(file_name)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def complete_files(files: list, cache: PropertyCache, jobs=1, budget=BUDGET, retry_partial=False, verbose=False,
+                   completed=None):
+    """Computes the missing CM discriminants of the curves in the finished result files and rewrites them.
+    completed maps the files completed before (e.g. in the previous cycles of --watch) to their file_stamp,
+    they are not read again unless they have changed."""
+    completed = {} if completed is None else completed
+    for file_name in set(completed).difference(files):
+        del completed[file_name]
+    files = [f for f in files if completed.get(f) != file_stamp(f) and is_finished(f)]
+    pending = {f: pending_keys(f, retry_partial) for f in files}
+    keys = set().union(*pending.values()) if pending else set()
+    missing = [k for k in keys if cache.get(k) is None or (retry_partial and cache.get(k)[1])]
+    if verbose:
+        print(f"{len(keys)} curves without the CM discriminant, {len(missing)} not in the cache")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(compute, key, budget) for key in missing]
+        for future in concurrent.futures.as_completed(futures):
+            key, cm, partial = future.result()
+            cache.put(key, cm, partial)
+    for file_name, file_keys in pending.items():
+        if file_keys:
+            if verbose:
+                print("Completing ", file_name, "...")
+            complete_file(file_name, cache, retry_partial)
+        completed[file_name] = file_stamp(file_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Computes the CM discriminants of the curves generated with "
+                                                 "--defer_properties")
+    parser.add_argument('-s', "--standard", default='all', help="Standard whose results should be completed")
+    parser.add_argument('-r', "--results", default='.',
+                        help=f"Path to the directory {RESULTS_DIR} with files containing results")
+    parser.add_argument('-j', "--jobs", type=int, default=os.cpu_count(), help="Number of processes")
+    parser.add_argument("--budget", type=float, default=BUDGET,
+                        help="Seconds of factorization per curve, the discriminant is partial if not enough")
+    parser.add_argument("--cache", default=None, help=f"Cache file (default: {RESULTS_DIR}/{CACHE_FILE})")
+    parser.add_argument("--retry_partial", action="store_true",
+                        help="Compute the partial discriminants again (e.g. with a higher budget)")
+    parser.add_argument('-w', "--watch", type=float, default=None,
+                        help="Complete the finished results every WATCH seconds until interrupted")
+    parser.add_argument('-v', "--verbose", action='store_true')
+    args = parser.parse_args()
+
+    path_to_results = os.path.join(args.results, RESULTS_DIR)
+    cache = PropertyCache(args.cache or os.path.join(path_to_results, CACHE_FILE))
+    completed = {}
+    try:
+        while True:
+            files = [os.path.join(results_path, f) for _, results_path in find_results(path_to_results, args.standard)
+                     for f in sorted(os.listdir(results_path)) if os.path.splitext(f)[1] in (".json", jsonl.SUFFIX)]
+            complete_files(files, cache, args.jobs, args.budget, args.retry_partial, args.verbose, completed)
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
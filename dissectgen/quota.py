@@ -0,0 +1,91 @@
+"""Global quota on the number of curves generated by parallel tasks"""
+
+import json
+import logging
+
+from dissectgen.standards.utils import CURVE_REPORT_PREFIX, IntegerEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class CurveQuota:
+    """
+    Collects the curves reported by tasks processing consecutive seed ranges (chunks) and commits them
+    in seed order. The quota is met as soon as the first count curves in seed order are confirmed, i.e.
+    all chunks before the one containing the count-th curve have finished. The committed curves are
+    then exactly those of a sequential run with the same count.
+    """
+
+    def __init__(self, standard: str, bits: int, count: int):
+        self.standard = standard
+        self.bits = bits
+        self.count = count
+        self.chunks = []  # list of {"seed", "attempts", "curves": [(attempt, curve)], "done"} in seed order
+        self.curves = []
+        self.seeds_tried = 0
+        self.complete = False
+        self.failed = False
+
+    def add_chunk(self, seed: str, attempts: int) -> int:
+        """Registers the next seed range, returns its index"""
+        self.chunks.append({"seed": seed, "attempts": attempts, "curves": [], "done": False})
+        return len(self.chunks) - 1
+
+    def on_output(self, chunk: int, line: str):
+        """Processes a line of the standard output of the task processing chunk"""
+        if not line.startswith(CURVE_REPORT_PREFIX):
+            return
+        record = json.loads(line[len(CURVE_REPORT_PREFIX):])
+        self.chunks[chunk]["curves"].append((record["attempt"], record["curve"]))
+        self.confirm()
+
+    def reset(self, chunk: int):
+        """Discards the curves reported by a failed run of the chunk"""
+        self.chunks[chunk]["curves"] = []
+
+    def finish(self, chunk: int):
+        self.chunks[chunk]["done"] = True
+        self.confirm()
+
+    def abort(self):
+        self.failed = True
+
+    def confirm(self) -> bool:
+        """Commits the curves of the longest finished prefix of chunks, returns True if the quota is met"""
+        if self.complete:
+            return True
+        curves, tried = [], 0
+        for chunk in self.chunks:
+            for attempt, curve in chunk["curves"]:
+                curves.append(curve)
+                if len(curves) == self.count:
+                    self.curves, self.seeds_tried = curves, tried + attempt
+                    self.complete = True
+                    logger.info("Quota of %s curves met after %s seeds" % (self.count, self.seeds_tried))
+                    return True
+            if not chunk["done"]:
+                break
+            tried += chunk["attempts"]
+        self.curves, self.seeds_tried = curves, tried
+        return False
+
+    def missing(self) -> int:
+        """Number of curves still missing to the quota, counting the curves reported by running chunks"""
+        return max(self.count - sum(len(chunk["curves"]) for chunk in self.chunks), 0)
+
+    def finished_rate(self) -> tuple:
+        """Attempts and curves of the finished chunks"""
+        done = [chunk for chunk in self.chunks if chunk["done"]]
+        return sum(chunk["attempts"] for chunk in done), sum(len(chunk["curves"]) for chunk in done)
+
+    def json_export(self):
+        """The committed curves in the format of SimulatedCurves"""
+        return {"name": f"{self.standard}_sim_" + str(self.bits),
+                "desc": f"simulated curves generated according to the {self.standard} standard",
+                "initial_seed": self.chunks[0]["seed"] if self.chunks else None,
+                "seeds_tried": self.seeds_tried, "seeds_successful": len(self.curves),
+                "curves": self.curves}
+
+    def to_json_file(self, filename):
+        with open(filename, "w+") as f:
+            json.dump(self.json_export(), f, indent=2, cls=IntegerEncoder)
@@ -1,10 +1,14 @@
 from sage.all import GF, EllipticCurve, ZZ, PolynomialRing
-from dissectgen.standards.utils import VerifiableCurve, SimulatedCurves, seed_update, curve_command_line
+from dissectgen.standards.utils import VerifiableCurve, SimulatedCurves, seed_update, curve_command_line, \
+    curve_options, run_generation
 
 
 class BLS(VerifiableCurve):
-    def __init__(self, seed):
-        super().__init__(seed, None, None, None)
+    family_embedding_degree = 12
+    family_cm_discriminant = -3
+
+    def __init__(self, seed, options=None):
+        super().__init__({"seed": seed, "cm_method": True, **(options or {})})
         self._standard = "bls"
         self._category = "bls"
         self._bits = ZZ(381)
@@ -79,11 +83,13 @@ class BLS(VerifiableCurve):
         self._generator = point[0], point[1]
 
 
-def generate_bls_curves(attempts, seed, count=0):
+def generate_bls_curves(attempts, seed, count=0, on_curve=None, checkpoint=None, options=None):
     simulated_curves = SimulatedCurves("bls", 381, seed, attempts)
-    curve = BLS(seed)
+    curve = BLS(seed, options)
     a, c = 0, 0
     while (count == 0 and a < attempts) or (count > 0 and c < count):
+        if checkpoint is not None:
+            checkpoint.update(a, curve.seed())
         a += 1
         if not curve.secure():
             curve.seed_update()
@@ -91,14 +97,20 @@ def generate_bls_curves(attempts, seed, count=0):
         curve.cm_method()
         curve.compute_properties()
         curve.generate_generator()
-        simulated_curves.add_curve(curve)
+        record = curve.record()
+        simulated_curves.add_curve(record, keep=on_curve is None)
+        if on_curve is not None:
+            on_curve(record, a)
         c += 1
-        curve = BLS(curve.seed())
+        curve = BLS(curve.seed(), options)
         curve.seed_update()
     return simulated_curves
 
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_bls_curves(args.attempts, args.seed, args.count)
-    results.to_json_file(args.outfile)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_bls_curves(attempts, seed, count, on_curve, checkpoint, curve_options(args))
+
+    run_generation(args, generate)
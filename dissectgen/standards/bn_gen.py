@@ -8,7 +8,8 @@ but the transformation between u and the size is trivial (step (b)).
 - we extend the algorithm to generate as many curves as desired by taking larger values of u (not just the smallest)."""
 
 from sage.all import ZZ, PolynomialRing, EllipticCurve, GF, sqrt
-from dissectgen.standards.utils import VerifiableCurve, SimulatedCurves, seed_update, curve_command_line
+from dissectgen.standards.utils import VerifiableCurve, SimulatedCurves, seed_update, curve_command_line, \
+    curve_options, run_generation
 
 
 class BNFail(Exception):
@@ -17,8 +18,11 @@ class BNFail(Exception):
 
 # ISO standard
 class BN(VerifiableCurve):
-    def __init__(self, seed):
-        super().__init__(seed, None, None, None)
+    family_embedding_degree = 12
+    family_cm_discriminant = -3
+
+    def __init__(self, seed, options=None):
+        super().__init__({"seed": seed, "cm_method": True, **(options or {})})
         x = ZZ(seed)
         self._bits = (36 * x ** 4 + 36 * x ** 3 + 24 * x ** 2 + 6 * x + 1).nbits()
         self._standard = "bn"
@@ -89,13 +93,15 @@ class BN(VerifiableCurve):
         self.compute_properties()
 
 
-def generate_bn_curves(attempts, seed, count=0):
+def generate_bn_curves(attempts, seed, count=0, on_curve=None, checkpoint=None, options=None):
     x = ZZ(seed)
     bits = (36 * x ** 4 + 36 * x ** 3 + 24 * x ** 2 + 6 * x + 1).nbits()
     simulated_curves = SimulatedCurves("bn", bits, seed, attempts)
-    curve = BN(seed)
+    curve = BN(seed, options)
     a, c = 0, 0
     while (count == 0 and a < attempts) or (count > 0 and c < count):
+        if checkpoint is not None:
+            checkpoint.update(a, curve.seed())
         a += 1
         try:
             if not curve.secure():
@@ -106,14 +112,20 @@ def generate_bn_curves(attempts, seed, count=0):
             break
         curve.generate_generator()
         curve.compute_properties()
-        simulated_curves.add_curve(curve)
+        record = curve.record()
+        simulated_curves.add_curve(record, keep=on_curve is None)
+        if on_curve is not None:
+            on_curve(record, a)
         c += 1
-        curve = BN(curve.seed())
+        curve = BN(curve.seed(), options)
         curve.seed_update()
     return simulated_curves
 
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_bn_curves(args.attempts, args.seed, args.count)
-    results.to_json_file(args.outfile)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_bn_curves(attempts, seed, count, on_curve, checkpoint, curve_options(args))
+
+    run_generation(args, generate)
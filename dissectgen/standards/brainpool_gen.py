@@ -1,82 +1,94 @@
 """Implementation of the Brainpool standard, see
     https://tools.ietf.org/pdf/rfc5639.pdf#15
 """
-from sage.all import ZZ, GF, EllipticCurve
-from dissectgen.standards.utils import increment_seed, embedding_degree, find_integer, SimulatedCurves, VerifiableCurve, \
-    class_number_check, curve_command_line
+from sage.all import ZZ
+from dissectgen.standards.residues import is_power_residue, is_square
+from dissectgen.standards.utils import to_seed, embedding_degree, find_integer, SeedIntegers, SimulatedCurves, \
+    VerifiableCurve, class_number_check, curve_command_line, curve_options, run_generation, CheckStage
 
 CHECK_CLASS_NUMBER = False
 
 
-def gen_brainpool_prime(seed: str, nbits: int) -> ZZ:
+def gen_brainpool_prime(seed, nbits: int) -> ZZ:
     """Generates a prime of length nbits out of 160bit seed s"""
+    seed = to_seed(seed)
     while True:
         p = find_integer(seed, nbits, brainpool_prime=True)
         while not (p % 4 == 3 and p.is_prime()):
             p += 1
         if p.nbits() == nbits:
             return p
-        seed = increment_seed(seed)
+        seed = seed + 1
 
 
 class Brainpool(VerifiableCurve):
-    def __init__(self, seed, p):
-        conditions = {"seed": seed, "p": p, "cofactor_bound": 1, "cofactor_div": 1}
+    def __init__(self, seed, p, integers=None, options=None):
+        """integers are the SeedIntegers of the seeds, shared by the curves of a generation loop"""
+        seed = to_seed(seed)
+        conditions = {"seed": seed, "p": p, "cofactor_bound": 1, "cofactor_div": 1, **(options or {})}
         super().__init__(conditions)
+        self._integers = integers if integers is not None else SeedIntegers(self._bits)
         self._standard = "brainpool"
         self._category = "brainpool"
         self._cofactor = 1
         self._original_seed = seed
 
+    checks = [CheckStage("curve", "check_curve", cost=0.1),
+              CheckStage("order", "check_order", cost=100, requires=["curve"]),
+              CheckStage("order below p", "check_order_below_p", cost=0.01, requires=["order"]),
+              CheckStage("prime order", "check_prime_order", cost=1, requires=["order"]),
+              CheckStage("embedding degree", "check_embedding_degree", cost=10, requires=["prime order"]),
+              CheckStage("class number", "check_class_number", cost=1000, requires=["prime order"])]
+
     def security(self):
-        self._secure = False
+        self.run_checks()
+
+    def check_curve(self):
         try:
-            curve = EllipticCurve(GF(self._p), [self._a, self._b])
+            self.curve()
         except ArithmeticError:
-            return
-        order = curve.__pari__().ellsea(1)
-        if order == 0:
-            return
-        order = ZZ(order)
-        if order >= self._p:
-            return
-        if not order.is_prime():
-            return
-        self._embedding_degree = embedding_degree(prime=self._p, order=order)
-        if not (order - 1) / self._embedding_degree < 100:
-            return
-        if CHECK_CLASS_NUMBER and not class_number_check(curve, order, 10 ** 7):
-            return
-        self._cardinality = order
-        self._order = order
-        self._secure = True
+            return False
+
+    def check_order(self):
+        order = ZZ(self.curve().__pari__().ellsea(1))
+        self._cardinality = self._order = order
+        return order != 0
+
+    def check_order_below_p(self):
+        return self._order < self._p
+
+    def check_prime_order(self):
+        return self._order.is_prime()
+
+    def check_embedding_degree(self):
+        self._embedding_degree = embedding_degree(prime=self._p, order=self._order)
+        return (self._order - 1) / self._embedding_degree < 100
+
+    def check_class_number(self):
+        return not CHECK_CLASS_NUMBER or class_number_check(self.curve(), self._order, 10 ** 7)
 
     def set_ab(self):
         pass
 
     def set_a(self):
-        self._a = find_integer(self._seed, self._bits)
+        self._a = self._integers(self._seed)
 
     def check_a(self):
-        if self._a is None:
-            return False
-        try:
-            c = -3 * self._field(self._a) ** (-1)
-            c.nth_root(4)
-            return True
-        except ValueError:
+        if self._a is None or self._a % self._p == 0:
             return False
+        p = int(self._p)
+        return is_power_residue(-3 * pow(int(self._a), -1, p), 4, p)
 
     def set_b(self, b_seed=None):
         if b_seed is None:
             b_seed = self._seed
-        self._b = find_integer(b_seed, self._bits)
+        self._b = self._integers(b_seed)
 
     def check_b(self):
-        return self._b is not None and not self._field(self._b).is_square()
+        return self._b is not None and not is_square(self._b, self._p)
 
     def seed_update(self, offset=1):
-        self._seed = increment_seed(self._seed)
+        self._seed = self._seed + 1
 
     def set_seed(self, seed):
         self._seed = seed
@@ -85,12 +97,11 @@ class Brainpool(VerifiableCurve):
         """Finds generator of curve as scalar*P where P has smallest x-coordinate"""
         if seed is None:
             seed = self._seed
-        scalar = find_integer(increment_seed(seed), self._bits)
-        x = None
-        for x in self._field:
-            if (x ** 3 + self._a * x + self._b).is_square():
-                break
-        y = (x ** 3 + self._a * x + self._b).sqrt()
+        scalar = self._integers(seed + 1)
+        a, b, x = int(self._a), int(self._b), 0
+        while not is_square(x ** 3 + a * x + b, self._p):
+            x += 1
+        y = self._field(x ** 3 + a * x + b).sqrt()
         y = ZZ(min(y, self._p - y))
         point = scalar * self.curve()(x, y)
         self._generator = point[0], point[1]
@@ -114,15 +125,19 @@ class Brainpool(VerifiableCurve):
             break
 
 
-def generate_brainpool_curves(attempts: int, p: ZZ, initial_seed: str, count=0) -> SimulatedCurves:
+def generate_brainpool_curves(attempts: int, p: ZZ, initial_seed: str, count=0, on_curve=None,
+                              checkpoint=None, options=None) -> SimulatedCurves:
     """This is an implementation of the Brainpool standard suitable for large-scale simulations
         For more readable implementation, see 'brainpool_curve' above
     """
     simulated_curves = SimulatedCurves("brainpool", p.nbits(), initial_seed, attempts)
-    curve = Brainpool(initial_seed, p)
+    integers = SeedIntegers(p.nbits())
+    curve = Brainpool(initial_seed, p, integers, options)
     b_seed = None
     a, c = 0, 0
     while (count == 0 and a < attempts) or (count > 0 and c < count):
+        if checkpoint is not None and curve.not_defined():
+            checkpoint.update(a, curve.seed())
         a += 1
         if curve.not_defined():
             curve.set_a()
@@ -130,20 +145,23 @@ def generate_brainpool_curves(attempts: int, p: ZZ, initial_seed: str, count=0)
                 curve.seed_update()
                 curve.clear()
                 continue
-            b_seed = increment_seed(curve.seed())
+            b_seed = curve.seed() + 1
         curve.set_b(b_seed)
         if not curve.check_b():
-            b_seed = increment_seed(b_seed)
+            b_seed = b_seed + 1
             continue
         if not curve.secure():
-            curve.set_seed(increment_seed(b_seed))
+            curve.set_seed(b_seed + 1)
             curve.clear()
             continue
         curve.generate_generator(b_seed)
         curve.compute_properties()
-        simulated_curves.add_curve(curve)
+        record = curve.record()
+        simulated_curves.add_curve(record, keep=on_curve is None)
+        if on_curve is not None:
+            on_curve(record, a)
         c += 1
-        curve = Brainpool(curve.seed(), p)
+        curve = Brainpool(curve.seed(), p, integers, options)
         curve.seed_update()
 
     return simulated_curves
@@ -151,5 +169,9 @@ def generate_brainpool_curves(attempts: int, p: ZZ, initial_seed: str, count=0)
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_brainpool_curves(args.attempts, args.prime, args.seed, args.count)
-    results.to_json_file(args.outfile)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_brainpool_curves(attempts, args.prime, seed, count, on_curve, checkpoint,
+                                         curve_options(args))
+
+    run_generation(args, generate)
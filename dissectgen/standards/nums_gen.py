@@ -1,18 +1,18 @@
-from dissectgen.standards.utils import embedding_degree, increment_seed, VerifiableCurve, generate_curves, \
-    curve_command_line
+from dissectgen.standards.utils import embedding_degree, to_seed, VerifiableCurve, generate_curves, \
+    curve_command_line, curve_options, run_generation
 from sage.all import ZZ, EllipticCurve, GF
 
 
 class NUMS(VerifiableCurve):
-    def __init__(self, seed, p):
-        conditions = {"p": p, "seed": seed, "cofactor_bound": 1, "cofactor_div": 1}
+    def __init__(self, seed, p, options=None):
+        conditions = {"p": p, "seed": to_seed(seed), "cofactor_bound": 1, "cofactor_div": 1, **(options or {})}
         super().__init__(conditions)
         self._standard = "nums"
         self._category = "nums"
         self._cofactor = 1
 
     def set_ab(self):
-        self._b = ZZ(self._seed)
+        self._b = ZZ(int(self._seed))
         self._a = ZZ(self._p - 3)
 
     def security(self):
@@ -46,21 +46,23 @@ class NUMS(VerifiableCurve):
         self._secure = True
 
     def seed_update(self, offset=1):
-        self._seed = increment_seed(self._seed, offset)
+        self._seed = self._seed + offset
         self.clear()
         self.set_ab()
 
 
-def generate_nums_curves(attempts, p, seed, count=0):
+def generate_nums_curves(attempts, p, seed, count=0, on_curve=None, checkpoint=None, options=None):
     """Generates at most #attempts curves according to the standard
     The cofactor is arbitrary if cofactor_one=False (default) otherwise cofactor=1
     """
-    curve = NUMS(seed, p)
-    return generate_curves(attempts, count, curve)
+    curve = NUMS(seed, p, options)
+    return generate_curves(attempts, count, curve, on_curve, checkpoint)
 
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_nums_curves(args.attempts, args.prime, args.seed, args.count)
-    results.to_json_file(args.outfile)
 
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_nums_curves(attempts, args.prime, seed, count, on_curve, checkpoint, curve_options(args))
+
+    run_generation(args, generate)
@@ -1,12 +1,14 @@
-from dissectgen.standards.utils import sha512, increment_seed, generate_curves, VerifiableCurve, embedding_degree, \
-    curve_command_line
+from dissectgen.standards.utils import sha512, sha512_int, to_seed, generate_curves, VerifiableCurve, \
+    embedding_degree, curve_command_line, curve_options, run_generation
 from sage.all import ZZ, GF, EllipticCurve
 
 
 class RandomEC(VerifiableCurve):
-    def __init__(self, seed, bits, cofactor_bound=8, cofactor_div=2):
+    def __init__(self, seed, bits, cofactor_bound=8, cofactor_div=2, options=None):
+        seed = to_seed(seed)
         p = self.random_prime(seed, bits)
-        conditions = {"seed": seed, "p": p, "cofactor_bound": cofactor_bound, "cofactor_div": cofactor_div}
+        conditions = {"seed": seed, "p": p, "cofactor_bound": cofactor_bound, "cofactor_div": cofactor_div,
+                      **(options or {})}
         super().__init__(conditions)
         self._bits = bits
         self._standard = "random"
@@ -14,11 +16,11 @@ class RandomEC(VerifiableCurve):
         self._original_seed = seed
 
     def set_ab(self):
-        self._a = self._field(sha512(self._seed))
-        self._b = self._field(sha512(sha512(self._seed)))
+        self._a = self._field(sha512_int(self._seed))
+        self._b = self._field(sha512_int(sha512(self._seed)))
 
     def seed_update(self, offset=1):
-        self._seed = increment_seed(self._seed, offset)
+        self._seed = self._seed + offset
         self.clear()
         self.set_ab()
 
@@ -55,22 +57,26 @@ class RandomEC(VerifiableCurve):
 
     @staticmethod
     def random_prime(seed, bits):
-        hash = ZZ(sha512(seed))
+        hash = sha512_int(seed)
         p = hash >> (hash.nbits() - bits)
         assert p.nbits() == bits
         return p.next_prime()
 
 
-def generate_random_curves(attempts, bits, seed, cofactor_bound=8, cofactor_div=2, count=0):
+def generate_random_curves(attempts, bits, seed, cofactor_bound=8, cofactor_div=2, count=0, on_curve=None,
+                           checkpoint=None, options=None):
     """Generates at most #attempts curves according to the standard
     The cofactor is arbitrary if cofactor_one=False (default) otherwise cofactor=1
     """
-    curve = RandomEC(seed, bits, cofactor_bound=cofactor_bound, cofactor_div=cofactor_div)
-    return generate_curves(attempts, count, curve)
+    curve = RandomEC(seed, bits, cofactor_bound=cofactor_bound, cofactor_div=cofactor_div, options=options)
+    return generate_curves(attempts, count, curve, on_curve, checkpoint)
 
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_random_curves(args.attempts, args.bits, args.seed, args.cofactor_bound, args.cofactor_div,
-                                     args.count)
-    results.to_json_file(args.outfile)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_random_curves(attempts, args.bits, seed, args.cofactor_bound, args.cofactor_div, count,
+                                      on_curve, checkpoint, curve_options(args))
+
+    run_generation(args, generate)
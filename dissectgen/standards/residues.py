@@ -0,0 +1,50 @@
+"""
+Power residue tests on plain integers for the parameter searches of the standards. Most candidates of the searches
+are rejected by a residue symbol (e.g. b with a^3/r a square in X9.62), so the symbols are computed without
+the finite field: squares by the Jacobi symbol and higher powers by the Euler criterion with the exponent cached
+per prime. Roots are extracted by the field only for the accepted candidates.
+"""
+
+from functools import lru_cache
+from math import gcd
+
+
+def jacobi(a: int, n: int) -> int:
+    """The Jacobi symbol (a/n) of an odd n > 0 by the binary algorithm"""
+    a, n, t = int(a) % int(n), int(n), 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                t = -t
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            t = -t
+        a %= n
+    return t if n == 1 else 0
+
+
+def is_square(a: int, p: int) -> bool:
+    """Whether a is a square modulo the odd prime p (zero included)"""
+    return jacobi(a, p) != -1
+
+
+@lru_cache(maxsize=64)
+def power_exponent(p: int, n: int) -> tuple:
+    """gcd(n, p - 1) and the exponent of the Euler criterion for the n-th powers modulo p"""
+    d = gcd(n, p - 1)
+    return d, (p - 1) // d
+
+
+def is_power_residue(a: int, n: int, p: int) -> bool:
+    """Whether a is an n-th power modulo the odd prime p (zero included), i.e. a^((p-1)/gcd(n,p-1)) = 1"""
+    p = int(p)
+    a = int(a) % p
+    if a == 0:
+        return True
+    d, exponent = power_exponent(p, n)
+    if d == 1:
+        return True
+    if d == 2:
+        return jacobi(a, p) == 1
+    return pow(a, exponent, p) == 1
@@ -2,31 +2,26 @@
     https://www.secg.org/sec1-v1.pdf
 """
 
-from dissectgen.standards.utils import sha1, generate_curves, curve_command_line
+from dissectgen.standards.smoothness import smooth_part, smooth_parts
+from dissectgen.standards.utils import sha1_digest, generate_curves, curve_command_line, curve_options, run_generation
 from dissectgen.standards.x962_gen import X962
 from sage.all import ZZ, floor, GF, Integer, EllipticCurve
 
 
-def large_prime_factor(m: ZZ, bound: int):
-    """Tests if the size of the largest prime divisor of m is upper-bounded by bound"""
-    h, prime = Integer(1), Integer(2)
-    tmp = m
-    while h < bound and prime < bound:
-        if tmp % prime == 0:
-            h *= prime
-            tmp = tmp // prime
-            continue
-        prime = prime.next_prime()
+def large_prime_factor(m: ZZ, bound: int, h=None):
+    """Tests if m is a prime times a factor h < bound of primes below bound, returns h or False
+    h is the bound-smooth part of m if already known (see smoothness.smooth_parts)"""
+    h = Integer(smooth_part(m, bound, stop=bound) if h is None else h)
     if h >= bound:
         return False
-    if tmp.is_prime():
+    if (m // h).is_prime():
         return h
     return False
 
 
 class SECG(X962):
-    def __init__(self, seed, p):
-        super().__init__(seed, p)
+    def __init__(self, seed, p, options=None):
+        super().__init__(seed, p, options=options)
         self._cofactor_bound = ZZ(4)
         self._standard = "secg"
         self._category = "secg"
@@ -52,15 +47,17 @@ class SECG(X962):
         if not self._secure:
             return
         n_1_bound = floor(self._order ** (1 - 19 / 20))
-        if not (large_prime_factor(self._order - 1, n_1_bound) and large_prime_factor(self._order + 1, n_1_bound)):
+        numbers = [self._order - 1, self._order + 1]
+        smooth = smooth_parts(numbers, n_1_bound, stop=n_1_bound)
+        if not all(large_prime_factor(m, n_1_bound, h) for m, h in zip(numbers, smooth)):
             return
         self._secure = True
 
     def generate_generator(self):
         c = 1
         while True:
-            r = bytes("Base point", 'ASCII') + bytes([1]) + bytes([c]) + bytes.fromhex(self._seed[2:])
-            e = ZZ(sha1(r.hex()))
+            r = bytes("Base point", 'ASCII') + bytes([1]) + bytes([c]) + self._seed.bytes()
+            e = ZZ(int.from_bytes(sha1_digest(r[1:]), "big"))  # as sha1(r.hex()), which skips the first byte
             t = e % (2 * self._p)
             x, z = t % self._p, t // self._p
             c += 1
@@ -72,15 +69,18 @@ class SECG(X962):
                 return self.curve()(x, y) * self._cofactor
 
 
-def generate_secg_curves(attempts, p, seed, count=0):
+def generate_secg_curves(attempts, p, seed, count=0, on_curve=None, checkpoint=None, options=None):
     """Generates at most #attempts curves according to the standard
     The cofactor is arbitrary if cofactor_one=False (default) otherwise cofactor=1
     """
-    curve = SECG(seed, p)
-    return generate_curves(attempts, count, curve)
+    curve = SECG(seed, p, options)
+    return generate_curves(attempts, count, curve, on_curve, checkpoint)
 
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_secg_curves(args.attempts, args.prime, args.seed, args.count)
-    results.to_json_file(args.outfile)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_secg_curves(attempts, args.prime, seed, count, on_curve, checkpoint, curve_options(args))
+
+    run_generation(args, generate)
@@ -0,0 +1,123 @@
+"""
+Smooth parts of integers (the products of their prime factors below a bound with multiplicity) for the near-primality
+checks of the standards. Instead of dividing by the primes one by one, the primes below the bound are multiplied
+into a primorial and the smooth part is split off by gcds with it. The remainders of the primorial modulo many
+integers at once are computed by a remainder tree.
+
+The bounds differ from curve to curve (e.g. n^(1/20) in SECG), so the primorials are cached per bound rounded up
+to a power of two and the few primes between the bound and the rounded one are divided out of the result.
+Bounds above PRIMORIAL_LIMIT are handled by trial division, which can stop as soon as the smooth part is too large.
+"""
+
+from functools import lru_cache
+from itertools import compress
+from math import gcd, isqrt
+
+PRIMORIAL_LIMIT = 1 << 20  # larger bounds by trial division
+SEGMENT = 1 << 16  # of the sieve of the trial division
+
+
+def primes_below(bound: int) -> tuple:
+    """The primes p < bound by the sieve of Eratosthenes"""
+    return tuple(primes_between(2, bound))
+
+
+def primes_between(start: int, end: int) -> list:
+    """The primes start <= p < end by the sieve of the interval"""
+    start = max(start, 2)
+    if end <= start:
+        return []
+    sieve = bytearray([1]) * (end - start)
+    for prime in primes_below(isqrt(end - 1) + 1):
+        first = max(prime * prime, -(-start // prime) * prime) - start
+        sieve[first::prime] = bytes(len(range(first, end - start, prime)))
+    return list(compress(range(start, end), sieve))
+
+
+def rounded_bound(bound: int) -> int:
+    """The power of two >= bound"""
+    return 1 << max(bound - 1, 1).bit_length()
+
+
+def product_tree(numbers: list) -> list:
+    """Levels of the products of pairs, from the numbers to the product of all of them"""
+    tree = [list(numbers)]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        tree.append([level[i] * level[i + 1] if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)])
+    return tree
+
+
+@lru_cache(maxsize=8)
+def primorial(bound: int) -> int:
+    """The product of the primes p < bound, cached for the rounded bounds"""
+    primes = primes_below(bound)
+    return product_tree(primes)[-1][0] if primes else 1
+
+
+def remainder_tree(x: int, numbers: list) -> list:
+    """x modulo each of the numbers, reducing x along the product tree of the numbers"""
+    tree = product_tree(numbers)
+    remainders = [x % tree[-1][0]]
+    for level in reversed(tree[:-1]):
+        remainders = [remainders[i // 2] % n for i, n in enumerate(level)]
+    return remainders
+
+
+def split_smooth(m: int, g: int) -> int:
+    """The smooth part of m, given g = gcd(m, primorial)"""
+    h = 1
+    while g > 1:
+        h *= g
+        m //= g
+        g = gcd(m, g)
+    return h
+
+
+def strip_primes(h: int, bound: int, rounded: int) -> int:
+    """h without its prime factors bound <= p < rounded"""
+    if h < bound:
+        return h
+    for prime in primes_between(bound, rounded):
+        if prime > h:
+            break
+        while h % prime == 0:
+            h //= prime
+    return h
+
+
+def trial_smooth_part(m: int, bound: int, stop=None) -> int:
+    """smooth_part by trial division, returns as soon as the smooth part is at least stop"""
+    h = 1
+    for start in range(2, bound, SEGMENT):
+        for prime in primes_between(start, min(start + SEGMENT, bound)):
+            while m % prime == 0:
+                m //= prime
+                h *= prime
+                if stop is not None and h >= stop:
+                    return h
+        if m == 1:
+            break
+    return h
+
+
+def smooth_part(m: int, bound: int, stop=None) -> int:
+    """The product of the prime factors p < bound of m (with multiplicity), m > 0
+    With stop, the result is only known to be at least stop if it is (see trial_smooth_part)"""
+    m, bound = int(m), int(bound)
+    if bound > PRIMORIAL_LIMIT:
+        return trial_smooth_part(m, bound, stop)
+    rounded = rounded_bound(bound)
+    return strip_primes(split_smooth(m, gcd(m, primorial(rounded))), bound, rounded)
+
+
+def smooth_parts(numbers: list, bound: int, stop=None) -> list:
+    """smooth_part of many numbers at once"""
+    numbers, bound = [int(m) for m in numbers], int(bound)
+    if not numbers:
+        return []
+    if bound > PRIMORIAL_LIMIT:
+        return [trial_smooth_part(m, bound, stop) for m in numbers]
+    rounded = rounded_bound(bound)
+    remainders = remainder_tree(primorial(rounded), numbers)
+    return [strip_primes(split_smooth(m, gcd(m, r)), bound, rounded) for m, r in zip(numbers, remainders)]
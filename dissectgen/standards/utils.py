@@ -1,21 +1,78 @@
 """Some useful functions for the project"""
-import copy
 
-from sage.all import Integers, ceil, floor, GF, EllipticCurve
+from sage.all import Integers, GF, EllipticCurve
 from abc import ABC, abstractmethod
 from sage.all import squarefree_part, BinaryQF, xsrange, gcd, ZZ, lcm, Integer
 import hashlib
 import json, argparse
+import os
+import signal
+import sys
+import time
+from functools import lru_cache
+from math import isqrt
+
+from dissectgen import channel, jsonl
+from dissectgen.standards.residues import is_square
 
 STANDARDS = ['x962', 'brainpool', 'secg', 'nums', 'nist', 'bls', 'random', 'c25519', 'bn']
 
 
+class Seed:
+    """
+    Hex-string seed as its value and number of hex digits, incremented modulo 2^g where g is the number of bits
+    of the digits rounded up to whole bytes (see increment_seed). The standards keep their seeds in this form
+    and format them only on export.
+    """
+    __slots__ = ("value", "digits", "modulus")
+
+    def __init__(self, value: int, digits: int, modulus=None):
+        self.value = value
+        self.digits = digits
+        self.modulus = modulus or 1 << (8 * ((digits + 1) // 2))
+
+    @classmethod
+    def from_hex(cls, seed: str):
+        return cls(int(seed, 16) % (1 << (8 * ((len(seed) - 1) // 2))), len(seed) - 2)
+
+    def __add__(self, i: int):
+        return Seed((self.value + i) % self.modulus, self.digits, self.modulus)
+
+    def __sub__(self, other) -> int:
+        """The offset of self from the seed other"""
+        return (self.value - other.value) % self.modulus
+
+    def __int__(self):
+        return self.value
+
+    def __index__(self):
+        return self.value
+
+    def __eq__(self, other):
+        return isinstance(other, Seed) and self.value == other.value and self.digits == other.digits
+
+    def __hash__(self):
+        return hash((self.value, self.digits))
+
+    def __str__(self):
+        return "0x" + format(self.value, "0%dx" % self.digits)
+
+    def __repr__(self):
+        return f"Seed({self})"
+
+    def bytes(self) -> bytes:
+        """The bytes of the hex string (see seed_bytes)"""
+        return self.value.to_bytes((self.digits + 1) // 2, "big")
+
+
+def to_seed(seed) -> Seed:
+    """Seed of a hex string, seeds are returned as they are"""
+    return seed if isinstance(seed, Seed) else Seed.from_hex(seed)
+
+
 def increment_seed(seed: str, i=1) -> str:
     """Increments hex-string seed (without prefix) by i (can be negative)"""
-    g = len(seed) * 4 - 8
-    g = g % 8 + g
-    f = "0" + str(len(seed) - 2) + "x"
-    return '0x' + format(ZZ(Integers(2 ** g)(ZZ(seed) + i)), f)
+    return str(Seed.from_hex(seed) + i)
 
 
 def next_hamming(val):
@@ -28,19 +85,62 @@ def seed_update(std, seed, offset):
     return increment_seed(seed, offset)
 
 
+def seed_offset(std, initial_seed, seed) -> int:
+    """Inverse of seed_update: the offset of seed from initial_seed"""
+    return Seed.from_hex(seed) - Seed.from_hex(initial_seed)
+
+
+def load_config(config_path: str, bits: int):
+    """Reads the prime (0 if there is none) and the initial seed of the bit-size from the config file"""
+    with open(config_path, "r") as f:
+        params = json.load(f)
+    try:
+        p, initial_seed = params["%s" % bits]
+    except ValueError:
+        initial_seed = params["%s" % bits]
+        p = 0
+    return p, initial_seed
+
+
+SEED_CACHE_SIZE = 4096  # digests of recently hashed seeds
+
+
+def seed_bytes(x) -> bytes:
+    """The bytes of hex-string x (with a prefix) or of a Seed as hashed by the standards"""
+    if isinstance(x, Seed):
+        return x.bytes()
+    return bytes.fromhex((len(x) % 2) * "0" + x[2:])
+
+
+def int_bytes(x: int) -> bytes:
+    """The big-endian bytes of x without leading zero bytes, i.e. the bytes of int_to_hex_string(x)"""
+    return x.to_bytes((x.bit_length() + 7) // 8, "big")
+
+
+@lru_cache(maxsize=SEED_CACHE_SIZE)
+def sha1_digest(data: bytes) -> bytes:
+    return hashlib.sha1(data).digest()
+
+
 def sha1(x: str) -> str:
     """Returns sha1 value of hex-string x in hex-string"""
-    return '0x' + hashlib.sha1(bytes.fromhex((len(x) % 2) * "0" + x[2:])).hexdigest()
+    return '0x' + sha1_digest(seed_bytes(x)).hex()
 
 
 def sha512(x: str) -> str:
     """Returns sha512 value of hex-string x in hex-string"""
-    return '0x' + hashlib.sha3_512(bytes.fromhex((len(x) % 2) * "0" + x[2:])).hexdigest()
+    return '0x' + hashlib.sha3_512(seed_bytes(x)).hexdigest()
+
+
+def sha512_int(x: str) -> ZZ:
+    """sha512 of hex-string x as an integer"""
+    return ZZ(int.from_bytes(hashlib.sha3_512(seed_bytes(x)).digest(), "big"))
 
 
 def int_to_hex_string(x: ZZ, prefix=True) -> str:
     """Converts int to hex string (without prefix)"""
-    f = "0" + str(ceil(x.nbits() / 8) * 2) + "x"
+    x = int(x)
+    f = "0" + str((x.bit_length() + 7) // 8 * 2) + "x"
     return prefix * "0x" + format(x, f)
 
 
@@ -49,32 +149,236 @@ def embedding_degree(prime: ZZ, order: int) -> int:
     return Integers(order)(prime).multiplicative_order()
 
 
+def embedding_degree_below(prime: ZZ, order: int, bound: int):
+    """Returns embedding degree with respect to p if it is smaller than bound, otherwise None
+    Unlike embedding_degree, it does not factor order - 1 (at most bound multiplications modulo order)"""
+    prime, order = int(prime) % int(order), int(order)
+    power = 1
+    for k in range(1, bound):
+        power = power * prime % order
+        if power == 1:
+            return ZZ(k)
+    return None
+
+
+def has_embedding_degree(prime: ZZ, order: int, k: int) -> bool:
+    """Tests whether the embedding degree with respect to p is k, by k/q for the primes q dividing k"""
+    prime, order = int(prime), int(order)
+    if pow(prime, k, order) != 1:
+        return False
+    q, rest = 2, k
+    while rest > 1:
+        if rest % q == 0:
+            if pow(prime, k // q, order) == 1:
+                return False
+            while rest % q == 0:
+                rest //= q
+        q += 1
+    return True
+
+
+def has_cm_discriminant(prime: ZZ, trace: int, discriminant: int) -> bool:
+    """Tests whether the CM discriminant (as in compute_properties) is the fundamental discriminant"""
+    d = discriminant // 4 if discriminant % 4 == 0 else discriminant
+    f2, remainder = divmod(int(trace) ** 2 - 4 * int(prime), d)
+    return remainder == 0 and f2 > 0 and isqrt(f2) ** 2 == f2
+
+
 def rightmost_bits(h: str, nbits: int) -> str:
     """Returns nbits of rightmost bits of hex-string h"""
     return int_to_hex_string(ZZ(h) & ((1 << nbits) - 1))
 
 
-def find_integer(seed: str, nbits: int, brainpool_prime=False) -> ZZ:
-    """Generates integer in [0,2^nbits - 1] from a seed s of 160-bit length
-    modified = True corresponds to find_integer2 as defined by Brainpool"""
-    seed = "0x" + "0" * (42 - len(seed)) + seed[2:]
-    v = floor((nbits - 1) / 160)
+@lru_cache(maxsize=SEED_CACHE_SIZE)
+def find_integer(seed, nbits: int, brainpool_prime=False) -> ZZ:
+    """Generates integer in [0,2^nbits - 1] from a seed s of 160-bit length (a hex string or Seed)
+    modified = True corresponds to find_integer2 as defined by Brainpool
+    The seeds s+1,...,s+v are hashed as the bytes of their value (without leading zeros), so consecutive seeds
+    share most of their digests (see sha1_digest)"""
+    data = seed_bytes(seed)
+    data = bytes(max(20 - len(data), 0)) + data  # padded to 160 bits
+    v = (nbits - 1) // 160
     w = nbits - 160 * v - (1 - brainpool_prime)
-    h = bytes.fromhex(rightmost_bits(sha1(seed), w)[2:])
+    s = int.from_bytes(data, "big")
+    h = int.from_bytes(sha1_digest(data), "big") & ((1 << w) - 1)
     for i in range(1, v + 1):
-        s_i = rightmost_bits(increment_seed(seed, i), 160)
-        h += hashlib.sha1(bytes.fromhex(s_i[2:])).digest()
-    return ZZ(h.hex(), 16)
+        h = h << 160 | int.from_bytes(sha1_digest(int_bytes((s + i) % 2 ** 160)), "big")
+    return ZZ(h)
+
+
+def find_integers(seed, nbits: int, count: int, brainpool_prime=False) -> list:
+    """find_integer of count consecutive seeds starting with seed (a hex string or Seed)
+    The integers of seeds s and s+1 share v-1 of their v trailing blocks, every block is hashed once"""
+    seed = to_seed(seed)
+    v = (nbits - 1) // 160
+    mask = (1 << (nbits - 160 * v - (1 - brainpool_prime))) - 1
+    blocks, integers = {}, []
+    for i in range(count):
+        data = seed_bytes(seed + i)
+        data = bytes(max(20 - len(data), 0)) + data
+        s = int.from_bytes(data, "big")
+        h = int.from_bytes(hashlib.sha1(data).digest(), "big") & mask
+        for j in range(1, v + 1):
+            x = (s + j) % 2 ** 160
+            if x not in blocks:
+                blocks[x] = int.from_bytes(hashlib.sha1(int_bytes(x)).digest(), "big")
+            h = h << 160 | blocks[x]
+        integers.append(ZZ(h))
+    return integers
+
+
+SEED_BATCH = 64  # seeds of a batch of find_integers
+
+
+class SeedIntegers:
+    """find_integer of the seeds of a generation loop going through consecutive seeds, in batches of find_integers"""
+
+    def __init__(self, nbits: int, batch=SEED_BATCH):
+        self.nbits = nbits
+        self.batch = batch
+        self.integers = {}
+
+    def __call__(self, seed) -> ZZ:
+        seed = to_seed(seed)
+        if seed not in self.integers:
+            integers = find_integers(seed, self.nbits, self.batch)
+            self.integers = {seed + i: r for i, r in enumerate(integers)}
+        return self.integers[seed]
 
 
 def get_b_from_r(r: ZZ, prime: ZZ, a=ZZ(-3)):
-    """Gets a parameter b of elliptic curve out of a random value r"""
-    a = GF(prime)(a)
-    if (a ** 3 / r).is_square():
-        return ZZ((a ** 3 / r).sqrt())
+    """Gets a parameter b of elliptic curve out of a random value r, the root is extracted only if it exists"""
+    prime = int(prime)
+    c = int(a) ** 3 * pow(int(r), -1, prime) % prime
+    if is_square(c, prime):
+        return ZZ(GF(prime)(c).sqrt())
     return None
 
 
+class CheckStage:
+    """
+    A stage of the security checks of a curve: check is the name of a method of the curve returning False to reject
+    it, cost is its estimated time relative to the other stages and requires lists the stages that have to run
+    before it (e.g. the ones computing the cardinality).
+    """
+
+    def __init__(self, name: str, check: str, cost=1.0, requires=()):
+        self.name = name
+        self.check = check
+        self.cost = cost
+        self.requires = tuple(requires)
+
+
+class CheckPipeline:
+    """
+    Runs the check stages of a class of curves until one rejects the curve and records the runs, the rejections
+    and the time of every stage. The stages run by their estimated cost (respecting requires). With adaptive=True
+    they are reordered every reorder_interval curves by their measured time per rejection, the cheapest filters
+    first. The accepted curves do not depend on the order since every stage is a condition on the curve.
+    """
+
+    def __init__(self, stages: list, adaptive=False, reorder_interval=1000):
+        self.stages = list(stages)
+        self.adaptive = adaptive
+        self.reorder_interval = reorder_interval
+        self.stats = {stage.name: {"runs": 0, "rejected": 0, "seconds": 0.0} for stage in self.stages}
+        self.curves = 0
+        self.reorder()
+
+    def run(self, curve) -> bool:
+        self.curves += 1
+        if self.adaptive and self.curves % self.reorder_interval == 0:
+            self.reorder()
+        for stage in self.stages:
+            stats = self.stats[stage.name]
+            start = time.perf_counter()
+            passed = getattr(curve, stage.check)() is not False
+            stats["seconds"] += time.perf_counter() - start
+            stats["runs"] += 1
+            if not passed:
+                stats["rejected"] += 1
+                return False
+        return True
+
+    def rejection_rate(self, name: str) -> float:
+        stats = self.stats[name]
+        return stats["rejected"] / stats["runs"] if stats["runs"] else 0.0
+
+    def priority(self, stage: CheckStage) -> float:
+        """Time per rejected curve, the estimated cost before any curve was checked"""
+        stats = self.stats[stage.name]
+        if not self.curves:
+            return stage.cost
+        if not stats["rejected"]:
+            return float("inf")
+        return stats["seconds"] / stats["rejected"]
+
+    def reorder(self):
+        stages, done = [], set()
+        remaining = list(self.stages)
+        while remaining:
+            ready = [s for s in remaining if all(r in done for r in s.requires)]
+            stage = min(ready, key=self.priority)
+            stages.append(stage)
+            done.add(stage.name)
+            remaining.remove(stage)
+        self.stages = stages
+
+    def report(self) -> dict:
+        """The stats of the stages in their current order with the rejection rates"""
+        return {stage.name: dict(self.stats[stage.name], rejection_rate=self.rejection_rate(stage.name))
+                for stage in self.stages}
+
+
+CHECK_PIPELINES = {}  # by the name of the class of curves, reset by run_generation
+
+
+class CurveRecord:
+    """
+    The exported values of a found curve as plain integers (the seed as its hex string), kept by SimulatedCurves
+    instead of the curve with its field, elliptic curve and the state of the generation. Immutable.
+    """
+    __slots__ = ("standard", "category", "bits", "p", "a", "b", "seed", "order", "cofactor", "generator",
+                 "cm_discriminant", "embedding_degree", "trace", "j_invariant")
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CurveRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CurveRecord is immutable")
+
+    def __reduce__(self):
+        return rebuild_record, tuple(getattr(self, name) for name in self.__slots__)
+
+    def properties(self):
+        return {"cm_discriminant": None if self.cm_discriminant is None else hex(self.cm_discriminant),
+                "embedding_degree": hex(self.embedding_degree),
+                "trace": hex(self.trace), "j_invariant": hex(self.j_invariant)}
+
+    def json_export(self):
+        generator = ("", "") if self.generator is None else [int_to_hex_string(x) for x in self.generator]
+        return {"name": f"{self.standard}_sim_{str(self.bits)}_{self.seed}", "category": f"{self.category}_sim",
+                "desc": "",
+                "field": {"type": "Prime", "p": int_to_hex_string(self.p, prefix=True), "bits": self.bits},
+                "form": "Weierstrass", "params": {"a": {"raw": int_to_hex_string(self.a, prefix=True)},
+                                                  "b": {"raw": int_to_hex_string(self.b, prefix=True)}},
+                "generator": {"x": {"raw": generator[0]}, "y": {"raw": generator[1]}},
+                "order": self.order,
+                "cofactor": self.cofactor, "properties": self.properties(), "seed": self.seed}
+
+
+def rebuild_record(*values) -> CurveRecord:
+    return CurveRecord(**dict(zip(CurveRecord.__slots__, values)))
+
+
+def optional_int(x):
+    return None if x is None else int(x)
+
+
 class VerifiableCurve(ABC):
     """
     Abstract class for a representation of curves and their generation (method find_curve).
@@ -93,6 +397,8 @@ class VerifiableCurve(ABC):
         'cofactor_bound': an upper bound on the cofactor (can be None)
         'cofactor_div': a product of primes that are permitted to occur in the factorization of the cofactor (can be None)
         'set_ab': True(default)/False require to define curve parameters
+        'adaptive_checks': True/False(default) reorder the checks by their measured cost and rejection rate
+        'defer_properties': True/False(default) leave the CM discriminant to dissectgen/properties.py
     """
 
     def __init__(self, conditions):
@@ -113,6 +419,8 @@ class VerifiableCurve(ABC):
         self._cofactor_div = None
         self._cofactor_bound = None
         self._cm_method = False
+        self._adaptive_checks = conditions.get('adaptive_checks', False)
+        self._defer_properties = conditions.get('defer_properties', False)
 
         if 'seed' in conditions:
             self._seed = conditions['seed']
@@ -172,10 +480,23 @@ class VerifiableCurve(ABC):
     def security(self):
         """
         Method for checking security (and possibly other conditions) of the curve
-        Sets the attribute _secure to True or False
+        Sets the attribute _secure to True or False, e.g. by run_checks
         """
         pass
 
+    checks = []  # the CheckStages of run_checks
+
+    def check_pipeline(self) -> CheckPipeline:
+        """The pipeline of the checks, shared by all curves of the class"""
+        name = type(self).__name__
+        if name not in CHECK_PIPELINES:
+            CHECK_PIPELINES[name] = CheckPipeline(type(self).checks, adaptive=self._adaptive_checks)
+        return CHECK_PIPELINES[name]
+
+    def run_checks(self):
+        """Security by the declared checks"""
+        self._secure = self.check_pipeline().run(self)
+
     def generate_generator(self):
         """
         Optional method for generating group generator.
@@ -199,6 +520,10 @@ class VerifiableCurve(ABC):
         self._b = None
         self._secure = None
         self._curve = None
+        self._generator = None
+        self._embedding_degree = None
+        self._cm = None
+        self._j_invariant = None
 
     def curve(self):
         if self._curve is None:
@@ -213,77 +538,116 @@ class VerifiableCurve(ABC):
     def trace(self):
         return self._p + 1 - self._cardinality
 
+    # properties known in closed form for a parametrized family (e.g. BN), used if they pass a cheap check
+    family_embedding_degree = None
+    family_cm_discriminant = None
+
     def compute_properties(self):
         if self._j_invariant is None:
             self._j_invariant = self.curve().j_invariant()
         if self._embedding_degree is None:
-            self._embedding_degree = embedding_degree(self._p, self._order)
-        if self._cm is None:
+            k = self.family_embedding_degree
+            if k is not None and has_embedding_degree(self._p, self._order, k):
+                self._embedding_degree = ZZ(k)
+            else:
+                self._embedding_degree = embedding_degree(self._p, self._order)
+        if self._cm is None and self.family_cm_discriminant is not None and \
+                has_cm_discriminant(self._p, self.trace(), self.family_cm_discriminant):
+            self._cm = ZZ(self.family_cm_discriminant)
+        if self._cm is None and not self._defer_properties:
             d = self.trace() ** 2 - 4 * self._p
             d = d.squarefree_part()
             self._cm = 4 * d if d % 4 != 1 else d
 
     def properties(self):
-        self.compute_properties()
-        return {"cm_discriminant": hex(self._cm), "embedding_degree": hex(self._embedding_degree),
-                "trace": hex(self.trace()), "j_invariant": hex(self._j_invariant)}
+        return self.record().properties()
 
     def generator(self):
         if self._generator is None:
             return "", ""
         return list(map(lambda x: int_to_hex_string(ZZ(x)), self._generator[:2]))
 
+    def record(self) -> CurveRecord:
+        """The exported values of the curve, independent of its further generation"""
+        self.compute_properties()
+        generator = None if self._generator is None else (int(ZZ(self._generator[0])), int(ZZ(self._generator[1])))
+        return CurveRecord(standard=self._standard, category=self._category, bits=int(self._bits), p=int(self._p),
+                           a=int(ZZ(self._a)), b=int(ZZ(self._b)), seed=str(self._seed),
+                           order=optional_int(self._order), cofactor=optional_int(self._cofactor),
+                           generator=generator, cm_discriminant=optional_int(self._cm),
+                           embedding_degree=int(self._embedding_degree), trace=int(self.trace()),
+                           j_invariant=int(self._j_invariant))
+
     def json_export(self):
-        return {"name": f"{self._standard}_sim_{str(self._bits)}_{self._seed}", "category": f"{self._category}_sim",
-                "desc": "",
-                "field": {"type": "Prime", "p": int_to_hex_string(self._p, prefix=True), "bits": self._bits},
-                "form": "Weierstrass", "params": {"a": {"raw": int_to_hex_string(ZZ(self._a), prefix=True)},
-                                                  "b": {"raw": int_to_hex_string(ZZ(self._b), prefix=True)}},
-                "generator": {"x": {"raw": self.generator()[0]}, "y": {"raw": self.generator()[1]}},
-                "order": self._order,
-                "cofactor": self._cofactor, "properties": self.properties(), "seed": self._seed}
+        return self.record().json_export()
 
 
 class SimulatedCurves:
     def __init__(self, standard, bits, initial_seed, attempts):
         self._curves = []
+        self._found = 0  # curves found, only counted if they were left to on_curve (see add_curve)
         self._bits = bits
         self._attempts = attempts
-        self._initial_seed = initial_seed
+        self._initial_seed = str(initial_seed)
         self._standard = standard
+        self._restored = []  # exported curves found before the generation was resumed
+        self._restored_found = 0
 
     def curves(self):
         return self._curves
 
-    def json_export(self):
-        """Prepares a list of dictionaries representing curves for json file"""
+    def restore(self, initial_seed, attempts, exported_curves, found=None):
+        """Prepends the progress made before the generation was resumed: the exported curves or, if they were
+        written out before (e.g. into the stream of the results), only their number found"""
+        self._initial_seed = str(initial_seed)
+        self._attempts += attempts
+        self._restored = exported_curves + self._restored
+        self._restored_found += len(exported_curves) if found is None else found
+
+    def summary(self):
+        """The results without the curves"""
         return {"name": f"{self._standard}_sim_" + str(self._bits),
                 "desc": f"simulated curves generated according to the {self._standard} standard",
                 "initial_seed": self._initial_seed,
-                "seeds_tried": self._attempts, "seeds_successful": len(self._curves),
-                "curves": [curve.json_export() for curve in self._curves]}
+                "seeds_tried": self._attempts, "seeds_successful": self._restored_found + self._found}
 
-    def add_curve(self, curve: VerifiableCurve):
-        self._curves.append(curve)
+    def json_export(self):
+        """Prepares a list of dictionaries representing curves for json file"""
+        return dict(self.summary(), curves=self._restored + [curve.json_export() for curve in self._curves])
+
+    def add_curve(self, curve: CurveRecord, keep=True):
+        """Counts the found curve and keeps it unless keep is False, i.e. the curve was handed to on_curve"""
+        self._found += 1
+        if keep:
+            self._curves.append(curve)
+
+    def keep_curves(self, curves: list):
+        """Keeps the curves handed to on_curve, e.g. those collected for a JSON outfile"""
+        self._curves = curves
 
     def to_json_file(self, filename):
         with open(filename, "w+") as f:
             json.dump(self.json_export(), f, indent=2, cls=IntegerEncoder)
 
 
-def generate_curves(attempts, count, curve):
+def generate_curves(attempts, count, curve, on_curve=None, checkpoint=None):
     """This is an implementation of the SEC standard suitable for large-scale simulations
-    """
+    on_curve(record, attempt) is called for every found curve (its CurveRecord) with the number of attempts made so far,
+    the results then only count the curves"""
     simulated_curves = SimulatedCurves(curve.category(), curve.bits(), curve.seed(), attempts)
     a, c = 0, 0
     while (count == 0 and a < attempts) or (count > 0 and c < count):
+        if checkpoint is not None:
+            checkpoint.update(a, curve.seed())
         a += 1
         if not curve.secure():
             curve.seed_update()
             continue
         curve.generate_generator()
-        curve.compute_properties()
-        simulated_curves.add_curve(copy.deepcopy(curve))
+        record = curve.record()
+        simulated_curves.add_curve(record, keep=on_curve is None)
+        if on_curve is not None:
+            on_curve(record, a)
         c += 1
         curve.seed_update()
     return simulated_curves
@@ -363,6 +727,218 @@ class IntegerEncoder(json.JSONEncoder):
             return str(obj)
 
 
+CURVE_REPORT_PREFIX = "CURVE "
+
+
+def report_curve(curve: CurveRecord, attempt: int):
+    """Prints the found curve on a single line of the standard output for the manager of the tasks"""
+    report_exported_curve(curve.json_export(), attempt)
+
+
+def report_exported_curve(exported: dict, attempt: int):
+    line = json.dumps({"attempt": attempt, "curve": exported}, cls=IntegerEncoder)
+    print(CURVE_REPORT_PREFIX + line, flush=True)
+
+
+CHECKPOINT_INTERVAL = 300
+JOURNAL_SUFFIX = ".curves"
+
+
+class Checkpoint:
+    """
+    Progress of a generation task, saved into a file so that a killed task can be resumed.
+    The generation loop calls update at its safe points, i.e. where its state is given by the number of attempts
+    made and the next seed to try. The progress is saved at most every interval seconds and on SIGTERM.
+    The file is created by the manager with the parameters of the task under the key "task" and removed
+    once the results are written. The found curves are appended to a journal as they are found, the checkpoint
+    records only their number and the size of the journal at the safe point. The journal is the stream of the
+    results (JSON Lines) or the file name with JOURNAL_SUFFIX. With a results channel there is no journal, the
+    manager keeps the curves and only their number is recorded.
+    """
+
+    def __init__(self, filename=None, interval=CHECKPOINT_INTERVAL):
+        self._filename = filename
+        self._interval = interval
+        self._last_save = time.time()
+        self._state = {"attempts": 0, "found": 0, "journal": 0}
+        self._journal = None  # the journal file
+        self._stream = None  # the stream of the results as the journal
+        self._size = 0  # of the journal
+        self._found = 0  # curves found since the start of this run
+        self._safe_point = None
+
+    def attempts_done(self):
+        """Attempts made before the generation was resumed"""
+        return self._state["attempts"]
+
+    def found(self):
+        """Curves found before the generation was resumed"""
+        return self._state["found"]
+
+    def journal_size(self):
+        return self._state["journal"]
+
+    def resume(self, attempts, seed):
+        """Loads the saved progress, returns the remaining attempts and the seed to continue with"""
+        if self._filename is None or not os.path.isfile(self._filename):
+            return attempts, seed
+        with open(self._filename, "r") as f:
+            self._state.update(json.load(f))
+        return attempts - self._state["attempts"], self._state["seed"]
+
+    def open_journal(self, stream=None) -> list:
+        """Appends the found curves to the journal file cut to the size saved in the checkpoint (a killed task may
+        have written more), returns the [attempt, exported curve] found before the generation was resumed.
+        Given the stream of the results (a CurveStream continued at journal_size), only its size is recorded."""
+        if self._filename is None:
+            return []
+        if stream is not None:
+            self._stream = stream
+            self._size = stream.position()
+            return []
+        name = self._filename + JOURNAL_SUFFIX
+        self._journal = open(name, "r+b" if os.path.isfile(name) else "w+b")
+        content = self._journal.read(self._state["journal"])
+        self._journal.truncate()
+        self._size = self._journal.tell()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def add_curve(self, curve: CurveRecord, attempt: int):
+        """Called once the curve is written to the stream of the results (if any)"""
+        if self._filename is None:
+            return
+        self._found += 1
+        if self._stream is not None:
+            self._size = self._stream.position()
+        elif self._journal is not None:
+            line = json.dumps([self.attempts_done() + attempt, curve.json_export()], cls=IntegerEncoder)
+            self._journal.write(line.encode() + b"\n")
+            self._size = self._journal.tell()
+
+    def update(self, attempt: int, seed):
+        """Marks a safe point of the generation loop: attempt attempts were made and seed is the next one"""
+        if self._filename is None:
+            return
+        self._safe_point = attempt, seed, self._found, self._size
+        if time.time() - self._last_save >= self._interval:
+            self.save()
+
+    def save(self):
+        if self._filename is None or self._safe_point is None:
+            return
+        attempt, seed, found, size = self._safe_point
+        if self._journal is not None:
+            self._journal.flush()
+        state = dict(self._state, seed=str(seed), attempts=self.attempts_done() + attempt,
+                     found=self.found() + found, journal=size)
+        tmp_name = f"{self._filename}.tmp"
+        with open(tmp_name, "w") as f:
+            json.dump(state, f, cls=IntegerEncoder)
+        os.replace(tmp_name, self._filename)
+        self._last_save = time.time()
+
+    def remove(self):
+        if self._journal is not None:
+            self._journal.close()
+        if self._filename is not None:
+            remove_checkpoint(self._filename)
+
+    def save_on_sigterm(self):
+        """Installs a SIGTERM handler saving the progress before exiting, returns the previous handler"""
+
+        def handler(signum, frame):
+            self.save()
+            sys.exit(128 + signum)
+
+        return signal.signal(signal.SIGTERM, handler)
+
+
+def remove_checkpoint(filename: str):
+    """Removes the checkpoint of a task and its journal"""
+    for name in (filename, filename + JOURNAL_SUFFIX):
+        if os.path.isfile(name):
+            os.remove(name)
+
+
+def run_generation(args, generate):
+    """Runs the generation of a task according to its command line arguments (see curve_command_line).
+    generate(attempts, seed, count, on_curve, checkpoint) runs the generation loop of the standard.
+    The task is resumed from its checkpoint (if any), found curves are reported (if requested) and the results
+    are saved into the outfile. An outfile with the suffix .jsonl is written as a stream of JSON Lines, every curve
+    as soon as it is found, the task then keeps only the counts of the curves (as with a results channel)."""
+    CHECK_PIPELINES.clear()  # of the previous task run by the same worker of the pool
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_interval)
+    attempts, seed = checkpoint.resume(args.attempts, args.seed)
+    count = args.count
+    if count > 0:
+        count -= checkpoint.found()
+        if count <= 0:
+            attempts, count = 0, 0
+
+    results_channel = None
+    if args.channel is not None:
+        results_channel = channel.ResultChannel(args.channel, IntegerEncoder)
+        results_channel.send_resumed(checkpoint.found())  # the manager keeps the curves sent before
+    stream, restored = None, []
+    if args.outfile and args.outfile.endswith(jsonl.SUFFIX):
+        stream = jsonl.CurveStream(args.outfile, args.seed, IntegerEncoder,
+                                   (checkpoint.journal_size(), checkpoint.found()))
+        checkpoint.open_journal(stream)
+    elif results_channel is None:
+        restored = checkpoint.open_journal()
+    for attempt, exported in restored:
+        if args.report:
+            report_exported_curve(exported, attempt)
+    kept = [] if args.outfile and stream is None else None  # the curves of a JSON outfile, otherwise only counted
+
+    def on_curve(curve: CurveRecord, attempt: int):
+        if kept is not None:
+            kept.append(curve)
+        if args.report:
+            report_curve(curve, checkpoint.attempts_done() + attempt)
+        if stream is not None:
+            stream.write_curve(curve.json_export())
+        if results_channel is not None:
+            results_channel.send_curve(checkpoint.attempts_done() + attempt, curve.json_export())
+        checkpoint.add_curve(curve, attempt)
+
+    previous_handler = checkpoint.save_on_sigterm()
+    try:
+        results = generate(attempts, seed, count, on_curve, checkpoint)
+    except BaseException:
+        if stream is not None:
+            stream.close()  # without the footer, i.e. unfinished
+        raise
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+    results.restore(args.seed, checkpoint.attempts_done(), [c for _, c in restored], checkpoint.found())
+    if kept is not None:
+        results.keep_curves(kept)
+    if stream is not None:
+        stream.close(results.summary())
+    elif args.outfile:
+        results.to_json_file(args.outfile)
+    if results_channel is not None:
+        summary = results.summary()
+        results_channel.send_done(summary["seeds_tried"], summary["seeds_successful"])
+        results_channel.close()
+    checkpoint.remove()
+    if args.check_stats:
+        print_check_stats()
+    return results
+
+
+def print_check_stats():
+    """Prints the stats of the check stages of every class of curves to the standard error"""
+    for name, pipeline in CHECK_PIPELINES.items():
+        print(name, json.dumps(pipeline.report()), file=sys.stderr)
+
+
+def curve_options(args) -> dict:
+    """The conditions of the curves (see VerifiableCurve) given by the command line of the task"""
+    return {"adaptive_checks": args.adaptive_checks, "defer_properties": args.defer_properties}
+
+
 def curve_command_line():
     parser = argparse.ArgumentParser()
     parser.add_argument("--attempts", type=ZZ)
@@ -372,4 +948,16 @@ def curve_command_line():
     parser.add_argument("--cofactor_div", type=ZZ)
     parser.add_argument("--count", type=int, default=0)
     parser.add_argument("--outfile")
+    parser.add_argument("--report", action="store_true", help="Print every found curve to the standard output")
+    parser.add_argument("--channel", default=None,
+                        help="File descriptor (or 'parent' in a worker of the pool) for the binary results channel")
+    parser.add_argument("--checkpoint", default=None, help="File for saving the progress, resumed if it exists")
+    parser.add_argument("--checkpoint_interval", type=float, default=CHECKPOINT_INTERVAL,
+                        help="Seconds between the saves of the progress")
+    parser.add_argument("--adaptive_checks", action="store_true",
+                        help="Reorder the security checks by their measured time per rejected curve")
+    parser.add_argument("--check_stats", action="store_true",
+                        help="Print the rejections and the time of the security checks to the standard error")
+    parser.add_argument("--defer_properties", action="store_true",
+                        help="Export the curves without the CM discriminant, see dissectgen/properties.py")
     return parser.parse_args()
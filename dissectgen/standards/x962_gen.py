@@ -1,20 +1,15 @@
-from dissectgen.standards.utils import increment_seed, embedding_degree, VerifiableCurve, find_integer, \
-    get_b_from_r, curve_command_line, generate_curves
-from sage.all import ZZ, GF, EllipticCurve, prime_range, is_pseudoprime, sqrt
+from dissectgen.standards.utils import to_seed, embedding_degree_below, VerifiableCurve, SeedIntegers, \
+    get_b_from_r, curve_command_line, curve_options, generate_curves, run_generation
+from dissectgen.standards.smoothness import smooth_part
+from sage.all import ZZ, GF, EllipticCurve, is_pseudoprime, sqrt
 
 
 def verify_near_primality(u: ZZ, r_min: ZZ, l_max=255, cofactor_bound=None) -> dict:
     """Verifying near primality according to the standard"""
-    n = u
-    h = 1
-    for prime in prime_range(l_max):
-        while n % prime == 0:
-            n = ZZ(n / prime)
-            h = h * prime
-            if cofactor_bound is not None and h > cofactor_bound:
-                return {}
-            if n < r_min:
-                return {}
+    h = ZZ(smooth_part(u, l_max))
+    if cofactor_bound is not None and h > cofactor_bound:
+        return {}
+    n = u // h
     if n < r_min:
         return {}
     if is_pseudoprime(n):
@@ -23,8 +18,9 @@ def verify_near_primality(u: ZZ, r_min: ZZ, l_max=255, cofactor_bound=None) -> d
 
 
 class X962(VerifiableCurve):
-    def __init__(self, seed: str, p: ZZ, cofactor_bound=None, cofactor_div=0):
-        conditions = {"seed": seed, "p": p, "cofactor_bound": cofactor_bound, "cofactor_div": cofactor_div}
+    def __init__(self, seed: str, p: ZZ, cofactor_bound=None, cofactor_div=0, options=None):
+        conditions = {"seed": to_seed(seed), "p": p, "cofactor_bound": cofactor_bound, "cofactor_div": cofactor_div,
+                      **(options or {})}
         super().__init__(conditions)
         self._standard = "x962"
         self._category = "x962"
@@ -56,15 +52,20 @@ class X962(VerifiableCurve):
         self._secure = self.coefficients_check()
         if not self.order_check():
             return
-        self._embedding_degree = embedding_degree(self._p, self._order)
-        if self._embedding_degree < self._embedding_degree_bound:
+        # the exact embedding degree of a secure curve is computed by compute_properties
+        self._embedding_degree = embedding_degree_below(self._p, self._order, self._embedding_degree_bound)
+        if self._embedding_degree is not None:
             return
         if self._p == self._cardinality:
             return
         self._secure = True
 
+    _integers = None  # SeedIntegers of the seeds, created by the first set_ab
+
     def set_ab(self):
-        r = find_integer(self._seed, self._p.nbits())
+        if self._integers is None:
+            self._integers = SeedIntegers(self._p.nbits())
+        r = self._integers(self._seed)
         b = get_b_from_r(r, self._p)
         if b is None:
             return
@@ -72,21 +73,25 @@ class X962(VerifiableCurve):
         self._a = ZZ(self._p - 3)
 
     def seed_update(self, offset=1):
-        self._seed = increment_seed(self._seed, offset)
+        self._seed = self._seed + offset
         self.clear()
         self.set_ab()
 
 
-def generate_x962_curves(attempts, p, seed, cofactor_bound=None, cofactor_div=0, count=0):
+def generate_x962_curves(attempts, p, seed, cofactor_bound=None, cofactor_div=0, count=0, on_curve=None,
+                         checkpoint=None, options=None):
     """Generates at most #attempts curves according to the standard
     The cofactor is arbitrary if cofactor_one=False (default) otherwise cofactor=1
     """
-    curve = X962(seed, p, cofactor_bound, cofactor_div)
-    return generate_curves(attempts, count, curve)
+    curve = X962(seed, p, cofactor_bound, cofactor_div, options)
+    return generate_curves(attempts, count, curve, on_curve, checkpoint)
 
 
 if __name__ == "__main__":
     args = curve_command_line()
-    results = generate_x962_curves(args.attempts, args.prime, args.seed, args.cofactor_bound, args.cofactor_div,
-                                   args.count)
-    results.to_json_file(args.outfile)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        return generate_x962_curves(attempts, args.prime, seed, args.cofactor_bound, args.cofactor_div, count,
+                                    on_curve, checkpoint, curve_options(args))
+
+    run_generation(args, generate)
@@ -0,0 +1,72 @@
+"""Single results file of a campaign, collected from the results channels of the tasks"""
+
+import logging
+
+from dissectgen import jsonl
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignStore:
+    """
+    Appends the curves of tasks processing consecutive seed ranges (chunks) to one JSON Lines file in seed order.
+    The curves of a chunk are held in memory until the chunk and all chunks before it have finished, the file
+    thus has the format of a merged result once the footer is written by close.
+    """
+
+    def __init__(self, standard: str, bits: int, filename: str, encoder=None):
+        self.standard = standard
+        self.bits = bits
+        self.filename = filename
+        self.encoder = encoder
+        self.stream = None
+        self.initial_seed = None
+        self.chunks = {}  # unwritten chunks by index: {"attempts", "curves", "done"}
+        self.next_chunk = 0  # index of the first unwritten chunk
+        self.added = 0
+        self.seeds_tried = 0
+
+    def add_chunk(self, seed: str, attempts: int) -> int:
+        """Registers the next seed range, returns its index"""
+        if self.stream is None:
+            self.initial_seed = seed
+            self.stream = jsonl.CurveStream(self.filename, seed, self.encoder)
+        self.chunks[self.added] = {"attempts": attempts, "curves": [], "done": False}
+        self.added += 1
+        return self.added - 1
+
+    def add_curve(self, chunk: int, curve: dict):
+        self.chunks[chunk]["curves"].append(curve)
+
+    def received(self, chunk: int) -> int:
+        return len(self.chunks[chunk]["curves"])
+
+    def reset(self, chunk: int, kept=0):
+        """Discards the curves received from a failed run of the chunk except the first kept ones,
+        which the run saved in its checkpoint before it was resumed"""
+        del self.chunks[chunk]["curves"][kept:]
+
+    def finish(self, chunk: int):
+        """Marks the chunk as finished and writes out the longest finished prefix of chunks"""
+        self.chunks[chunk]["done"] = True
+        while self.next_chunk in self.chunks and self.chunks[self.next_chunk]["done"]:
+            finished = self.chunks.pop(self.next_chunk)
+            for curve in finished["curves"]:
+                self.stream.write_curve(curve)
+            self.seeds_tried += finished["attempts"]
+            self.next_chunk += 1
+
+    def complete(self) -> bool:
+        return not self.chunks
+
+    def close(self):
+        """Writes the footer if all chunks have finished, otherwise the file is left incomplete"""
+        if self.stream is None:
+            return
+        if not self.complete():
+            logger.warning("%s chunks are unfinished, %s is incomplete" % (len(self.chunks), self.filename))
+            self.stream.close()
+            return
+        self.stream.close({"name": f"{self.standard}_sim_" + str(self.bits),
+                           "desc": f"simulated curves generated according to the {self.standard} standard",
+                           "seeds_tried": self.seeds_tried})
@@ -0,0 +1,49 @@
+"""Wall-clock budgets of tasks and the choice of tasks for speculative re-execution"""
+
+import time
+
+
+class StragglerPolicy:
+    """
+    Estimates the time per seed from the finished tasks. A task may run for factor times its expected duration
+    (but at least min_budget seconds), a task running longer is considered hung and is killed. No budget is given
+    before the first task finishes or if the factor is 0 (the default).
+    """
+
+    def __init__(self, factor=0.0, min_budget=60.0):
+        self.factor = factor
+        self.min_budget = min_budget
+        self.attempts = 0
+        self.elapsed = 0.0
+
+    def record(self, attempts: int, elapsed: float):
+        if attempts > 0 and elapsed is not None:
+            self.attempts += attempts
+            self.elapsed += elapsed
+
+    def seconds_per_seed(self):
+        if self.attempts == 0:
+            return None
+        return self.elapsed / self.attempts
+
+    def budget(self, attempts: int):
+        """Wall-clock budget in seconds of a task with the given number of attempts or None if not known"""
+        spp = self.seconds_per_seed()
+        if spp is None or not self.factor:
+            return None
+        return max(self.min_budget, self.factor * attempts * spp)
+
+    def slowness(self, attempts: int, started: float, now=None):
+        """Ratio of the time a task started at the given time runs to its expected duration"""
+        now = time.time() if now is None else now
+        return (now - started) / max(attempts * self.seconds_per_seed(), 1e-9)
+
+    def stragglers(self, running: list, slots: int, now=None) -> list:
+        """Chooses at most slots of the running tasks (attempts, started, key) that run longer than expected,
+        the slowest first, and returns their keys. A fresh copy of a task running at the usual pace would not
+        finish earlier."""
+        if self.seconds_per_seed() is None or slots <= 0:
+            return []
+        slowness = [(self.slowness(attempts, started, now), key) for attempts, started, key in running]
+        slow = sorted([x for x in slowness if x[0] > 1], key=lambda x: x[0], reverse=True)
+        return [key for _, key in slow[:slots]]
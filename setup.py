@@ -4,5 +4,10 @@ setup(  name='dissectgen',
 	author='vojtechsu',
 	license='MIT',
 	entry_points={"console_scripts":["dissectgen=dissectgen.dissectgen:main",
-					 "dissectgen-merge=dissectgen.merge:main"]},
+					 "dissectgen-merge=dissectgen.merge:main",
+					 "dissectgen-cluster=dissectgen.cluster:main",
+					 "dissectgen-binary=dissectgen.binary:main",
+					 "dissectgen-coverage=dissectgen.coverage:main",
+					 "dissectgen-database=dissectgen.database:main",
+					 "dissectgen-properties=dissectgen.properties:main"]},
 	packages=find_packages())
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from dissectgen.binary import CurveTable, binary_to_json, json_to_binary, limbs_for
+
+
+def exported_curve(seed, trace, generator=True):
+    p = 2 ** 127 - 1
+    return {"name": f"x962_sim_128_{seed}", "category": "x962_sim", "desc": "",
+            "field": {"type": "Prime", "p": hex(p), "bits": 128}, "form": "Weierstrass",
+            "params": {"a": {"raw": "0x0a"}, "b": {"raw": "0x0100"}},
+            "generator": {"x": {"raw": "0x05" if generator else ""}, "y": {"raw": "0x07" if generator else ""}},
+            "order": p + 1 - trace, "cofactor": 1,
+            "properties": {"cm_discriminant": hex(trace ** 2 - 4 * p), "embedding_degree": hex(p - trace),
+                           "trace": hex(trace), "j_invariant": "0x1f"},
+            "seed": seed}
+
+
+def test_binary_round_trip(tmp_path):
+    curves = [exported_curve("0x00ff", 12345), exported_curve("0x0100", -7, generator=False)]
+    results = {"name": "x962_sim_128", "desc": "simulated curves", "initial_seed": "0x00f0", "seeds_tried": 20,
+               "seeds_successful": 2, "curves": curves}
+    json_name, binary_name = str(tmp_path / "20_128_0x00f0.json"), str(tmp_path / "x962_128.curves")
+    with open(json_name, "w") as f:
+        json.dump(results, f)
+    json_to_binary(json_name, binary_name)
+
+    table = CurveTable(binary_name)
+    assert len(table) == 2 and table.column("p").shape == (2, 3)
+    assert table.value("trace", 1) == -7 and table.value("cofactor", 0) == 1
+    assert list(table.fits("trace")) == [True, False]
+    assert [c["seed"] for c in table.curves(table.low("flags") == 1)] == ["0x00ff"]
+
+    binary_to_json(binary_name, str(tmp_path / "back.json"))
+    with open(tmp_path / "back.json") as f:
+        assert json.load(f) == results
+
+
+def test_binary_deferred_properties(tmp_path):
+    """Curves generated with --defer_properties, before and after the (partial) CM discriminants are computed"""
+    deferred, partial, complete = (exported_curve(seed, 12345) for seed in ("0x00ff", "0x0100", "0x0101"))
+    deferred["properties"]["cm_discriminant"] = None
+    partial["properties"]["cm_discriminant_partial"] = True
+    results = {"name": "x962_sim_128", "desc": "simulated curves", "initial_seed": "0x00f0", "seeds_tried": 20,
+               "seeds_successful": 3, "curves": [deferred, partial, complete]}
+    json_name, binary_name = str(tmp_path / "20_128_0x00f0.json"), str(tmp_path / "x962_128.curves")
+    with open(json_name, "w") as f:
+        json.dump(results, f)
+    json_to_binary(json_name, binary_name)
+    assert list(CurveTable(binary_name).low("flags")) == [1 | 2, 1 | 4, 1]
+
+    binary_to_json(binary_name, str(tmp_path / "back.json"))
+    with open(tmp_path / "back.json") as f:
+        assert json.load(f) == results
+
+
+def test_binary_limbs():
+    """The CM discriminant 4d, with d the squarefree part of t^2 - 4p, can reach -16p"""
+    assert limbs_for(124) == 3 and limbs_for(123) == 2
+    assert (-16 * (2 ** 124 - 1)).bit_length() + 1 > 128
+
+
+def test_binary_unfinished(tmp_path):
+    curve = json.dumps(exported_curve("0x00ff", 12345))
+    truncated, headless = tmp_path / "20_128_0x00f0.jsonl", tmp_path / "21_128_0x00f0.jsonl"
+    truncated.write_text(json.dumps({"header": {"initial_seed": "0x00f0"}}) + "\n" + curve + "\n")
+    footer = {"name": "x962_sim_128", "desc": "", "seeds_tried": 20, "seeds_successful": 1}
+    headless.write_text(curve + "\n" + json.dumps({"footer": footer}) + "\n")
+    no_seed = tmp_path / "22_128_0x00f0.json"
+    no_seed.write_text(json.dumps(dict(footer, curves=[json.loads(curve)])))
+    for path in (truncated, headless, no_seed):
+        with pytest.raises(ValueError, match=path.name):
+            json_to_binary(str(path), str(tmp_path / "x962_128.curves"))
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import tempfile
+
+import pytest
+
+from dissectgen.dissectgen import Campaign, Sweep, estimate_seconds_per_seed, estimate_seeds_per_curve, \
+    load_campaign_file
+from dissectgen.quota import CurveQuota
+from dissectgen.standards.utils import CURVE_REPORT_PREFIX
+from dissectgen.stragglers import StragglerPolicy
+
+
+class Runner:
+    def __init__(self):
+        self.queue_factor = 100
+
+
+class StubCampaign:
+    def __init__(self, name, tasks, seconds_per_task):
+        self.name = name
+        self.tasks = tasks
+        self.seconds_per_task = seconds_per_task
+        self.scheduler = None
+
+    def feeder(self):
+        while self.tasks > 0:
+            self.tasks -= 1
+            yield self.name
+
+    def remaining_work(self):
+        return self.tasks * self.seconds_per_task
+
+    def seconds_per_seed(self):
+        return self.seconds_per_task
+
+
+def test_sweep_takes_most_work_first():
+    runner = Runner()
+    sweep = Sweep(runner, [StubCampaign("small", 4, 1.0), StubCampaign("big", 2, 3.0)])
+    assert runner.queue_factor == 0
+    assert list(sweep.feeder()) == ["big", "small", "big", "small", "small", "small"]
+    assert estimate_seconds_per_seed(512) == 16 * estimate_seconds_per_seed(256)
+
+
+def count_campaign(bits, count):
+    campaign = Campaign.__new__(Campaign)
+    campaign.args = argparse.Namespace(bits=bits)
+    campaign.quota = CurveQuota("x962", bits, count)
+    campaign.policy = StragglerPolicy()
+    return campaign
+
+
+def test_count_campaign_work():
+    small, large = count_campaign(256, 2), count_campaign(256, 20)
+    assert small.remaining_work() == 2 * estimate_seeds_per_curve(256) * estimate_seconds_per_seed(256)
+    assert small.remaining_work() < large.remaining_work() < float("inf")
+    chunk = large.quota.add_chunk("0x01", 30)
+    large.quota.on_output(chunk, CURVE_REPORT_PREFIX + json.dumps({"attempt": 5, "curve": {"name": "a"}}))
+    large.quota.on_output(chunk, CURVE_REPORT_PREFIX + json.dumps({"attempt": 9, "curve": {"name": "b"}}))
+    large.quota.finish(chunk)
+    large.policy.record(30, 60.0)
+    assert large.remaining_work() == 18 * 15 * 2.0
+    large.quota.abort()
+    assert large.remaining_work() == 0
+
+
+def test_load_campaign_file():
+    args = argparse.Namespace(standard=None, bits=None, attempts=1, count=None, tasks=4)
+    with tempfile.TemporaryDirectory() as tmp:
+        file_name = os.path.join(tmp, "sweep.json")
+        with open(file_name, "w") as f:
+            json.dump([{"standard": "x962", "bits": 192, "attempts": 100}, {"standard": "secg", "bits": 256}], f)
+        campaigns = load_campaign_file(file_name, args)
+        assert [(c.standard, c.bits, c.attempts, c.tasks) for c in campaigns] == [("x962", 192, 100, 4),
+                                                                                 ("secg", 256, 1, 4)]
+        with open(file_name, "w") as f:
+            json.dump([{"standard": "x962", "bits": 192, "tasks": 8}], f)
+        with pytest.raises(ValueError):
+            load_campaign_file(file_name, args)
@@ -0,0 +1,34 @@
+from dissectgen import channel, jsonl
+from dissectgen.store import CampaignStore
+
+
+def test_frames_split_across_reads():
+    data = (channel.encode_frame(channel.CURVE, channel.encode_curve(7, {"seed": "0x7"})) +
+            channel.encode_frame(channel.DONE, channel.encode_done(10, 1)) +
+            channel.encode_frame(channel.RESUMED, channel.encode_resumed(2)))
+    decoder, frames = channel.FrameDecoder(), []
+    for i in range(0, len(data), 3):
+        frames += decoder.feed(data[i:i + 3])
+    assert not decoder.pending()
+    (kind, curve), (done, counts), (resumed, found) = frames
+    assert kind == channel.CURVE and channel.decode_curve(curve) == (7, {"seed": "0x7"})
+    assert done == channel.DONE and channel.decode_done(counts) == (10, 1)
+    assert resumed == channel.RESUMED and channel.decode_resumed(found) == 2
+
+
+def test_store_writes_in_seed_order(tmp_path):
+    filename = str(tmp_path / "campaign.jsonl")
+    store = CampaignStore("x962", 192, filename)
+    first, second = store.add_chunk("0x01", 10), store.add_chunk("0x0b", 10)
+    store.add_curve(second, {"seed": "0x0c"})
+    store.finish(second)
+    store.add_curve(first, {"seed": "0x02"})
+    store.add_curve(first, {"seed": "0x03"})
+    store.reset(first, 1)  # resumed from a checkpoint after the first curve
+    store.add_curve(first, {"seed": "0x04"})
+    assert not store.complete()
+    store.finish(first)
+    store.close()
+    results = jsonl.load(filename)
+    assert results["initial_seed"] == "0x01" and results["seeds_tried"] == 20
+    assert [c["seed"] for c in results["curves"]] == ["0x02", "0x04", "0x0c"]
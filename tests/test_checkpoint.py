@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import tempfile
+
+from dissectgen.standards.utils import JOURNAL_SUFFIX, Checkpoint, SimulatedCurves, run_generation
+
+
+class ExportedCurve:
+    def __init__(self, seed):
+        self._seed = seed
+
+    def json_export(self):
+        return {"seed": self._seed}
+
+
+def generate_every_third(attempts, seed, count, on_curve, checkpoint, stop_at=None):
+    """Finds a 'curve' for every seed divisible by 3"""
+    simulated_curves = SimulatedCurves("test", 8, seed, attempts)
+    seed = int(seed, 16)
+    for a in range(attempts):
+        checkpoint.update(a, hex(seed))
+        if a == stop_at:
+            checkpoint.save()
+            raise KeyboardInterrupt
+        if seed % 3 == 0:
+            curve = ExportedCurve(hex(seed))
+            simulated_curves.add_curve(curve, keep=False)
+            on_curve(curve, a + 1)
+        seed += 1
+    return simulated_curves
+
+
+def test_resume_from_checkpoint():
+    with tempfile.TemporaryDirectory() as directory:
+        args = argparse.Namespace(attempts=10, seed="0x1", count=0, report=False, channel=None,
+                                  checkpoint=os.path.join(directory, "checkpoint.json"), checkpoint_interval=0,
+                                  outfile=os.path.join(directory, "out.json"), adaptive_checks=False,
+                                  check_stats=False, defer_properties=False)
+        try:
+            run_generation(args, lambda *a: generate_every_third(*a, stop_at=5))
+        except KeyboardInterrupt:
+            pass
+        with open(args.checkpoint) as f:
+            state = json.load(f)
+        assert state["attempts"] == 5 and state["seed"] == "0x6"
+        assert state["found"] == 1 and "curves" not in state
+        with open(args.checkpoint + JOURNAL_SUFFIX) as f:
+            assert [json.loads(line) for line in f] == [[3, {"seed": "0x3"}]]
+
+        run_generation(args, generate_every_third)
+        with open(args.outfile) as f:
+            results = json.load(f)
+        assert results["initial_seed"] == "0x1"
+        assert results["seeds_tried"] == 10
+        assert [c["seed"] for c in results["curves"]] == ["0x3", "0x6", "0x9"]
+        assert not os.path.isfile(args.checkpoint)
+
+
+def test_checkpoint_without_file():
+    checkpoint = Checkpoint()
+    assert checkpoint.resume(10, "0x1") == (10, "0x1")
+    checkpoint.update(3, "0x4")
+    checkpoint.save()
+    assert checkpoint.open_journal() == []
+    checkpoint.add_curve(ExportedCurve("0x4"), 4)
+    assert checkpoint.found() == 0 and checkpoint._journal is None
+
+
+def test_journal_cut_at_safe_point(tmp_path):
+    """Curves written after the last save are dropped on resume, their attempts are made again"""
+    name = str(tmp_path / "checkpoint.json")
+    checkpoint = Checkpoint(name, interval=1000)
+    checkpoint.open_journal()
+    checkpoint.add_curve(ExportedCurve("0x3"), 3)
+    checkpoint.update(4, "0x5")
+    checkpoint.save()
+    checkpoint.add_curve(ExportedCurve("0x6"), 6)
+    checkpoint.update(7, "0x8")
+    checkpoint._journal.flush()  # killed before the next save
+
+    resumed = Checkpoint(name)
+    assert resumed.resume(10, "0x1") == (6, "0x5")
+    assert resumed.found() == 1 and resumed.open_journal() == [[3, {"seed": "0x3"}]]
+    resumed.add_curve(ExportedCurve("0x6"), 2)
+    resumed.update(3, "0x8")
+    resumed.save()
+    with open(name + JOURNAL_SUFFIX) as f:
+        assert [json.loads(line) for line in f] == [[3, {"seed": "0x3"}], [6, {"seed": "0x6"}]]
+    resumed.remove()
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,84 @@
+import argparse
+
+from dissectgen.standards import utils
+from dissectgen.standards.utils import CheckPipeline, CheckStage, SimulatedCurves, VerifiableCurve, curve_options, \
+    run_generation
+
+
+class Curve:
+    def __init__(self, value):
+        self.value = value
+        self.calls = []
+
+    def check_positive(self):
+        self.calls.append("positive")
+        return self.value > 0
+
+    def check_even(self):
+        self.calls.append("even")
+        return self.value % 2 == 0
+
+    def check_small(self):
+        self.calls.append("small")
+        return self.value < 10
+
+
+STAGES = [CheckStage("positive", "check_positive", cost=5), CheckStage("even", "check_even", cost=1),
+          CheckStage("small", "check_small", cost=2, requires=["positive"])]
+
+
+def test_estimated_order():
+    pipeline = CheckPipeline(STAGES)
+    assert [s.name for s in pipeline.stages] == ["even", "positive", "small"]
+    curve = Curve(3)
+    assert not pipeline.run(curve)
+    assert curve.calls == ["even"]
+    assert pipeline.run(Curve(4))
+    assert pipeline.report()["even"] == dict(runs=2, rejected=1, seconds=pipeline.stats["even"]["seconds"],
+                                             rejection_rate=0.5)
+
+
+def test_adaptive_order_accepts_the_same_curves():
+    values = list(range(-20, 20)) * 10
+    fixed, adaptive = CheckPipeline(STAGES), CheckPipeline(STAGES, adaptive=True, reorder_interval=7)
+    assert [v for v in values if fixed.run(Curve(v))] == [v for v in values if adaptive.run(Curve(v))]
+    names = [s.name for s in adaptive.stages]
+    assert names.index("positive") < names.index("small")
+
+
+def checked_class():
+    """A new class of curves on every call, as a wrapper script run again by a worker of the pool defines"""
+
+    class Checked(VerifiableCurve):
+        checks = STAGES
+
+        def set_ab(self):
+            pass
+
+        def seed_update(self, offset=1):
+            pass
+
+        def security(self):
+            self.run_checks()
+
+    return Checked
+
+
+def test_pipelines_by_class_name():
+    args = argparse.Namespace(attempts=1, seed="0x1", count=0, report=False, channel=None, checkpoint=None,
+                              checkpoint_interval=0, outfile=None, adaptive_checks=True, check_stats=False,
+                              defer_properties=True)
+
+    def generate(attempts, seed, count, on_curve, checkpoint):
+        for _ in range(2):
+            curve = checked_class()({"set_ab": False, **curve_options(args)})
+            assert curve._defer_properties
+            assert curve.check_pipeline() is utils.CHECK_PIPELINES["Checked"]
+        return SimulatedCurves("test", 8, seed, attempts)
+
+    pipelines = []
+    for _ in range(2):
+        run_generation(args, generate)
+        assert list(utils.CHECK_PIPELINES) == ["Checked"] and utils.CHECK_PIPELINES["Checked"].adaptive
+        pipelines.append(utils.CHECK_PIPELINES["Checked"])
+    assert pipelines[0] is not pipelines[1]  # the stats of a task do not include those of the previous one
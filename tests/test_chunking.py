@@ -0,0 +1,34 @@
+from dissectgen.chunking import ChunkScheduler, equal_chunks, split_gaps
+
+
+def test_equal_chunks():
+    assert list(equal_chunks(10, 3)) == [4, 4, 2]
+    assert list(equal_chunks(9, 3)) == [3, 3, 3]
+    assert list(equal_chunks(2, 4)) == [1, 1]
+
+
+def test_chunk_scheduler_covers_attempts():
+    scheduler = ChunkScheduler(10000, 4, min_time=0, max_time=100)
+    sizes = []
+    for size in scheduler:
+        sizes.append(size)
+        scheduler.record(size, size * 0.01)
+    assert sum(sizes) == 10000
+    assert sizes[0] == 10000 // 128
+    assert sizes[-1] < sizes[1]
+
+
+def test_chunk_scheduler_time_bounds():
+    scheduler = ChunkScheduler(10 ** 6, 2, initial_chunk=10, min_time=5, max_time=50)
+    assert next(scheduler) == 10
+    scheduler.record(10, 10.0)
+    assert next(scheduler) == 50
+    unbounded = ChunkScheduler(None, 2, min_time=5, max_time=50)
+    assert next(unbounded) == 1
+    unbounded.record(1, 0.1)
+    assert next(unbounded) == 500
+
+
+def test_split_gaps():
+    assert list(split_gaps([(0, 5), (10, 0), (20, 3)], iter([4, 3, 4]))) == [(0, 4), (4, 1), (20, 2), (22, 1)]
+    assert list(split_gaps([], equal_chunks(10, 2))) == []
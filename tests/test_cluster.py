@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import textwrap
+import threading
+import time
+
+from dissectgen.cluster import Coordinator, LeaseManager, Worker
+
+FAKE_WRAPPER = textwrap.dedent("""
+    import json, sys
+    args = dict(a[2:].split("=", 1) for a in sys.argv[2:])
+    with open(args["outfile"], "w") as f:
+        json.dump({"initial_seed": args["seed"], "seeds_tried": int(args["attempts"]), "curves": []}, f)
+""")
+
+
+def make_tasks(directory, n):
+    return [{"attempts": 10, "prime": 0, "seed": "0x%02x" % (10 * i), "outfile": os.path.join(directory, f"{i}.json")}
+            for i in range(n)]
+
+
+def test_expired_lease_is_reissued(tmp_path):
+    tasks = make_tasks(str(tmp_path), 2)
+    leases = LeaseManager(tasks, ttl=0.05)
+    first = leases.acquire("a")
+    second = leases.acquire("b")
+    assert leases.acquire("c") is None and not leases.finished.is_set()
+    assert leases.heartbeat(second.id)
+    time.sleep(0.1)
+    reissued = leases.acquire("c")
+    assert reissued.task is first.task
+    assert not leases.heartbeat(first.id)
+
+    # the late result of the expired lease wins, the reissued lease is then given up
+    assert leases.complete(first.id, {"initial_seed": tasks[0]["seed"]})
+    assert not leases.heartbeat(reissued.id)
+    assert not leases.complete(reissued.id, {"initial_seed": tasks[0]["seed"]})
+    assert not leases.finished.is_set()
+
+
+def test_released_lease_is_reissued(tmp_path):
+    tasks = make_tasks(str(tmp_path), 1)
+    leases = LeaseManager(tasks)
+    lease = leases.acquire("a")
+    leases.release(lease.id)
+    again = leases.acquire("b")
+    assert again.task is lease.task
+    assert leases.complete(again.id, {"initial_seed": tasks[0]["seed"]})
+    assert leases.acquire("a") is None and leases.finished.is_set()
+    with open(tasks[0]["outfile"]) as f:
+        assert json.load(f)["initial_seed"] == tasks[0]["seed"]
+
+
+def test_local_workers(tmp_path):
+    wrapper = tmp_path / "fake_wrapper.py"
+    wrapper.write_text(FAKE_WRAPPER)
+    tasks = make_tasks(str(tmp_path), 6)
+    coordinator = Coordinator(("localhost", 0), "x962", LeaseManager(tasks, ttl=10))
+    port = coordinator.server_address[1]
+    server = threading.Thread(target=coordinator.serve_until_finished, kwargs={"linger": 0.5})
+    server.start()
+    workers = [threading.Thread(target=Worker("localhost", port, f"{sys.executable} {wrapper}", f"w{i}").run)
+               for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers + [server]:
+        worker.join(30)
+        assert not worker.is_alive()
+    for task in tasks:
+        with open(task["outfile"]) as f:
+            assert json.load(f) == {"initial_seed": task["seed"], "seeds_tried": 10, "curves": []}
+
+
+def test_wrong_results_are_reissued(tmp_path):
+    tasks = make_tasks(str(tmp_path), 1)
+    leases = LeaseManager(tasks, ttl=0.05)
+    coordinator = Coordinator(("localhost", 0), "x962", leases)
+    try:
+        lease = leases.acquire("a")
+        for results in ({"initial_seed": "0xff"}, None):
+            response = coordinator.respond({"type": "result", "lease": lease.id, "results": results})
+            assert response["type"] == "error"
+            assert not leases.leases and not leases.finished.is_set()
+            lease = leases.acquire("b")
+            assert lease.task is tasks[0]
+        time.sleep(0.1)
+        again = leases.acquire("c")
+        assert leases.expired == {lease.id: tasks[0]}
+        assert leases.complete(again.id, {"initial_seed": tasks[0]["seed"]})
+        assert not leases.expired and leases.acquire("d") is None and leases.finished.is_set()
+    finally:
+        coordinator.server_close()
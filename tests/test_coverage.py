@@ -0,0 +1,24 @@
+from dissectgen.coverage import SeedCoverage, find_gaps, scan_coverage
+
+
+def test_holes_and_overlaps():
+    coverage = SeedCoverage()
+    coverage.add(0, 10, "a")
+    coverage.add(20, 5, "b")
+    coverage.add(8, 4, "c")
+    coverage.add(30, 0, "empty")
+    assert coverage.covered() == [(0, 12), (20, 25)]
+    assert coverage.holes() == [(12, 20)]
+    assert coverage.holes(5, 40) == [(12, 20), (25, 40)]
+    assert coverage.overlaps() == [(8, 10, "a", "c")]
+    assert find_gaps(coverage, 10, 20) == [(12, 8), (25, 5)]
+
+
+def test_scan_coverage(tmp_path):
+    results_path = tmp_path / "x962" / "8"
+    results_path.mkdir(parents=True)
+    (results_path / "4_8_0x0a.json").write_text("{}")
+    (results_path / "3_8_0x10.jsonl").write_text('{"header": {"initial_seed": "0x10"}}\n')  # unfinished
+    (results_path / "2_8_0x0f.json.tmp").write_text("")
+    coverage = scan_coverage("x962", 8, "0x08", str(tmp_path))
+    assert coverage.covered() == [(2, 6)]
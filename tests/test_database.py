@@ -0,0 +1,63 @@
+import json
+
+from dissectgen.database import CurveDatabase, import_paths, query_main
+from dissectgen.merge import IncrementalMerge
+
+
+def exported_curve(seed, cofactor, embedding_degree, cm_discriminant):
+    return {"name": f"x962_sim_8_{seed}", "seed": seed, "cofactor": cofactor, "order": 101,
+            "properties": {"cm_discriminant": hex(cm_discriminant), "embedding_degree": hex(embedding_degree),
+                           "trace": "0x3", "j_invariant": "0x1"}}
+
+
+def test_query(tmp_path):
+    database = CurveDatabase(str(tmp_path / "curves.db"))
+    curves = [exported_curve("0x0a", 1, 2 ** 70, -(2 ** 119)), exported_curve("0x02", 1, 5, -3),
+              exported_curve("0x0b", 4, 7, -(2 ** 120))]
+    assert database.insert("x962", 8, curves) == 3
+    assert database.insert("x962", 8, curves[:1]) == 1  # replaced
+    assert database.insert("brainpool", 8, curves[2:]) == 1
+    assert database.count() == 4
+    assert [c["seed"] for c in database.query("x962", 8, cofactor=1)] == ["0x02", "0x0a"]
+    assert [c["seed"] for c in database.query("x962", 8, max_cm_bits=120)] == ["0x02", "0x0a"]
+    assert [c["seed"] for c in database.query("x962", 8, min_embedding_degree=6)] == ["0x0a", "0x0b"]
+    assert [c["seed"] for c in database.query("x962", 8, max_embedding_degree=2 ** 64)] == ["0x02", "0x0b"]
+    assert [c["seed"] for c in database.query(cofactor=4)] == ["0x0b", "0x0b"]
+    assert database.count("x962", 8, cofactor=4) == 1
+    assert list(database.query("x962", 8, limit=1)) == [curves[1]]
+
+
+def test_large_integers_compare_as_integers(tmp_path):
+    database = CurveDatabase(str(tmp_path / "curves.db"))
+    curves = [exported_curve("0x01", 2 ** 68, 2 ** 68, -3), exported_curve("0x02", 3 * 2 ** 64, 3 * 2 ** 64, -3),
+              exported_curve("0x03", 2 ** 63, 2 ** 63 - 1, -3)]
+    database.insert("x962", 8, curves)
+    assert [c["seed"] for c in database.query(max_cofactor=2 ** 66)] == ["0x02", "0x03"]
+    assert [c["seed"] for c in database.query(min_embedding_degree=2 ** 66)] == ["0x01"]
+    assert [c["seed"] for c in database.query(max_embedding_degree=2 ** 63)] == ["0x03"]
+    assert database.count(cofactor=2 ** 63) == 1
+    database.close()
+
+
+def test_query_main(tmp_path, capsys):
+    database = CurveDatabase(str(tmp_path / "curves.db"))
+    database.insert("x962", 8, [exported_curve("0x02", 1, 5, -3), exported_curve("0x0b", 4, 7, -3)])
+    database.close()
+    query_main([str(tmp_path / "curves.db"), "-s", "x962", "--cofactor", "4"])
+    assert [json.loads(line)["seed"] for line in capsys.readouterr().out.splitlines()] == ["0x0b"]
+    query_main([str(tmp_path / "curves.db"), "--count"])
+    assert capsys.readouterr().out == "2\n"
+
+
+def test_import_results(tmp_path):
+    results_path = tmp_path / "x962" / "8"
+    results_path.mkdir(parents=True)
+    with open(results_path / "4_8_0x01.json", "w") as f:
+        json.dump({"name": "x962_sim_8", "desc": "test", "initial_seed": "0x01", "seeds_tried": 4,
+                   "seeds_successful": 1, "curves": [exported_curve("0x02", 1, 5, -3)]}, f)
+    database = CurveDatabase(str(tmp_path / "curves.db"))
+    assert import_paths(database, [("x962", str(results_path))]) == 1
+    store = IncrementalMerge("x962", str(tmp_path / "merged"), database=database)
+    database.connection.execute("DELETE FROM curves")
+    assert store.update(str(results_path)) == 1
+    assert [c["seed"] for c in database.query("x962", 8)] == ["0x02"]
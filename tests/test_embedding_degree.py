@@ -0,0 +1,27 @@
+from dissectgen.standards.utils import embedding_degree_below, has_cm_discriminant, has_embedding_degree
+
+
+def multiplicative_order(x, n):
+    k, power = 1, x % n
+    while power != 1:
+        power, k = power * x % n, k + 1
+    return k
+
+
+def test_embedding_degree_below():
+    for prime, order in ((7, 19), (2, 101), (10, 101), (3, 1009), (2 ** 61 - 1, 1013)):
+        degree = multiplicative_order(prime, order)
+        assert embedding_degree_below(prime, order, degree + 1) == degree
+        assert embedding_degree_below(prime, order, degree) is None
+    assert embedding_degree_below(2 ** 127 - 1, 2 ** 61 - 1, 100) is None
+
+
+def test_bn_family_properties():
+    u = -(2 ** 62 + 2 ** 55 + 1)  # BN254
+    p = 36 * u ** 4 + 36 * u ** 3 + 24 * u ** 2 + 6 * u + 1
+    t = 6 * u ** 2 + 1
+    n = p + 1 - t
+    assert has_embedding_degree(p, n, 12)
+    assert not has_embedding_degree(p, n, 6) and not has_embedding_degree(p, n, 24)
+    assert has_cm_discriminant(p, t, -3)
+    assert not has_cm_discriminant(p, t, -4) and not has_cm_discriminant(p, t + 2, -3)
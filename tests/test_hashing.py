@@ -0,0 +1,52 @@
+import hashlib
+import random
+
+from dissectgen.standards.utils import Seed, SeedIntegers, find_integer, find_integers, increment_seed, sha1, sha512, \
+    sha512_int
+
+
+def reference_find_integer(seed, nbits, brainpool_prime=False):
+    """find_integer on hex strings as in the standards"""
+    seed = "0x" + "0" * (42 - len(seed)) + seed[2:]
+    v = (nbits - 1) // 160
+    w = nbits - 160 * v - (1 - brainpool_prime)
+    h = int(sha1(seed), 16) & ((1 << w) - 1)
+    h = bytes.fromhex(format(h, "0%dx" % (-(-h.bit_length() // 8) * 2)))
+    for i in range(1, v + 1):
+        s_i = format((int(seed, 16) + i) % 2 ** 160, "x")
+        h += hashlib.sha1(bytes.fromhex((len(s_i) % 2) * "0" + s_i)).digest()
+    return int(h.hex(), 16)
+
+
+def test_find_integer():
+    rng = random.Random(1)
+    seeds = ["0x" + format(rng.getrandbits(160), "040x") for _ in range(20)] + ["0x01", "0x" + "f" * 39 + "0"]
+    for seed in seeds:
+        for nbits in (160, 192, 256, 320, 512, 521):
+            for brainpool_prime in (False, True):
+                assert find_integer(seed, nbits, brainpool_prime) == reference_find_integer(seed, nbits,
+                                                                                           brainpool_prime)
+
+
+def test_find_integer_brainpool():
+    """A of brainpoolP160r1 from the seed incremented 282 times"""
+    seed = "0x2b7e151628aed2a6abf7158809cf4f3c762e7160"
+    assert find_integer(increment_seed(seed, 282), 160) == 0x340E7BE2A280EB74E2BE61BADA745D97E8F7C300
+
+
+def test_find_integers():
+    for seed in ("0x2b7e151628aed2a6abf7158809cf4f3c762e7160", "0x" + "f" * 38 + "fd", "0x00fffffe"):
+        for nbits in (160, 256, 521):
+            integers = find_integers(seed, nbits, 5)
+            assert integers == [find_integer(increment_seed(seed, i), nbits) for i in range(5)]
+
+
+def test_seed_integers():
+    integers = SeedIntegers(256, batch=4)
+    seed = Seed.from_hex("0x2b7e151628aed2a6abf7158809cf4f3c762e7160")
+    assert [integers(seed + i) for i in (0, 1, 3, 4, 2)] == [find_integer(seed + i, 256) for i in (0, 1, 3, 4, 2)]
+
+
+def test_sha512_int():
+    for seed in ("0x00", "0x1234", "0xabc"):
+        assert sha512_int(seed) == int(sha512(seed), 16)
@@ -0,0 +1,44 @@
+import argparse
+import json
+import os
+
+from dissectgen import jsonl
+from dissectgen.merge import load_results
+from dissectgen.standards.utils import JOURNAL_SUFFIX, run_generation
+from tests.test_checkpoint import generate_every_third
+
+
+def test_stream_round_trip(tmp_path):
+    file_name = str(tmp_path / "10_8_0x1.jsonl")
+    stream = jsonl.CurveStream(file_name, "0x1")
+    stream.write_curve({"seed": "0x3"})
+    assert jsonl.read_header(file_name) == {"initial_seed": "0x1"}
+    assert not jsonl.is_complete(file_name)
+    stream.write_curve({"seed": "0x6"})
+    stream.close({"name": "test", "desc": "", "initial_seed": "0x1", "seeds_tried": 10, "seeds_successful": 2})
+    assert jsonl.is_complete(file_name)
+    assert jsonl.load(file_name) == {"name": "test", "desc": "", "initial_seed": "0x1", "seeds_tried": 10,
+                                     "seeds_successful": 2, "curves": [{"seed": "0x3"}, {"seed": "0x6"}]}
+
+
+def test_run_generation_streams_curves(tmp_path):
+    args = argparse.Namespace(attempts=10, seed="0x1", count=0, report=False, channel=None,
+                              checkpoint=str(tmp_path / "checkpoint.json"), checkpoint_interval=0,
+                              outfile=str(tmp_path / "10_8_0x1.jsonl"), adaptive_checks=False, check_stats=False,
+                              defer_properties=False)
+    try:
+        run_generation(args, lambda *a: generate_every_third(*a, stop_at=5))
+    except KeyboardInterrupt:
+        pass
+    assert not jsonl.is_complete(args.outfile)
+    with open(args.checkpoint) as f:
+        assert json.load(f)["found"] == 1  # the curve is kept only by the stream
+    assert not os.path.isfile(args.checkpoint + JOURNAL_SUFFIX)
+
+    results = run_generation(args, generate_every_third)
+    assert results.curves() == [] and results.summary()["seeds_successful"] == 3
+    assert jsonl.is_complete(args.outfile)
+    results = load_results(args.outfile)
+    assert results["initial_seed"] == "0x1" and results["seeds_tried"] == 10
+    assert [c["seed"] for c in results["curves"]] == ["0x3", "0x6", "0x9"]
+    assert not os.path.isfile(args.checkpoint)
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from dissectgen import jsonl
+from dissectgen.merge import IncrementalMerge, get_initial_seed, merge_bit_size
+
+
+def write_json(path, seed, tried, curves):
+    with open(path / f"{tried}_8_{seed}.json", "w") as f:
+        json.dump({"name": "x962_sim_8", "desc": "test", "initial_seed": seed, "seeds_tried": tried,
+                   "seeds_successful": len(curves), "curves": curves}, f)
+
+
+def test_merge_streams_json_and_jsonl(tmp_path):
+    tmp_path = tmp_path / "8"
+    tmp_path.mkdir()
+    write_json(tmp_path, "0x01", 4, [{"seed": "0x02"}])
+    stream = jsonl.CurveStream(str(tmp_path / "6_8_0x05.jsonl"), "0x05")
+    stream.write_curve({"seed": "0x06"})
+    stream.write_curve({"seed": "0x09"})
+    stream.close({"name": "x962_sim_8", "desc": "test", "seeds_tried": 6, "seeds_successful": 2})
+    write_json(tmp_path, "0x0b", 2, [])
+
+    merged_name = merge_bit_size("x962", str(tmp_path))
+    assert [p.name for p in tmp_path.iterdir()] == ["12_8_0x01.jsonl"]
+    merged = jsonl.load(merged_name)
+    assert merged == {"name": "x962_sim_8", "desc": "test", "initial_seed": "0x01", "seeds_tried": 12,
+                      "seeds_successful": 3, "curves": [{"seed": "0x02"}, {"seed": "0x06"}, {"seed": "0x09"}]}
+
+    write_json(tmp_path, "0x0d", 3, [{"seed": "0x0e"}])  # the campaign continues
+    assert get_initial_seed(str(tmp_path), ["3_8_0x0d.json"]) == "0x0d"
+    merged = jsonl.load(merge_bit_size("x962", str(tmp_path)))
+    assert merged["seeds_tried"] == 15 and [c["seed"] for c in merged["curves"]][-2:] == ["0x09", "0x0e"]
+
+
+def test_merge_checks_seeds(tmp_path):
+    tmp_path = tmp_path / "8"
+    tmp_path.mkdir()
+    write_json(tmp_path, "0x01", 4, [])
+    write_json(tmp_path, "0x06", 2, [])
+    with pytest.raises(AssertionError):
+        merge_bit_size("x962", str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2_8_0x06.json", "4_8_0x01.json"]
+
+
+def test_incremental_merge_appends_new_files(tmp_path):
+    results_path, merged_path = tmp_path / "8", tmp_path / "merged"
+    results_path.mkdir()
+    write_json(results_path, "0x01", 4, [{"seed": "0x02"}])
+    write_json(results_path, "0x07", 2, [{"seed": "0x08"}])
+    store = IncrementalMerge("x962", str(merged_path))
+    assert store.update(str(results_path)) == 1
+    assert [p.name for p in results_path.iterdir()] == ["2_8_0x07.json"]
+
+    write_json(results_path, "0x05", 2, [])
+    (results_path / "2_8_0x09.jsonl").write_text('{"header": {"initial_seed": "0x09"}}\n')  # unfinished
+    store = IncrementalMerge("x962", str(merged_path))
+    assert store.update(str(results_path)) == 2
+    assert [p.name for p in results_path.iterdir()] == ["2_8_0x09.jsonl"]
+    assert store.manifest["seeds_tried"] == 8 and len(store.manifest["files"]) == 3
+    merged = jsonl.load(str(merged_path / "curves.jsonl"))
+    assert merged["initial_seed"] == "0x01" and merged["seeds_tried"] == 8
+    assert [c["seed"] for c in merged["curves"]] == ["0x02", "0x08"]
+
+
+def test_incremental_merge_waits_for_lowest_file(tmp_path):
+    results_path, merged_path = tmp_path / "8", tmp_path / "merged"
+    results_path.mkdir()
+    lowest = jsonl.CurveStream(str(results_path / "4_8_0x01.jsonl"), "0x01")
+    lowest.write_curve({"seed": "0x02"})
+    write_json(results_path, "0x05", 2, [{"seed": "0x06"}])
+    store = IncrementalMerge("x962", str(merged_path))
+    assert store.update(str(results_path)) == 0 and store.manifest is None
+
+    lowest.close({"name": "x962_sim_8", "desc": "test", "seeds_tried": 4})
+    assert store.update(str(results_path)) == 2
+    assert store.manifest["initial_seed"] == "0x01" and store.manifest["seeds_tried"] == 6
+    assert [c["seed"] for c in jsonl.load(str(merged_path / "curves.jsonl"))["curves"]] == ["0x02", "0x06"]
+
+
+def test_incremental_merge_waits_for_properties(tmp_path):
+    results_path, merged_path = tmp_path / "8", tmp_path / "merged"
+    results_path.mkdir()
+    write_json(results_path, "0x01", 4, [{"seed": "0x02", "properties": {"cm_discriminant": None}}])
+    store = IncrementalMerge("x962", str(merged_path), "0x01")
+    assert store.update(str(results_path)) == 0 and store.manifest["seeds_tried"] == 0
+
+    write_json(results_path, "0x01", 4, [{"seed": "0x02", "properties": {"cm_discriminant": "-0x03"}}])
+    assert store.update(str(results_path)) == 1 and store.manifest["seeds_tried"] == 4
@@ -0,0 +1,24 @@
+from dissectgen.placement import LoadScaler, Placement, parse_cpulist
+
+
+def test_parse_cpulist():
+    assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpulist("") == []
+
+
+def test_placement_round_robin():
+    placement = Placement()
+    assert placement.cpus(0) is None
+    placement.cpu_sets = [[0, 1], [2, 3]]
+    assert placement.cpus(0) == [0, 1]
+    assert placement.cpus(3) == [2, 3]
+
+
+def test_scaler_target():
+    scaler = LoadScaler(8, task_memory=2 ** 30)
+    scaler.cpus = 8
+    assert scaler.target(2, 2.0, None) == 8
+    assert scaler.target(2, 6.0, None) == 4
+    assert scaler.target(2, 20.0, None) == 1
+    assert scaler.target(2, 2.0, 3 * 2 ** 30) == 5
+    assert LoadScaler(4).target(0, 0.0, 0) <= 4
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from dissectgen.dissectgen import create_checkpoint, load_checkpoints
+from dissectgen.job_manager.manager import Task
+from dissectgen.job_manager.pool import WorkerPool
+from dissectgen.standards.utils import Checkpoint
+
+SCRIPT = """
+import argparse, sys, time
+from dissectgen.standards.utils import SimulatedCurves, run_generation
+
+
+def generate(attempts, seed, count, on_curve, checkpoint):
+    for a in range(attempts):
+        checkpoint.update(a, hex(int(seed, 16) + a))
+        print("attempt", a, flush=True)
+        time.sleep(0.02)
+    return SimulatedCurves("test", 8, seed, attempts)
+
+
+args = argparse.Namespace(attempts=int(sys.argv[3]), seed="0x1", count=0, report=False, channel=None, checkpoint=sys.argv[1],
+                          checkpoint_interval=1000, outfile=sys.argv[2], adaptive_checks=False, check_stats=False,
+                          defer_properties=False)
+run_generation(args, generate)
+"""
+
+
+def write_script(directory):
+    script = os.path.join(directory, "task.py")
+    with open(script, "w") as f:
+        f.write(SCRIPT)
+    return script
+
+
+def test_terminated_pool_saves_checkpoint():
+    """The manager exiting on SIGTERM terminates the busy workers, whose tasks save the checkpoints for --resume"""
+    with tempfile.TemporaryDirectory() as directory:
+        script = write_script(directory)
+        checkpoint_dir = os.path.join(directory, "checkpoints")
+        os.makedirs(checkpoint_dir)
+        task_params = {"outfile": os.path.join(directory, "1000_0x1.json"), "seed": "0x1", "attempts": 1000}
+        checkpoint = create_checkpoint(task_params, checkpoint_dir)
+
+        def on_output(job, line, is_err):
+            if line == "attempt 5":
+                raise SystemExit(143)  # as the SIGTERM handler of the manager
+
+        pool = WorkerPool(modules=[], start_method="fork")
+        pool.parallel_tasks = 1
+        pool.job_feeder = lambda: iter([Task(None, [script, checkpoint, task_params["outfile"], "1000"])])
+        pool.cb_job_output = on_output
+        with pytest.raises(SystemExit):
+            pool.work()
+        assert all(w is None or not w.process.is_alive() for w in pool.workers)
+
+        assert load_checkpoints("x962", checkpoint_dir) == [task_params]
+        attempts, seed = Checkpoint(checkpoint).resume(1000, "0x1")
+        assert 5 <= 1000 - attempts < 1000 and int(seed, 16) == 1001 - attempts
+
+
+def test_over_budget_is_resumed():
+    """A task terminated over its budget is not a failure, it is resumed from its checkpoint with a doubled budget"""
+    with tempfile.TemporaryDirectory() as directory:
+        script = write_script(directory)
+        checkpoint, outfile = os.path.join(directory, "checkpoint.json"), os.path.join(directory, "out.json")
+        results = []
+
+        def on_finished(r):
+            results.append((r.ret_code, r.job.failed_attempts, r.job.budget_kills))
+            if r.ret_code != 0 and r.job.failed_attempts < 3:
+                pool.enqueue(r.job)
+
+        pool = WorkerPool(modules=[], start_method="fork")
+        pool.parallel_tasks = 1
+        pool.job_feeder = lambda: iter([Task(None, [script, checkpoint, outfile, "40"])])
+        pool.cb_job_budget = lambda j: 0.3 * 2 ** j.budget_kills
+        pool.cb_job_finished = on_finished
+        pool.work()
+        assert len(results) >= 2 and results[0][0] != 0
+        assert results[-1] == (0, 0, len(results) - 1)
+        with open(outfile) as f:
+            assert json.load(f)["seeds_tried"] == 40
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from dissectgen import jsonl, properties
+from dissectgen.properties import PropertyCache, cm_discriminant, complete_files, factor_with_budget
+
+
+def is_prime(n):
+    return n > 1 and all(n % d for d in range(2, int(n ** 0.5) + 1))
+
+
+class TrialECM:
+    """Finds the smallest factor of small numbers like one curve of ECM would find some factor"""
+
+    @staticmethod
+    def one_curve(n, B1=2000):
+        return [next(d for d in range(2, n + 1) if n % d == 0), 0]
+
+
+@pytest.fixture(autouse=True)
+def arithmetic(monkeypatch):
+    monkeypatch.setattr(properties, "is_pseudoprime", is_prime)
+    monkeypatch.setattr(properties, "ecm", TrialECM)
+    monkeypatch.setattr(properties, "ZZ", int)
+
+
+def squarefree_part(n):
+    d = 2
+    while d * d <= abs(n):
+        while n % (d * d) == 0:
+            n //= d * d
+        d += 1
+    return n
+
+
+def test_cm_discriminant():
+    big = 1000003 * 1000033
+    assert factor_with_budget(2 ** 3 * 3 * big ** 2, float("inf")) == ({2: 3, 3: 1, 1000003: 2, 1000033: 2}, {})
+    assert factor_with_budget(big, 0) == ({}, {big: 1})
+    assert factor_with_budget(3 * big ** 2, 0) == ({3: 1}, {big: 2})
+    for p, trace in ((1000003, 17), (1000033, -1200), (65537, 0)):
+        d = squarefree_part(trace ** 2 - 4 * p)
+        assert cm_discriminant(p, trace) == ((4 * d if d % 4 != 1 else d), False)
+    assert cm_discriminant((big + 1) // 4, 1, budget=0) == (-big, True)
+    assert cm_discriminant(big ** 2, big, budget=0) == (-3, True)  # 4p - t^2 = 3 big^2
+
+
+def test_complete_files(tmp_path):
+    curve = {"field": {"p": hex(1000003)}, "properties": {"trace": hex(17), "cm_discriminant": None}}
+    stream = jsonl.CurveStream(str(tmp_path / "1_8_0x01.jsonl"), "0x01")
+    stream.write_curve(curve)
+    stream.close({"seeds_tried": 1})
+    with open(tmp_path / "1_8_0x02.json", "w") as f:
+        json.dump({"initial_seed": "0x02", "seeds_tried": 1, "curves": [curve]}, f)
+    cache = PropertyCache(str(tmp_path / "cache.db"))
+    complete_files([str(tmp_path / "1_8_0x01.jsonl"), str(tmp_path / "1_8_0x02.json")], cache, jobs=1)
+    expected = hex(cm_discriminant(1000003, 17)[0])
+    assert cache.get((hex(1000003), hex(17))) == (expected, False)
+    assert jsonl.load(str(tmp_path / "1_8_0x01.jsonl"))["curves"][0]["properties"]["cm_discriminant"] == expected
+    with open(tmp_path / "1_8_0x02.json") as f:
+        results = json.load(f)
+    assert results["seeds_tried"] == 1 and results["curves"][0]["properties"]["cm_discriminant"] == expected
+
+
+def test_complete_files_skips_completed(tmp_path, monkeypatch):
+    curve = {"field": {"p": hex(1000003)}, "properties": {"trace": hex(17), "cm_discriminant": None}}
+    with open(tmp_path / "1_8_0x02.json", "w") as f:
+        json.dump({"initial_seed": "0x02", "seeds_tried": 1, "curves": [curve]}, f)
+    files, cache, completed, read = [str(tmp_path / "1_8_0x02.json")], PropertyCache(str(tmp_path / "c.db")), {}, []
+    pending_keys = properties.pending_keys
+    monkeypatch.setattr(properties, "pending_keys", lambda f, r: read.append(f) or pending_keys(f, r))
+    complete_files(files, cache, jobs=1, completed=completed)
+    complete_files(files, cache, jobs=1, completed=completed)
+    assert read == files and list(completed) == files
+    complete_files([], cache, jobs=1, completed=completed)
+    assert completed == {}
@@ -0,0 +1,33 @@
+import json
+from dissectgen.quota import CurveQuota
+from dissectgen.standards.utils import CURVE_REPORT_PREFIX
+
+
+def report(quota, chunk, attempt, name):
+    quota.on_output(chunk, CURVE_REPORT_PREFIX + json.dumps({"attempt": attempt, "curve": {"name": name}}))
+
+
+def test_quota_commits_in_seed_order():
+    quota = CurveQuota("x962", 192, 3)
+    first, second, third = quota.add_chunk("0x01", 10), quota.add_chunk("0x0b", 10), quota.add_chunk("0x15", 10)
+    report(quota, second, 2, "b1")
+    report(quota, second, 5, "b2")
+    report(quota, third, 1, "c1")
+    assert not quota.complete
+    report(quota, first, 4, "a1")
+    quota.on_output(first, "some other output")
+    assert not quota.complete
+    quota.finish(first)
+    assert quota.complete
+    result = quota.json_export()
+    assert [c["name"] for c in result["curves"]] == ["a1", "b1", "b2"]
+    assert result["seeds_tried"] == 15
+    assert result["initial_seed"] == "0x01"
+
+
+def test_quota_reset_discards_failed_run():
+    quota = CurveQuota("x962", 192, 1)
+    chunk = quota.add_chunk("0x01", 10)
+    quota.reset(chunk)
+    quota.finish(chunk)
+    assert not quota.complete and quota.seeds_tried == 10
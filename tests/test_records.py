@@ -0,0 +1,41 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+from dissectgen.standards.utils import CurveRecord, IntegerEncoder
+
+
+def record(**changes):
+    values = dict(standard="x962", category="x962", bits=16, p=0xfff1, a=0xffee, b=0x1234, seed="0x00ab",
+                  order=0xff95, cofactor=1, generator=(0x0102, 0x0a), cm_discriminant=-0x3f0b, embedding_degree=0x7fca,
+                  trace=0x5d, j_invariant=0x0e1f)
+    values.update(changes)
+    return CurveRecord(**values)
+
+
+def test_json_export():
+    assert record().json_export() == {
+        "name": "x962_sim_16_0x00ab", "category": "x962_sim", "desc": "",
+        "field": {"type": "Prime", "p": "0xfff1", "bits": 16}, "form": "Weierstrass",
+        "params": {"a": {"raw": "0xffee"}, "b": {"raw": "0x1234"}},
+        "generator": {"x": {"raw": "0x0102"}, "y": {"raw": "0x0a"}}, "order": 0xff95, "cofactor": 1,
+        "properties": {"cm_discriminant": "-0x3f0b", "embedding_degree": "0x7fca", "trace": "0x5d",
+                       "j_invariant": "0xe1f"},
+        "seed": "0x00ab"}
+    exported = record(generator=None, cm_discriminant=None).json_export()
+    assert exported["generator"] == {"x": {"raw": ""}, "y": {"raw": ""}}
+    assert exported["properties"]["cm_discriminant"] is None
+    json.dumps(exported, cls=IntegerEncoder)
+
+
+def test_immutable():
+    r = record()
+    with pytest.raises(AttributeError):
+        r.a = 1
+    with pytest.raises(AttributeError):
+        r.name = "x"
+    assert not hasattr(r, "__dict__")
+    for other in (pickle.loads(pickle.dumps(r)), copy.deepcopy(r)):
+        assert other.json_export() == r.json_export()
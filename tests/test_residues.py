@@ -0,0 +1,32 @@
+from dissectgen.standards.residues import is_power_residue, is_square, jacobi
+from dissectgen.standards.smoothness import primes_below
+
+
+def legendre(a, q):
+    if a % q == 0:
+        return 0
+    return 1 if any((x * x - a) % q == 0 for x in range(q)) else -1
+
+
+def test_jacobi():
+    for n in range(1, 60, 2):
+        for a in range(-n, 2 * n):
+            primes = [q for q in primes_below(n + 1) if n % q == 0]
+            expected = 1
+            for q in primes:
+                m = n
+                while m % q == 0:
+                    m //= q
+                    expected *= legendre(a, q)
+            assert jacobi(a, n) == expected
+
+
+def test_power_residues():
+    for p in primes_below(200)[1:]:
+        for n in (2, 3, 4, 6):
+            powers = {pow(x, n, p) for x in range(p)}
+            assert [is_power_residue(a, n, p) for a in range(p)] == [a in powers for a in range(p)]
+        assert [is_square(a, p) for a in range(-p, p)] == [a % p in {x * x % p for x in range(p)} for a in range(-p, p)]
+    p = 2 ** 255 - 19
+    assert is_square(4, p) and not is_square(2, p)
+    assert is_power_residue(pow(12345, 4, p), 4, p) and not is_power_residue(pow(12345, 2, p) * 2, 4, p)
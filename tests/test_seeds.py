@@ -0,0 +1,37 @@
+import random
+
+from dissectgen.standards.utils import Seed, find_integer, increment_seed, seed_bytes, seed_offset, to_seed
+
+
+def hex_increment(seed, i=1):
+    """increment_seed on hex strings"""
+    g = len(seed) * 4 - 8
+    g = g % 8 + g
+    return "0x" + format((int(seed, 16) + i) % 2 ** g, "0%dx" % (len(seed) - 2))
+
+
+def test_increment():
+    rng = random.Random(1)
+    seeds = ["0x00", "0xff", "0x0ff", "0xfff", "0x" + "f" * 40, "0x" + "0" * 40,
+             "0X2B7E151628AED2A6ABF7158809CF4F3C762E7160"]
+    seeds += ["0x" + format(rng.getrandbits(4 * d), "0%dx" % d) for d in (3, 8, 40, 64, 65) for _ in range(5)]
+    for seed in seeds:
+        for i in (1, -1, 255, 256, -300, 2 ** 64 + 3):
+            assert str(Seed.from_hex(seed) + i) == hex_increment(seed, i)
+            assert increment_seed(seed, i) == hex_increment(seed, i)
+            assert seed_offset("x962", seed, increment_seed(seed, i)) == (Seed.from_hex(seed) + i) - Seed.from_hex(seed)
+
+
+def test_seed():
+    seed = Seed.from_hex("0x00ab")
+    assert str(seed) == "0x00ab" and int(seed) == 0xab and seed.digits == 4
+    assert seed.bytes() == seed_bytes("0x00ab") == b"\x00\xab"
+    assert Seed.from_hex("0xabc").bytes() == seed_bytes("0xabc")
+    assert to_seed(seed) is seed and to_seed("0x00ab") == seed and hash(to_seed("0x00ab")) == hash(seed)
+    assert seed + 1 != seed and seed + 0x10000 == seed
+    assert Seed.from_hex("0x00") + -1 == Seed.from_hex("0xff")
+
+
+def test_find_integer_of_seed():
+    for seed in ("0x2b7e151628aed2a6abf7158809cf4f3c762e7160", "0x01", "0xabc"):
+        assert find_integer(Seed.from_hex(seed), 256) == find_integer(seed, 256)
@@ -0,0 +1,56 @@
+import random
+
+from dissectgen.standards import smoothness
+from dissectgen.standards.smoothness import primes_below, primorial, remainder_tree, smooth_part, smooth_parts
+
+
+def naive_smooth_part(m, bound):
+    h = 1
+    for prime in primes_below(bound):
+        while m % prime == 0:
+            m //= prime
+            h *= prime
+    return h
+
+
+def test_primes_below():
+    assert primes_below(2) == ()
+    assert primes_below(30) == (2, 3, 5, 7, 11, 13, 17, 19, 23, 29)
+    assert primorial(12) == 2 * 3 * 5 * 7 * 11
+    assert len(primes_below(7920)) == 1000  # 7919 is the 1000th prime
+
+
+def test_smooth_parts():
+    rng = random.Random(1)
+    numbers = [2 ** 10 * 3 ** 4 * 1009, 255 * 257, 1, 2 ** 127 - 1]
+    numbers += [rng.getrandbits(256) * rng.choice([1, 8, 9 * 49, 254]) + 1 for _ in range(50)]
+    for bound in (2, 3, 255, 256, 7001):
+        expected = [naive_smooth_part(m, bound) for m in numbers]
+        assert [smooth_part(m, bound) for m in numbers] == expected
+        assert smooth_parts(numbers, bound) == expected
+    assert smooth_parts([], 255) == []
+    assert remainder_tree(1000, [7, 11, 13]) == [1000 % 7, 1000 % 11, 1000 % 13]
+
+
+def test_rounded_primorial():
+    """Curves with different orders have different bounds, e.g. n^(1/20) of SECG, but share the primorial"""
+    rng = random.Random(2)
+    primorial.cache_clear()
+    for bound in (3001, 3500, 4096):
+        m = rng.getrandbits(256) * 3001 * 4093 ** 2 * 2 ** 5
+        assert smooth_part(m, bound) == naive_smooth_part(m, bound)
+        assert smooth_parts([m, m + 1], bound) == [naive_smooth_part(m, bound), naive_smooth_part(m + 1, bound)]
+    info = primorial.cache_info()
+    assert info.misses == 1 and info.hits == 5
+
+
+def test_trial_division(monkeypatch):
+    monkeypatch.setattr(smoothness, "PRIMORIAL_LIMIT", 100)
+    monkeypatch.setattr(smoothness, "SEGMENT", 64)
+    rng = random.Random(3)
+    numbers = [rng.getrandbits(128) * 2 ** 3 * 1009 * 4999 for _ in range(10)]
+    for bound in (101, 1010, 5000):
+        expected = [naive_smooth_part(m, bound) for m in numbers]
+        assert [smooth_part(m, bound) for m in numbers] == expected
+        assert smooth_parts(numbers, bound) == expected
+    assert smooth_part(2 ** 10 * 1009 * 4999, 5000, stop=1000) == 2 ** 10
@@ -0,0 +1,22 @@
+from dissectgen.stragglers import StragglerPolicy
+
+
+def test_budget_from_seconds_per_seed():
+    policy = StragglerPolicy(factor=4, min_budget=10)
+    assert policy.budget(100) is None
+    policy.record(100, 50.0)
+    policy.record(0, 7.0)
+    assert policy.seconds_per_seed() == 0.5
+    assert policy.budget(100) == 200
+    assert policy.budget(1) == 10
+    assert StragglerPolicy(factor=0).budget(100) is None
+
+
+def test_stragglers_slowest_first():
+    policy = StragglerPolicy()
+    assert policy.stragglers([(10, 0.0, "a")], 1, now=100.0) == []
+    policy.record(10, 10.0)
+    running = [(10, 95.0, "fast"), (10, 80.0, "slow"), (20, 70.0, "slower"), (100, 0.0, "big")]
+    assert policy.stragglers(running, 5, now=100.0) == ["slow", "slower"]
+    assert policy.stragglers(running, 1, now=100.0) == ["slow"]
+    assert policy.stragglers(running, 0, now=100.0) == []